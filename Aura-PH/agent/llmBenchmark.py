@@ -0,0 +1,181 @@
+"""
+Offline throughput benchmark for taskProcessor against mockLlmServer.py.
+
+Runs processTasks and screenTimeAnalyzer end to end (prompt building, the
+streamed NVIDIA-style call through LLMInterface, JSON extraction) under
+several concurrency levels, with the mock injecting latency, 429s and
+truncated replies. Reports throughput, latency percentiles and outcomes per
+operation and level as one JSON document.
+
+Usage:
+    python llmBenchmark.py --concurrency 1,4,16 --requests 64 --rate-limit-rate 0.1
+    python llmBenchmark.py --base-url http://127.0.0.1:8768/v1   # an already running mock
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+import contextlib
+import importlib.util
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from mockLlmServer import MockLLMServer
+
+TASKS = [
+    {"task_id": "t001", "title": "Debug Flask login API issue", "duration_minutes": 90, "priority": 5},
+    {"task_id": "t002", "title": "Create PPT for AURA project", "duration_minutes": 120, "priority": 4},
+    {"task_id": "t003", "title": "Reply to mentor emails", "duration_minutes": 20, "priority": 3},
+    {"task_id": "t004", "title": "Go for gym workout", "duration_minutes": 60, "priority": 3},
+    {"task_id": "t005", "title": "Update Notion daily progress report", "duration_minutes": 15, "priority": 2},
+]
+
+SCREEN_TIME = {
+    "session_end_time": "2026-01-23T19:14:01",
+    "screen": {"total_on_time_sec": 98, "total_off_time_sec": 2},
+    "battery": {"start_level_percent": 65, "end_level_percent": 65, "drain_percent": 0},
+    "apps": [
+        {"app": "com.whatsapp", "foreground_time_sec": 31},
+        {"app": "com.instagram.android", "foreground_time_sec": 82},
+    ],
+}
+
+OPERATIONS: Dict[str, Callable] = {
+    "processTasks": lambda processor: processor.processTasks({"tasks": TASKS}),
+    "screenTimeAnalyzer": lambda processor: processor.screenTimeAnalyzer(SCREEN_TIME),
+}
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return round(ordered[index], 3)
+
+
+def _outcome(error: Exception) -> str:
+    if isinstance(error, ValueError) and "not valid JSON" in str(error):
+        return "parse_error"
+    if isinstance(error, ValueError) and "exhausted" in str(error):
+        return "keys_exhausted"
+    return type(error).__name__
+
+
+def bench_operation(name: str, base_url: str, concurrency: int, requests: int) -> dict:
+    """Run `requests` calls of one operation with `concurrency` worker threads."""
+    from services.llmService import LLMInterface
+    from services.promptProcessor import taskProcessor
+
+    local = threading.local()
+
+    def processor():
+        # One taskProcessor per worker thread, as each planner request would have
+        if not hasattr(local, "processor"):
+            local.processor = taskProcessor(llm_interface=LLMInterface(base_url=base_url))
+        return local.processor
+
+    def call(_):
+        started = time.perf_counter()
+        try:
+            OPERATIONS[name](processor())
+            outcome = "ok"
+        except Exception as e:
+            outcome = _outcome(e)
+        return outcome, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [ms for outcome, ms in results if outcome == "ok"]
+    return {
+        "operation": name,
+        "concurrency": concurrency,
+        "requests": requests,
+        "seconds": round(elapsed, 4),
+        "throughput_per_sec": round(requests / elapsed, 2),
+        "outcomes": dict(Counter(outcome for outcome, _ in results)),
+        "latency_ms": {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95),
+                       "p99": percentile(latencies, 99)},
+    }
+
+
+def run_benchmark(concurrency_levels: List[int], requests: int, operations: List[str],
+                  base_url: Optional[str] = None, mock_options: Optional[dict] = None) -> dict:
+    """
+    Benchmark each operation at each concurrency level.
+
+    Starts an in-process MockLLMServer with mock_options unless base_url is given.
+    Dummy API keys are filled in for any that are unset, since nothing leaves the machine.
+    """
+    for name in ("GOOGLE_GEMINI_API_KEY", "NVAPI_KEY_1", "NVAPI_KEY_2"):
+        os.environ.setdefault(name, f"mock-{name.lower()}")
+
+    mock = None if base_url else MockLLMServer(port=0, **(mock_options or {})).start()
+    try:
+        report = {
+            "benchmark": "llm",
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "base_url": base_url or mock.url,
+            "mock_options": mock_options if mock else None,
+            "results": [],
+        }
+        # LLMInterface prints retries and errors; keep stdout for the JSON report
+        with contextlib.redirect_stdout(sys.stderr):
+            for concurrency in concurrency_levels:
+                for name in operations:
+                    print(f"⏱️ {name} x{requests} at concurrency {concurrency}...")
+                    report["results"].append(bench_operation(name, report["base_url"], concurrency, requests))
+        if mock:
+            report["mock_stats"] = dict(mock.stats)
+        return report
+    finally:
+        if mock:
+            mock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline taskProcessor throughput benchmark")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated worker counts")
+    parser.add_argument("--requests", type=int, default=32, help="Calls per operation and concurrency level")
+    parser.add_argument("--operations", default=",".join(OPERATIONS), help="Comma-separated operations")
+    parser.add_argument("--base-url", default=None, help="Use a running server instead of an in-process mock")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--chunk-chars", type=int, default=16)
+    parser.add_argument("--chunk-interval", type=float, default=0.005)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--truncate-rate", type=float, default=0.0)
+    parser.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    if importlib.util.find_spec("openai") is None:
+        print("❌ openai is not installed (pip install openai); LLMInterface needs it for NVIDIA-style calls")
+        sys.exit(1)
+
+    mock_options = {"latency": args.latency, "jitter": args.jitter, "chunk_chars": args.chunk_chars,
+                    "chunk_interval": args.chunk_interval, "rate_limit_rate": args.rate_limit_rate,
+                    "truncate_rate": args.truncate_rate}
+    report = run_benchmark([int(level) for level in args.concurrency.split(",") if level.strip()],
+                           args.requests, [name for name in args.operations.split(",") if name],
+                           base_url=args.base_url, mock_options=mock_options)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"✅ Benchmark written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
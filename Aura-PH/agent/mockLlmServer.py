@@ -0,0 +1,320 @@
+"""
+Local OpenAI-compatible stand-in for the NVIDIA chat endpoint.
+
+Serves POST /v1/chat/completions (streamed as server-sent events or as one
+JSON body) and GET /v1/models, with injectable misbehaviour so retries, key
+rotation and JSON parsing can be exercised offline:
+
+  - latency:         seconds before the first byte (plus up to `jitter` more)
+  - chunk cadence:   `chunk_chars` characters per SSE chunk, `chunk_interval` apart
+  - 429 injection:   `rate_limit_rate` of requests, or every request made with a
+                     key listed in `rate_limited_keys`
+  - truncated JSON:  `truncate_rate` of responses are cut off mid-way with
+                     finish_reason "length", like hitting max_tokens
+
+Replies are canned JSON shaped like what each taskAnalyzerPrompts prompt asks
+for (task categories, health flags, screen-time verdict), so taskProcessor
+parses them exactly as it would a real model's answer.
+
+Usage:
+    python mockLlmServer.py --port 8768 --latency 0.3 --rate-limit-rate 0.1
+    LLM_BASE_URL=http://127.0.0.1:8768/v1 python test.py
+"""
+
+import re
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, Optional
+
+CATEGORIES = ["Deep Work", "Creative Work", "Admin / Shallow", "Social / Communication",
+              "Physical / Lifestyle", "Recovery"]
+
+SCREEN_TIME_VERDICT = {
+    "overall_verdict": {
+        "productivity_score": 62,
+        "distraction_score": 48,
+        "sleep_disruption_risk": "medium",
+        "summary": "Mostly short sessions with social apps dominating foreground time."
+    },
+    "key_patterns": [
+        {"pattern": "Attention fragmentation", "evidence": "Frequent switches between messaging and social apps",
+         "impact": "Harder to sustain deep work blocks"}
+    ],
+    "focus_windows": [
+        {"start_time": "09:00", "end_time": "11:00", "reason": "Low usage in the morning",
+         "recommended_task_types": ["deep_work"]}
+    ],
+    "distraction_windows": [
+        {"start_time": "19:00", "end_time": "20:00", "top_distraction_apps": ["Instagram"],
+         "reason": "Longest social session", "suggested_intervention": "Set an app timer"}
+    ],
+    "doomscroll_events": [],
+    "sleep_risk_analysis": {
+        "late_night_usage_detected": False,
+        "last_screen_time": "19:14",
+        "night_unlock_count": 0,
+        "risk_summary": "No late-night usage in this session."
+    },
+    "recommendations": [
+        {"recommendation": "Batch messages twice a day", "best_time_to_apply": "12:00-12:30",
+         "expected_benefit": "Fewer interruptions"}
+    ],
+    "tomorrow_plan_suggestion": {
+        "best_deep_work_window": "09:00-11:00",
+        "best_admin_window": "14:00-15:00",
+        "best_recovery_window": "17:30-18:00",
+        "notes": "Protect the morning block."
+    }
+}
+
+
+def _task_names(prompt: str):
+    """Task titles from the repr'd task list embedded in a prompt."""
+    names = re.findall(r"'(?:title|task)': '([^']*)'", prompt)
+    if not names:
+        listed = re.search(r"Task List.*?:\s*(\[.*?\])\s*\n", prompt, flags=re.DOTALL)
+        names = re.findall(r"'([^']+)'", listed.group(1)) if listed else []
+    return names or ["Task"]
+
+
+def canned_reply(prompt: str) -> str:
+    """Deterministic reply in the format the prompt asks for."""
+    if "Task Categorizer" in prompt:
+        names = _task_names(prompt)
+        return json.dumps([{"task": name, "category": CATEGORIES[i % len(CATEGORIES)]}
+                           for i, name in enumerate(names)], indent=2)
+    if "Health & Productivity Advisor" in prompt:
+        names = _task_names(prompt)
+        return json.dumps([{"task": name, "category": CATEGORIES[i % len(CATEGORIES)], "avoid": i % 4 == 3}
+                           for i, name in enumerate(names)], indent=2)
+    if "screen time" in prompt.lower():
+        return json.dumps(SCREEN_TIME_VERDICT, indent=2)
+    return ("Predicted energy peaks in the morning with a dip after lunch. "
+            "Body condition: mostly sedentary. Plan deep work before noon.")
+
+
+class MockLLMServer:
+    """OpenAI-compatible chat server with configurable latency and fault injection"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8768, latency: float = 0.0, jitter: float = 0.0,
+                 chunk_chars: int = 16, chunk_interval: float = 0.0, rate_limit_rate: float = 0.0,
+                 rate_limited_keys: Iterable[str] = (), truncate_rate: float = 0.0, seed: int = 0,
+                 reply: Optional[str] = None, key_latency: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            host, port: Bind address (port 0 picks a free port)
+            latency: Seconds before the first byte of every response
+            jitter: Up to this many extra seconds, drawn uniformly per request
+            chunk_chars: Characters of content per streamed chunk
+            chunk_interval: Seconds between streamed chunks
+            rate_limit_rate: Fraction of requests answered with 429
+            rate_limited_keys: API keys that always get 429 (to exercise key rotation)
+            truncate_rate: Fraction of replies cut off part-way (finish_reason "length")
+            seed: Seed for the injection decisions, so runs are repeatable
+            reply: Fixed reply content instead of the canned per-prompt replies
+            key_latency: API key -> extra seconds before its first byte (a slow upstream to hedge around)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_chars = max(1, chunk_chars)
+        self.chunk_interval = chunk_interval
+        self.rate_limit_rate = rate_limit_rate
+        self.rate_limited_keys = set(rate_limited_keys)
+        self.truncate_rate = truncate_rate
+        self.reply = reply
+        self.key_latency = dict(key_latency or {})
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"connections": 0, "requests": 0, "rate_limited": 0, "truncated": 0, "completed": 0}
+        self.server = ThreadingHTTPServer((host, port), make_handler(self))
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to LLMInterface(base_url=...)"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _add(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def plan(self, api_key: str, prompt: str) -> Dict[str, Any]:
+        """Decide how to answer one request: delay, 429 or (possibly truncated) content."""
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            delay += self.key_latency.get(api_key, 0.0)
+            rate_limited = api_key in self.rate_limited_keys or self._random.random() < self.rate_limit_rate
+            truncated = not rate_limited and self._random.random() < self.truncate_rate
+            cut = self._random.uniform(0.2, 0.8)
+
+        content = self.reply if self.reply is not None else canned_reply(prompt)
+        if truncated:
+            content = content[:max(1, int(len(content) * cut))]
+        return {"delay": delay, "rate_limited": rate_limited, "truncated": truncated, "content": content}
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def make_handler(mock: MockLLMServer):
+    """Build an HTTP handler class answering like an OpenAI-compatible API"""
+
+    class MockHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            mock._add("connections")
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._reply(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+            else:
+                self._reply(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._reply(404, {"error": {"message": "not found"}})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            except json.JSONDecodeError:
+                self._reply(400, {"error": {"message": "invalid JSON body"}})
+                return
+
+            api_key = self.headers.get("Authorization", "").replace("Bearer ", "", 1)
+            prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+            plan = mock.plan(api_key, prompt)
+            time.sleep(plan["delay"])
+
+            if plan["rate_limited"]:
+                mock._add("rate_limited")
+                self._reply(429, {"error": {"message": "Too Many Requests", "type": "rate_limit_exceeded"}})
+                return
+
+            if plan["truncated"]:
+                mock._add("truncated")
+            model = body.get("model", "mock")
+            finish = "length" if plan["truncated"] else "stop"
+            if body.get("stream"):
+                include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+                self._stream(model, plan["content"], finish, prompt if include_usage else None)
+            else:
+                self._reply(200, {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "finish_reason": finish,
+                                 "message": {"role": "assistant", "content": plan["content"]}}],
+                    "usage": self._usage(prompt, plan["content"]),
+                })
+            mock._add("completed")
+
+        def _stream(self, model: str, content: str, finish: str, usage_prompt: Optional[str]):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            # Chunked, so the connection stays open for the client's next request
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+            created = int(time.time())
+
+            def event(delta: Optional[Dict[str, Any]], finish_reason=None, usage=None):
+                choices = [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else []
+                payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                           "model": model, "choices": choices}
+                if usage:
+                    payload["usage"] = usage
+                write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+            def write(data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            try:
+                event({"role": "assistant", "content": ""})
+                for start in range(0, len(content), mock.chunk_chars):
+                    if start and mock.chunk_interval:
+                        time.sleep(mock.chunk_interval)
+                    event({"content": content[start:start + mock.chunk_chars]})
+                event({}, finish)
+                if usage_prompt is not None:
+                    # stream_options.include_usage: a final chunk with usage and no choices
+                    event(None, usage=self._usage(usage_prompt, content))
+                write(b"data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+
+        @staticmethod
+        def _usage(prompt: str, content: str) -> Dict[str, int]:
+            prompt_tokens, completion_tokens = _estimate_tokens(prompt), _estimate_tokens(content)
+            return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens}
+
+        def _reply(self, status: int, payload: Dict[str, Any]):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible LLM stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8768)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first byte")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--chunk-chars", type=int, default=16, help="Characters per streamed chunk")
+    parser.add_argument("--chunk-interval", type=float, default=0.01, help="Seconds between streamed chunks")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-limited-key", action="append", default=[], help="API key that always gets 429")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Fraction of replies cut off mid-way")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mock = MockLLMServer(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                         chunk_chars=args.chunk_chars, chunk_interval=args.chunk_interval,
+                         rate_limit_rate=args.rate_limit_rate, rate_limited_keys=args.rate_limited_key,
+                         truncate_rate=args.truncate_rate, seed=args.seed)
+    print(f"✅ Mock LLM server on {mock.url}")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.server.server_close()
+        print(json.dumps(mock.stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Offline benchmark for RAGProcessor ingestion and retrieval.
+
+A deterministic fake embedder stands in for LLMInterface.get_embeddings, so
+no API key or network is needed and runs are comparable across versions.
+For each corpus size the benchmark builds a synthetic store and measures:
+
+  - build:    store_many throughput while writing the corpus
+  - load:     cold load time of a fresh RAGProcessor on the saved store
+  - store:    single-document store() throughput on top of the corpus
+  - retrieve: p50/p95/p99 latency of retrieve()
+  - memory:   Python heap held by the loaded store (tracemalloc)
+  - disk:     size of the persisted store
+
+Results are printed (or written with --output) as one JSON document.
+
+Usage:
+    python ragBenchmark.py                              # 1k and 10k documents
+    python ragBenchmark.py --sizes 1000,10000,100000,1000000 --output rag_bench.json
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import zlib
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ragProcessor.rag import RAGProcessor
+
+DEFAULT_SIZES = [1000, 10000]
+EMBEDDING_DIM = 768  # models/text-embedding-004
+
+WORDS = (
+    "user prefers deep coding tasks morning evening meeting focus break walk sleep "
+    "report doctor blood pressure sugar medicine exercise gym running reading notion "
+    "page project deadline review email call family dinner music study exam notes "
+    "phone screen time instagram whatsapp youtube battery charge travel office home "
+    "plan schedule weekly goal habit water coffee tea lunch rest energy mood stress"
+).split()
+
+
+class FakeEmbedder:
+    """Deterministic hashed bag-of-words embeddings with the same shape as Gemini's"""
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self._token_vectors: Dict[str, np.ndarray] = {}
+        self.calls = 0
+        self.batches = 0
+
+    def _token_vector(self, token: str) -> np.ndarray:
+        vector = self._token_vectors.get(token)
+        if vector is None:
+            rng = np.random.default_rng(zlib.crc32(token.encode("utf-8")))
+            vector = self._token_vectors[token] = rng.standard_normal(self.dim)
+        return vector
+
+    def get_embedding(self, text: str) -> list:
+        self.calls += 1
+        vector = np.zeros(self.dim)
+        for token in text.lower().split():
+            vector += self._token_vector(token.strip(".,"))
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def get_embeddings(self, texts: List[str], task_type: str = "retrieval_document") -> np.ndarray:
+        self.batches += 1
+        return np.array([self.get_embedding(text) for text in texts], dtype=np.float32).reshape(len(texts), self.dim)
+
+
+def synthetic_texts(count: int, seed: int = 0) -> List[str]:
+    """Short note-like documents drawn from a fixed vocabulary."""
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(8, 24))) + "." for _ in range(count)]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def bench_size(size: int, workdir: str, dim: int = EMBEDDING_DIM, queries: int = 20,
+               single_stores: int = 5, batch_size: int = 10000, measure_memory: bool = True) -> dict:
+    """
+    Benchmark one corpus size in workdir.
+
+    Args:
+        size: Number of documents in the corpus
+        workdir: Directory for the store file (removed by the caller)
+        dim: Embedding dimension
+        queries: Number of retrieve() calls timed
+        single_stores: Number of store() calls timed on top of the corpus
+        batch_size: Documents per store_many call while building
+        measure_memory: Measure the loaded store's heap with tracemalloc (one extra load)
+
+    Returns:
+        Result dict for this size
+    """
+    path = os.path.join(workdir, f"rag_store_{size}.json")
+    embedder = FakeEmbedder(dim)
+    result = {"documents": size, "dim": dim}
+
+    # ---------------- BUILD (store_many) ----------------
+    rag = RAGProcessor(persistence_path=path, llm_interface=embedder)
+    texts = synthetic_texts(size)
+    started = time.perf_counter()
+    for offset in range(0, size, batch_size):
+        batch = texts[offset:offset + batch_size]
+        rag.store_many(batch, metadatas=[{"n": offset + i} for i in range(len(batch))],
+                       ids=[f"doc-{offset + i}" for i in range(len(batch))])
+    elapsed = time.perf_counter() - started
+    result["build"] = {"seconds": round(elapsed, 4), "docs_per_sec": round(size / elapsed, 1)}
+    del rag, texts
+    gc.collect()
+    result["disk_bytes"] = os.path.getsize(path)
+
+    # ---------------- COLD LOAD ----------------
+    started = time.perf_counter()
+    rag = RAGProcessor(persistence_path=path, llm_interface=embedder)
+    result["load"] = {"seconds": round(time.perf_counter() - started, 4)}
+    assert len(rag.documents) == size, f"loaded {len(rag.documents)} of {size} documents"
+
+    # ---------------- RETRIEVE ----------------
+    latencies = []
+    for query in synthetic_texts(queries, seed=1):
+        started = time.perf_counter()
+        rag.retrieve(query, n_results=3)
+        latencies.append((time.perf_counter() - started) * 1000)
+    result["retrieve_ms"] = {
+        "queries": queries,
+        "p50": round(percentile(latencies, 50), 3),
+        "p95": round(percentile(latencies, 95), 3),
+        "p99": round(percentile(latencies, 99), 3),
+    }
+
+    # ---------------- SINGLE STORE ----------------
+    started = time.perf_counter()
+    for text in synthetic_texts(single_stores, seed=2):
+        rag.store(text, {"source": "bench"})
+    elapsed = time.perf_counter() - started
+    result["store"] = {"calls": single_stores, "seconds": round(elapsed, 4),
+                       "docs_per_sec": round(single_stores / elapsed, 2)}
+    del rag
+    gc.collect()
+
+    # ---------------- MEMORY ----------------
+    if measure_memory:
+        tracemalloc.start()
+        rag = RAGProcessor(persistence_path=path, llm_interface=embedder)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["memory_bytes"] = {"resident": current, "peak_during_load": peak,
+                                  "per_document": current // max(1, len(rag.documents))}
+        del rag
+        gc.collect()
+
+    os.remove(path)
+    return result
+
+
+def run_benchmark(sizes: List[int], dim: int = EMBEDDING_DIM, queries: int = 20, single_stores: int = 5,
+                  workdir: Optional[str] = None, memory_limit_mb: Optional[float] = None,
+                  measure_memory: bool = True) -> dict:
+    """
+    Benchmark every size in order and return the JSON report.
+
+    Sizes whose projected memory (from the bytes per document measured on
+    the previous size) exceeds memory_limit_mb are skipped and reported as such.
+    """
+    report = {
+        "benchmark": "rag",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "results": [],
+    }
+    own_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="rag_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    per_document = None
+    try:
+        for size in sizes:
+            if memory_limit_mb and per_document:
+                projected_mb = per_document * size / (1024 * 1024)
+                if projected_mb > memory_limit_mb:
+                    print(f"⚠️ Skipping {size} documents: ~{projected_mb:.0f} MB projected "
+                          f"(limit {memory_limit_mb:.0f} MB)", file=sys.stderr)
+                    report["results"].append({"documents": size, "dim": dim,
+                                              "skipped": f"projected {projected_mb:.0f} MB > {memory_limit_mb:.0f} MB"})
+                    continue
+
+            print(f"⏱️ Benchmarking {size} documents...", file=sys.stderr)
+            result = bench_size(size, workdir, dim=dim, queries=queries,
+                                single_stores=single_stores, measure_memory=measure_memory)
+            report["results"].append(result)
+            if "memory_bytes" in result:
+                # Building holds the texts and the list of documents: allow for twice the loaded size
+                per_document = 2 * result["memory_bytes"]["per_document"]
+    finally:
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline RAGProcessor benchmark")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated corpus sizes, e.g. 1000,10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM, help="Embedding dimension")
+    parser.add_argument("--queries", type=int, default=20, help="retrieve() calls per size")
+    parser.add_argument("--stores", type=int, default=5, help="Single store() calls per size")
+    parser.add_argument("--workdir", default=None, help="Where store files are written (default: a temp dir)")
+    parser.add_argument("--memory-limit-mb", type=float, default=4096,
+                        help="Skip sizes projected to need more memory than this (0 disables)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc measurement")
+    parser.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        [int(size) for size in args.sizes.split(",") if size.strip()],
+        dim=args.dim, queries=args.queries, single_stores=args.stores, workdir=args.workdir,
+        memory_limit_mb=args.memory_limit_mb or None, measure_memory=not args.no_memory,
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"✅ Benchmark written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
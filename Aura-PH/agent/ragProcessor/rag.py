@@ -3,37 +3,62 @@ import os
 import numpy as np
 import uuid
 from services.llmService import LLMInterface
+from services import metrics
 
 class RAGProcessor:
-    def __init__(self, persistence_path=r"d:\AURA\data\rag_store.json"):
+    def __init__(self, persistence_path=r"d:\AURA\data\rag_store.json", llm_interface=None):
         """
         Initialize lightweight RAG with JSON storage.
+        llm_interface: anything exposing get_embeddings or get_embedding (defaults to LLMInterface)
         """
         self.persistence_path = persistence_path
-        self.llm_interface = LLMInterface()
+        self.llm_interface = llm_interface or LLMInterface.shared()
         self.documents = []
+        # float32 unit-length document embeddings for retrieve, rebuilt after any change
+        self._matrix = None
         self._load_data()
 
     def _load_data(self):
         """Load data from JSON file if exists."""
+        self._matrix = None
         if os.path.exists(self.persistence_path):
-            try:
-                with open(self.persistence_path, 'r', encoding='utf-8') as f:
-                    self.documents = json.load(f)
-            except Exception as e:
-                print(f"⚠️ Could not load RAG data: {e}. Starting fresh.")
-                self.documents = []
+            with metrics.span("rag.load") as span:
+                try:
+                    with open(self.persistence_path, 'r', encoding='utf-8') as f:
+                        self.documents = json.load(f)
+                    span.add(bytes_in=os.path.getsize(self.persistence_path), documents=len(self.documents))
+                except Exception as e:
+                    span.label(status="error")
+                    print(f"⚠️ Could not load RAG data: {e}. Starting fresh.")
+                    self.documents = []
         else:
             # Ensure directory exists
             os.makedirs(os.path.dirname(self.persistence_path), exist_ok=True)
 
     def _save_data(self):
         """Save data to JSON file."""
-        try:
-            with open(self.persistence_path, 'w', encoding='utf-8') as f:
-                json.dump(self.documents, f, indent=2)
-        except Exception as e:
-            print(f"❌ Could not save RAG data: {e}")
+        self._matrix = None
+        with metrics.span("rag.save") as span:
+            try:
+                with open(self.persistence_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.documents, f, indent=2)
+                span.add(bytes_out=os.path.getsize(self.persistence_path), documents=len(self.documents))
+            except Exception as e:
+                span.label(status="error")
+                print(f"❌ Could not save RAG data: {e}")
+
+    def _embed(self, texts: list, task_type: str) -> np.ndarray:
+        """float32 embeddings, one row per text (all zeros where embedding failed)."""
+        if hasattr(self.llm_interface, "get_embeddings"):
+            return self.llm_interface.get_embeddings(texts, task_type=task_type)
+        rows = [self.llm_interface.get_embedding(text) for text in texts]
+        dim = next((len(row) for row in rows if row), 0)
+        return np.array([row or [0.0] * dim for row in rows], dtype=np.float32)
+
+    @staticmethod
+    def _to_json(embedding: np.ndarray) -> list:
+        # Nine significant digits read back as the same float32, without float64 noise
+        return [float(f"{value:.9g}") for value in embedding.tolist()]
 
     def store(self, text: str, metadata: dict = None):
         """
@@ -42,8 +67,8 @@ class RAGProcessor:
         if metadata is None:
             metadata = {}
             
-        embedding = self.llm_interface.get_embedding(text)
-        if not embedding:
+        embedding = self._embed([text], "retrieval_document")[0]
+        if not embedding.any():
             print("⚠️ Failed to generate embedding. Document not stored.")
             return None
 
@@ -51,53 +76,104 @@ class RAGProcessor:
             "id": str(uuid.uuid4()),
             "text": text,
             "metadata": metadata,
-            "embedding": embedding
+            "embedding": self._to_json(embedding)
         }
         
         self.documents.append(doc)
         self._save_data()
         return doc["id"]
 
+    def store_many(self, texts: list, metadatas: list = None, ids: list = None):
+        """
+        Embeds and stores several texts, saving the store once.
+        Documents whose id already exists are replaced in place.
+        """
+        if metadatas is None:
+            metadatas = [{} for _ in texts]
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+
+        index = {doc["id"]: i for i, doc in enumerate(self.documents)}
+        stored_ids = []
+
+        # One batched embedding request per API-sized chunk instead of one per text
+        embeddings = self._embed(list(texts), "retrieval_document")
+        for text, metadata, doc_id, embedding in zip(texts, metadatas, ids, embeddings):
+            if not embedding.any():
+                print(f"⚠️ Failed to generate embedding for {doc_id}. Document not stored.")
+                stored_ids.append(None)
+                continue
+
+            doc = {
+                "id": doc_id,
+                "text": text,
+                "metadata": metadata or {},
+                "embedding": self._to_json(embedding)
+            }
+
+            if doc_id in index:
+                self.documents[index[doc_id]] = doc
+            else:
+                index[doc_id] = len(self.documents)
+                self.documents.append(doc)
+            stored_ids.append(doc_id)
+
+        if any(stored_ids):
+            self._save_data()
+        return stored_ids
+
+    def delete(self, ids: list) -> int:
+        """
+        Removes documents by id. Returns the number of documents removed.
+        """
+        ids = set(ids)
+        before = len(self.documents)
+        self.documents = [doc for doc in self.documents if doc["id"] not in ids]
+        removed = before - len(self.documents)
+        self._matrix = None
+        if removed:
+            self._save_data()
+        return removed
+
     def retrieve(self, query: str, n_results: int = 3):
         """
         Retrieve top N documents for query using cosine similarity.
         """
+        with metrics.span("rag.retrieve") as span:
+            span.add(documents=len(self.documents))
+            return self._retrieve(query, n_results)
+
+    def _document_matrix(self) -> np.ndarray:
+        if self._matrix is None or len(self._matrix) != len(self.documents):
+            matrix = np.array([doc['embedding'] for doc in self.documents], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            # Zero vectors stay zero and score 0
+            self._matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+        return self._matrix
+
+    def _retrieve(self, query: str, n_results: int):
         if not self.documents:
             return []
 
-        query_embedding = self.llm_interface.get_embedding(query)
-        if not query_embedding:
+        query_vec = self._embed([query], "retrieval_query")[0]
+        norm_q = np.linalg.norm(query_vec)
+        if not norm_q:
             return []
 
-        # Calculate cosine similarity
-        query_vec = np.array(query_embedding)
-        scores = []
-        
-        for doc in self.documents:
-            doc_vec = np.array(doc['embedding'])
-            # Cosine similarity: (A . B) / (||A|| * ||B||)
-            # Assuming normalized embeddings often come from APIs, but let's be safe
-            dot_product = np.dot(query_vec, doc_vec)
-            norm_q = np.linalg.norm(query_vec)
-            norm_d = np.linalg.norm(doc_vec)
-            
-            if norm_q * norm_d == 0:
-                score = 0
-            else:
-                score = dot_product / (norm_q * norm_d)
-            
-            scores.append((score, doc))
+        # Cosine similarity of the query against every document at once
+        scores = self._document_matrix() @ (query_vec / norm_q)
+
+        # Highest scores first; ties keep insertion order
+        order = np.argsort(-scores, kind="stable")[:n_results]
 
-        # Sort by score descending
-        scores.sort(key=lambda x: x[0], reverse=True)
-        
         # Return top N results (skipping embedding in output for cleanliness)
         top_results = []
-        for score, doc in scores[:n_results]:
+        for i in order:
+            doc = self.documents[i]
             top_results.append({
                 "text": doc["text"],
                 "metadata": doc["metadata"],
-                "score": float(score)
+                "score": float(scores[i])
             })
             
         return top_results
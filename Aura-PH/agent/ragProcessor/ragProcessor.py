@@ -10,7 +10,7 @@ class RAGProcessor:
         Initialize lightweight RAG with JSON storage.
         """
         self.persistence_path = persistence_path
-        self.llm_interface = LLMInterface()
+        self.llm_interface = LLMInterface.shared()
         self.documents = []
         self._load_data()
 
@@ -0,0 +1,132 @@
+"""
+Per-upstream circuit breakers, shared by every LLMInterface in the process.
+
+closed     calls go through; consecutive upstream failures (connection errors,
+           timeouts, 5xx) are counted and failure_threshold of them open it
+open       calls fail fast with CircuitOpenError (or take the Gemini fallback)
+           until reset_timeout has passed
+half_open  one probe call is let through; success closes the circuit, failure
+           opens it for another reset_timeout
+
+    breaker = breaker_for("https://integrate.api.nvidia.com/v1")
+    if not breaker.allow():
+        raise CircuitOpenError(...)
+
+health() reports state and counters of every breaker, e.g. for a status page.
+"""
+
+import time
+import threading
+from typing import Any, Callable, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ValueError):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Failure counting and open/half-open/closed state for one upstream"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            name: Upstream this breaker guards (the base URL)
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe is allowed
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self.stats: Dict[str, Any] = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0,
+                                      "last_error": None}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go to the upstream now; in half-open state only the probe may."""
+        with self._lock:
+            now = self.clock()
+            if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._probe_started = None
+            if self._state == HALF_OPEN:
+                # A probe that never reported back does not block the circuit forever
+                if self._probe_started is None or now - self._probe_started >= self.reset_timeout:
+                    self._probe_started = now
+                    return True
+            elif self._state == CLOSED:
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe is allowed (0 when closed)."""
+        with self._lock:
+            if self._state == CLOSED:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - self.clock())
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_started = None
+            self.stats["successes"] += 1
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        with self._lock:
+            self._failures += 1
+            self.stats["failures"] += 1
+            if error is not None:
+                self.stats["last_error"] = f"{type(error).__name__}: {str(error)[:200]}"
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.stats["opened"] += 1
+                self._state = OPEN
+                self._opened_at = self.clock()
+                self._probe_started = None
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self._state, "consecutive_failures": self._failures, **self.stats}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(name: str, **options) -> CircuitBreaker:
+    """The process-wide breaker for an upstream; options apply when it is first created."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **options)
+        return breaker
+
+
+def health() -> Dict[str, Dict[str, Any]]:
+    """State and counters of every upstream seen so far."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.health() for breaker in breakers}
+
+
+def reset():
+    """Forget all breakers (tests, or after reconfiguring endpoints)."""
+    with _breakers_lock:
+        _breakers.clear()
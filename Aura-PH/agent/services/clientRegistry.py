@@ -0,0 +1,92 @@
+"""
+Process-wide registry of HTTP clients and shared service objects.
+
+OpenAI clients are kept per (endpoint, API key, timeout), so every request to
+the same upstream reuses one httpx connection pool and its keep-alive
+connections instead of building a client (and a TLS handshake) per call.
+Other expensive objects — a shared LLMInterface per endpoint — are kept with
+shared(), which builds each one once per process even under concurrent first
+use.
+
+After os.fork() the child starts with an empty registry: sockets and locks
+inherited from the parent must not be used by both processes, so a forked
+process-pool worker builds its own clients on first use.
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+_lock = threading.Lock()
+_openai_clients: Dict[Tuple[str, str, float], Any] = {}
+_shared: Dict[Hashable, Any] = {}
+_building: Dict[Hashable, threading.Lock] = {}
+
+
+def openai_client(base_url: str, api_key: str, timeout: float = 30.0):
+    """The process's OpenAI client for this endpoint and key (created on first use)."""
+    key = (base_url, api_key, timeout)
+    client = _openai_clients.get(key)
+    if client is not None:
+        return client
+    from openai import OpenAI
+
+    with _lock:
+        client = _openai_clients.get(key)
+        if client is None:
+            client = _openai_clients[key] = OpenAI(base_url=base_url, api_key=api_key, timeout=timeout)
+        return client
+
+
+def shared(key: Hashable, factory: Callable[[], Any]):
+    """
+    The process-wide object stored under key, built with factory() the first time.
+
+    Concurrent first callers wait for a single factory() call; different keys
+    are built independently.
+    """
+    value = _shared.get(key)
+    if value is not None:
+        return value
+    with _lock:
+        building = _building.setdefault(key, threading.Lock())
+    with building:
+        value = _shared.get(key)
+        if value is None:
+            value = factory()
+            with _lock:
+                _shared[key] = value
+        return value
+
+
+def reset(close: bool = True):
+    """
+    Forget every client and shared object.
+
+    Args:
+        close: Close the OpenAI clients' connection pools (False after a fork,
+               where the pools belong to the parent)
+    """
+    global _lock
+    if close:
+        with _lock:
+            clients = list(_openai_clients.values())
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+    else:
+        # The parent may have held the lock at fork time
+        _lock = threading.Lock()
+    _openai_clients.clear()
+    _shared.clear()
+    _building.clear()
+
+
+def _after_fork_in_child():
+    reset(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,200 @@
+"""
+Hedged requests: a duplicate request when the first one is slow to start.
+
+A call starts one request. If no token has arrived after the hedge delay
+(the observed p95 time-to-first-token, clamped to [min_delay, max_delay]),
+a duplicate goes out on another key or model and whichever finishes first
+wins; the other is cancelled. Duplicates are paid for out of a budget: every
+call adds `budget` credit (0.1 -> at most ~10% extra requests over time) and
+a hedge spends one credit, so a slow upstream cannot double the load.
+
+    policy = HedgePolicy(budget=0.1)
+    winner = race(run_request, ["primary", "backup"], policy)
+
+Enabled in LLMInterface with hedge=HedgePolicy(...) or AURA_HEDGE=1
+(AURA_HEDGE_BUDGET, AURA_HEDGE_PERCENTILE and AURA_HEDGE_MODEL tune it).
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from services import metrics
+
+
+class HedgePolicy:
+    """When to send a duplicate request, and how many duplicates are affordable"""
+
+    def __init__(self, percentile: float = 95, budget: float = 0.1, min_delay: float = 0.5,
+                 max_delay: float = 10.0, default_delay: float = 2.0, min_samples: int = 20,
+                 window: int = 200, burst: float = 1.0, hedge_model: Optional[str] = None):
+        """
+        Args:
+            percentile: Time-to-first-token percentile after which a duplicate is sent
+            budget: Extra requests allowed per call, on average (0.1 = 10% more load)
+            min_delay, max_delay: Bounds on the hedge delay in seconds
+            default_delay: Hedge delay until min_samples first-token times are observed
+            window: First-token samples kept
+            burst: Credit available up front (and the most that can build up)
+            hedge_model: Model for the duplicate (default: the same model on another key)
+        """
+        self.percentile = percentile
+        self.budget = budget
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self.burst = burst
+        self.hedge_model = hedge_model
+        self._lock = threading.Lock()
+        self._ttft = deque(maxlen=window)
+        self._credit = burst
+        self.stats: Dict[str, int] = {"calls": 0, "hedges": 0, "hedge_wins": 0, "denied": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["HedgePolicy"]:
+        """A policy configured from AURA_HEDGE* variables, or None when AURA_HEDGE is unset/0."""
+        if os.getenv("AURA_HEDGE", "") in ("", "0"):
+            return None
+        return cls(percentile=float(os.getenv("AURA_HEDGE_PERCENTILE", "95")),
+                   budget=float(os.getenv("AURA_HEDGE_BUDGET", "0.1")),
+                   hedge_model=os.getenv("AURA_HEDGE_MODEL") or None)
+
+    def record_ttft(self, seconds: float):
+        with self._lock:
+            self._ttft.append(seconds)
+
+    def delay(self) -> float:
+        """Seconds to wait for a first token before hedging."""
+        with self._lock:
+            samples = sorted(self._ttft)
+        if len(samples) < self.min_samples:
+            return self.default_delay
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100.0))
+        return max(self.min_delay, min(self.max_delay, samples[index]))
+
+    def started(self):
+        """Count one call and add its share of hedge credit."""
+        with self._lock:
+            self.stats["calls"] += 1
+            self._credit = min(self.burst, self._credit + self.budget)
+
+    def try_hedge(self) -> bool:
+        """Spend one credit on a duplicate request, if there is one."""
+        with self._lock:
+            if self._credit >= 1.0:
+                self._credit -= 1.0
+                self.stats["hedges"] += 1
+                return True
+            self.stats["denied"] += 1
+            return False
+
+    def won(self):
+        with self._lock:
+            self.stats["hedge_wins"] += 1
+
+
+class Attempt:
+    """One in-flight request of a hedged call"""
+
+    def __init__(self, label: Any, notify: Callable[[], None]):
+        self.label = label
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.done = False
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.cancelled = threading.Event()
+        self.on_cancel: Optional[Callable[[], None]] = None  # e.g. closes the HTTP stream
+        self._notify = notify
+
+    def first_token(self):
+        """Called by the request when its first token arrives."""
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            self._notify()
+
+    def finish(self, result=None, error: Optional[BaseException] = None):
+        self.result, self.error, self.done = result, error, True
+        self._notify()
+
+    def cancel(self):
+        self.cancelled.set()
+        if self.on_cancel:
+            try:
+                self.on_cancel()
+            except Exception:
+                pass
+
+
+def race(run: Callable[[Attempt], Any], labels: List[Any], policy: HedgePolicy) -> Attempt:
+    """
+    Run labels[0], hedging with the next label whenever no attempt has produced
+    a token within policy.delay() and the budget allows it.
+
+    Args:
+        run: Performs one request for attempt.label and returns its result. It should
+             call attempt.first_token() on the first token and stop once attempt.cancelled is set.
+        labels: Primary first, then the labels duplicates may use
+        policy: Hedge delay and budget
+
+    Returns:
+        The attempt that finished first without an error; the others are cancelled.
+        Raises the last error when every started attempt fails.
+    """
+    condition = threading.Condition()
+    attempts: List[Attempt] = []
+    backups = list(labels[1:])
+
+    def notify():
+        with condition:
+            condition.notify_all()
+
+    def execute(attempt: Attempt):
+        try:
+            attempt.finish(result=run(attempt))
+        except BaseException as e:
+            attempt.finish(error=e)
+
+    def launch(label):
+        attempt = Attempt(label, notify)
+        attempts.append(attempt)
+        threading.Thread(target=execute, args=(attempt,), daemon=True).start()
+
+    policy.started()
+    with condition:
+        launch(labels[0])
+        hedge_at = time.perf_counter() + policy.delay()
+        while True:
+            winner = next((a for a in attempts if a.done and a.error is None), None)
+            if winner is not None:
+                break
+            if all(a.done for a in attempts):
+                raise attempts[-1].error
+
+            waiting = all(a.first_token_at is None for a in attempts)
+            if waiting and backups and time.perf_counter() >= hedge_at:
+                if policy.try_hedge():
+                    metrics.count("hedges")
+                    launch(backups.pop(0))
+                else:
+                    backups.clear()
+                hedge_at = time.perf_counter() + policy.delay()
+
+            timeout = max(0.0, hedge_at - time.perf_counter()) if waiting and backups else None
+            condition.wait(timeout)
+
+    for attempt in attempts:
+        if attempt is not winner:
+            attempt.cancel()
+            if attempt.first_token_at is None:
+                # Still waiting when cancelled: its time-to-first-token is at least this
+                policy.record_ttft(time.perf_counter() - attempt.started)
+    if winner.first_token_at is not None:
+        policy.record_ttft(winner.first_token_at - winner.started)
+    if winner is not attempts[0]:
+        policy.won()
+        metrics.count("hedge_wins")
+    return winner
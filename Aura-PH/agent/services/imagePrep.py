@@ -0,0 +1,165 @@
+"""
+Image preparation for Gemini multimodal prompts.
+
+Phone photos of reports are often 12+ megapixels, while the model sees images
+at about 1.5k pixels on the long edge. prepare_image() decodes a JPEG at a
+reduced scale (PIL draft mode: libjpeg skips most of the full-size decode),
+applies the EXIF rotation, shrinks it to max_edge and re-encodes it as a compact
+JPEG or WebP. Results are cached by the file's SHA-256 in memory and, with
+AURA_IMAGE_CACHE=<dir>, on disk, so the same file is never decoded twice.
+
+image_part() turns a prepared image into a generate_content part. An image
+used for the first time is sent inline. From its second use on, it is uploaded once
+with genai.upload_file (where the SDK supports it) and the uploaded file is
+referenced, until the upload nears Gemini's 48 h expiry. Uses and uploads are
+counted per prepared variant (size, format, quality), not per source file.
+"""
+
+import io
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+MAX_EDGE = 1536
+QUALITY = 85
+MEMORY_CACHE_ENTRIES = 32
+UPLOAD_TTL = 47 * 3600  # Gemini deletes uploaded files after 48 h
+
+_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+# (sha256, max_edge, fmt, quality): one entry per prepared variant of a file
+PrepKey = Tuple[str, int, str, int]
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    sha256: str
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    source_bytes: int
+    key: PrepKey
+
+
+_lock = threading.Lock()
+_prepared: "OrderedDict[PrepKey, PreparedImage]" = OrderedDict()
+_uses: Dict[PrepKey, int] = {}
+_uploads: Dict[PrepKey, Tuple[Any, float]] = {}
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _encode(path: str, max_edge: int, fmt: str, quality: int) -> Tuple[bytes, int, int]:
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as image:
+        if image.format == "JPEG":
+            # Decode at 1/2, 1/4 or 1/8 scale when that still covers max_edge
+            image.draft("RGB", (max_edge, max_edge))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        out = io.BytesIO()
+        image.save(out, format=fmt, quality=quality, optimize=fmt == "JPEG")
+        return out.getvalue(), image.width, image.height
+
+
+def prepare_image(path: str, max_edge: int = MAX_EDGE, fmt: str = "JPEG", quality: int = QUALITY,
+                  cache_dir: Optional[str] = None) -> PreparedImage:
+    """
+    Downsample and re-encode an image for upload, cached by file hash.
+
+    Args:
+        path: Image file (any format PIL reads)
+        max_edge: Longest side of the prepared image in pixels
+        fmt: "JPEG" or "WEBP"
+        quality: Encoder quality
+        cache_dir: Directory for prepared bytes across runs (default: AURA_IMAGE_CACHE, none if unset)
+
+    Returns:
+        PreparedImage with the bytes to send and their MIME type
+    """
+    fmt = fmt.upper()
+    sha256 = file_sha256(path)
+    key = (sha256, max_edge, fmt, quality)
+    with _lock:
+        prepared = _prepared.get(key)
+        if prepared is not None:
+            _prepared.move_to_end(key)
+            return prepared
+
+    cache_dir = cache_dir if cache_dir is not None else os.getenv("AURA_IMAGE_CACHE")
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"{sha256}-{max_edge}-{quality}.{fmt.lower()}")
+
+    source_bytes = os.path.getsize(path)
+    if cache_path and os.path.exists(cache_path):
+        from PIL import Image
+
+        with open(cache_path, 'rb') as f:
+            data = f.read()
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+    else:
+        data, width, height = _encode(path, max_edge, fmt, quality)
+        if cache_path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(cache_path, 'wb') as f:
+                    f.write(data)
+            except OSError as e:
+                print(f"⚠️ Could not cache prepared image: {e}")
+
+    prepared = PreparedImage(sha256, data, _MIME_TYPES[fmt], width, height, source_bytes, key)
+    with _lock:
+        _prepared[key] = prepared
+        while len(_prepared) > MEMORY_CACHE_ENTRIES:
+            _prepared.popitem(last=False)
+    return prepared
+
+
+def image_part(genai, prepared: PreparedImage):
+    """
+    The generate_content part for a prepared image: inline bytes on first use,
+    afterwards a file uploaded once and reused until it nears expiry.
+    """
+    inline = {"mime_type": prepared.mime_type, "data": prepared.data}
+    with _lock:
+        uses = _uses[prepared.key] = _uses.get(prepared.key, 0) + 1
+        upload = _uploads.get(prepared.key)
+    if upload is not None and time.time() - upload[1] < UPLOAD_TTL:
+        return upload[0]
+    if uses < 2 or not hasattr(genai, "upload_file"):
+        return inline
+
+    try:
+        uploaded = genai.upload_file(io.BytesIO(prepared.data), mime_type=prepared.mime_type,
+                                     display_name=f"aura-{prepared.sha256[:16]}")
+    except Exception as e:
+        print(f"⚠️ Image upload failed, sending it inline: {e}")
+        return inline
+    with _lock:
+        _uploads[prepared.key] = (uploaded, time.time())
+    return uploaded
+
+
+def reset():
+    """Drop cached images and upload references (e.g. after changing API keys)."""
+    with _lock:
+        _prepared.clear()
+        _uses.clear()
+        _uploads.clear()
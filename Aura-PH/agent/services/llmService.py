@@ -1,14 +1,80 @@
 import os
+import threading
 from dotenv import load_dotenv
-from PIL import Image
-import google.generativeai as genai
-from openai import OpenAI
-from openai import RateLimitError  # Import for handling rate limit exceptions
+
+from services import metrics
+from services.usageLedger import UsageLedger
+from services.hedging import HedgePolicy, race
+from services.circuitBreaker import CircuitOpenError, OPEN, breaker_for
+from services import clientRegistry
+from services import imagePrep
+
+# google.generativeai, openai and PIL are imported on first use: they take
+# most of the startup time of anything that imports this module.
+
+NVIDIA_BASE_URL = "https://integrate.api.nvidia.com/v1"
+EMBEDDING_MODEL = "models/text-embedding-004"
+EMBEDDING_DIM = 768
+EMBEDDING_BATCH_SIZE = 100
+
+_gemini_lock = threading.Lock()
+_gemini_configured_key = None
+
+
+def _configure_gemini(api_key: str):
+    """Import and configure the Gemini SDK once per process (again only if the key changes)."""
+    global _gemini_configured_key
+    import google.generativeai as genai
+
+    with _gemini_lock:
+        if _gemini_configured_key != api_key:
+            genai.configure(api_key=api_key)
+            _gemini_configured_key = api_key
+    return genai
+
+
+def _forget_gemini_after_fork():
+    # The SDK's gRPC channel belongs to the parent process: configure again in the child
+    global _gemini_lock, _gemini_configured_key
+    _gemini_lock = threading.Lock()
+    _gemini_configured_key = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_gemini_after_fork)
+
+
+def _is_transient(error: Exception) -> bool:
+    """Worth retrying: rate limits, server errors and network failures, not rejected input."""
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code == 429 or code >= 500
+    return not isinstance(error, (ValueError, TypeError))
+
 
 class LLMInterface:
-    def __init__(self):
+    @classmethod
+    def shared(cls, base_url: str = None) -> "LLMInterface":
+        """
+        The process-wide LLMInterface for an endpoint, built once (env scan, Gemini
+        model, usage ledger). Prefer this over LLMInterface() in long-lived code.
+        """
+        load_dotenv()
+        base_url = base_url or os.getenv("LLM_BASE_URL") or NVIDIA_BASE_URL
+        return clientRegistry.shared(("LLMInterface", base_url), lambda: cls(base_url=base_url))
+
+    def __init__(self, base_url: str = None, hedge: HedgePolicy = None, gemini_fallback: bool = None):
+        """
+        base_url: OpenAI-compatible endpoint for nvidiaResponse (default: LLM_BASE_URL
+                  or the NVIDIA API), e.g. http://127.0.0.1:8768/v1 for mockLlmServer.py
+        hedge: Send a duplicate request on another key/model when the first token is
+               slow (default: HedgePolicy.from_env(), i.e. off unless AURA_HEDGE=1)
+        gemini_fallback: Answer nvidiaResponse with Gemini when the endpoint's circuit is
+                         open or every key failed (default: AURA_GEMINI_FALLBACK=1)
+        """
         # Load .env file to read API keys
         load_dotenv()
+        self.base_url = base_url or os.getenv("LLM_BASE_URL") or NVIDIA_BASE_URL
 
         # Fetch Gemini API Key
         self.GOOGLE_GEMINI_API_KEY = os.getenv("GOOGLE_GEMINI_API_KEY")
@@ -16,14 +82,11 @@ class LLMInterface:
         if not self.GOOGLE_GEMINI_API_KEY:
             raise ValueError("❌ GOOGLE_GEMINI_API_KEY not found. Please set it in your .env file or environment variables.")
 
-        # Configure Gemini API once during initialization
-        genai.configure(api_key=self.GOOGLE_GEMINI_API_KEY)
-
-        # Load a multimodal model (handles both text + image)
-        self.model = genai.GenerativeModel("gemini-2.5-flash")  # Stable, current version
+        # The Gemini SDK is configured and the model loaded on first use (see `model`)
+        self._model = None
 
         # Load multiple NVIDIA API keys dynamically from env vars like NVAPI_KEY_1, NVAPI_KEY_2, etc.
-        self.nvapi_keys = [os.getenv("nvidiaKey1"), os.getenv("nvidiaKey2"),os.getenv("nvidiaKey3"),os.getenv("nvidiaKey4")]
+        self.nvapi_keys = [key for key in (os.getenv(f"nvidiaKey{n}") for n in range(1, 5)) if key]
         i = 1
         while True:
             key = os.getenv(f"NVAPI_KEY_{i}")
@@ -32,117 +95,329 @@ class LLMInterface:
             self.nvapi_keys.append(key)
             i += 1
 
+        self.current_key_index = 0
+
+        # Tokens and latency of every nvidiaResponse call, per model
+        self.usage = UsageLedger()
+        self.hedge = hedge if hedge is not None else HedgePolicy.from_env()
+        if gemini_fallback is None:
+            gemini_fallback = os.getenv("AURA_GEMINI_FALLBACK", "") not in ("", "0")
+        self.gemini_fallback = gemini_fallback
+
+    @property
+    def model(self):
+        """Multimodal Gemini model (handles both text + image), loaded on first use."""
+        if self._model is None:
+            genai = _configure_gemini(self.GOOGLE_GEMINI_API_KEY)
+            self._model = genai.GenerativeModel("gemini-2.5-flash")  # Stable, current version
+        return self._model
+
+    def nvidiaResponse(self, prompt: str, model: str = "meta/llama-3.3-70b-instruct",
+                          temperature: float = 0.6, top_p: float = 0.7, max_tokens: int = 4096,
+                          prompt_type: str = None, return_usage: bool = False):
+        """
+        Streams a chat completion from an OpenAI-compatible endpoint, rotating API keys on errors.
+        Fails fast with CircuitOpenError (or falls back to Gemini) while the endpoint's circuit is open.
+        prompt_type: Label the call is accounted under in self.usage (e.g. "processTasks")
+        return_usage: Return (text, usage) where usage has model, prompt_tokens,
+                      completion_tokens, finish_reason, latency and key_index
+        """
+        import time
+        from openai import APIConnectionError, InternalServerError, RateLimitError
+
+        # Checked here rather than in __init__: embedding-only users (RAG) need no NVIDIA key
         if not self.nvapi_keys:
             raise ValueError("❌ No NVAPI keys found. Please set at least one in your .env file as NVAPI_KEY_1, NVAPI_KEY_2, etc.")
 
-        self.current_key_index = 0
-        self.client = None  # Will be created dynamically in nvidiaResponse
+        # Shared by every LLMInterface using this endpoint
+        breaker = breaker_for(self.base_url)
+        if not breaker.allow():
+            metrics.count("circuit_rejections", upstream=self.base_url)
+            if self.gemini_fallback:
+                return self._geminiFallback(prompt, model, prompt_type, return_usage)
+            raise CircuitOpenError(f"❌ {self.base_url} is failing; circuit open for another "
+                                   f"{breaker.retry_after():.0f}s")
 
-    def nvidiaResponse(self, prompt: str, model: str = "meta/llama-3.3-70b-instruct",
-                          temperature: float = 0.6, top_p: float = 0.7, max_tokens: int = 4096) -> str:
+        with metrics.span("llm.nvidia", model=model) as span:
+            span.add(prompt_chars=len(prompt))
+            started = time.perf_counter()
+            usage = {"model": model, "prompt_tokens": 0, "completion_tokens": 0,
+                     "finish_reason": None, "latency": 0.0, "key_index": None}
+            response_text = ""
+            max_retries = len(self.nvapi_keys)
+            max_connection_retries = 3  # Retry connection errors
+
+            for attempt in range(max_retries):
+                # Rotate to the next key in a round-robin fashion
+                key_index = (self.current_key_index + attempt) % len(self.nvapi_keys)
+                api_key = self.nvapi_keys[key_index]
+
+                # Retry connection errors for this key
+                for conn_attempt in range(max_connection_retries):
+                    if breaker.state == OPEN:
+                        break
+                    try:
+                        if self.hedge is not None and attempt == 0 and conn_attempt == 0:
+                            # First try races a duplicate if the first token is slow
+                            response_text, stream_usage, key_index, winning_model = self._hedgedCompletion(
+                                key_index, prompt, model, temperature, top_p, max_tokens)
+                            if winning_model != model:
+                                span.label(hedge_model=winning_model)
+                                usage["model"] = winning_model
+                        else:
+                            response_text, stream_usage = self._streamCompletion(
+                                api_key, prompt, model, temperature, top_p, max_tokens)
+                        usage.update(stream_usage)
+                        breaker.record_success()
+
+                        # Success: Update current index to this key for future starts
+                        self.current_key_index = key_index
+                        if not usage["completion_tokens"]:
+                            # Provider sent no usage: estimate at ~4 characters per token
+                            usage["prompt_tokens"] = len(prompt) // 4
+                            usage["completion_tokens"] = len(response_text) // 4
+                        usage["latency"] = time.perf_counter() - started
+                        usage["key_index"] = key_index
+                        self.usage.record(usage["model"], usage["prompt_tokens"], usage["completion_tokens"],
+                                          usage["latency"], prompt_type=prompt_type,
+                                          finish_reason=usage["finish_reason"])
+                        span.label(key_index=key_index)
+                        span.add(response_chars=len(response_text), tokens_in=usage["prompt_tokens"],
+                                 tokens_out=usage["completion_tokens"])
+                        return (response_text, usage) if return_usage else response_text
+
+                    except APIConnectionError as e:
+                        breaker.record_failure(e)
+                        span.add(retries=1)
+                        if breaker.state == OPEN:
+                            print(f"❌ Connection error with key {key_index + 1}; {self.base_url} circuit opened. Error: {e}")
+                            break
+                        if conn_attempt < max_connection_retries - 1:
+                            wait_time = 2 ** conn_attempt  # Exponential backoff: 1s, 2s, 4s
+                            print(f"⚠️ Connection error with key {key_index + 1}, attempt {conn_attempt + 1}/{max_connection_retries}. Retrying in {wait_time}s...")
+                            print(f"   Error: {e}")
+                            time.sleep(wait_time)
+                        else:
+                            print(f"❌ Connection failed after {max_connection_retries} attempts with key {key_index + 1}")
+                            print(f"   Please check your internet connection and firewall settings")
+                            # Try next key
+                            break
+                    except RateLimitError as e:
+                        # The endpoint answered: only this key is throttled
+                        breaker.record_success()
+                        span.add(retries=1, rate_limited=1)
+                        print(f"⚠️ Rate limit hit with key {key_index + 1}. Trying next key... (Error: {e})")
+                        # Continue to next key
+                        break
+                    except Exception as e:
+                        if isinstance(e, InternalServerError):
+                            breaker.record_failure(e)
+                        else:
+                            breaker.record_success()
+                        self.usage.record(model, latency=time.perf_counter() - started, ok=False,
+                                          prompt_type=prompt_type)
+                        print(f"❌ Unexpected error with key {key_index + 1}: {e}")
+                        # For non-rate-limit errors, re-raise to avoid silent failures
+                        raise
+
+            # All keys exhausted
+            self.usage.record(model, latency=time.perf_counter() - started, ok=False, prompt_type=prompt_type)
+            if self.gemini_fallback:
+                span.label(status="fallback")
+                return self._geminiFallback(prompt, model, prompt_type, return_usage)
+            raise ValueError("❌ All NVIDIA API keys exhausted or connection failed. Please check:\n"
+                            "   1. Your internet connection\n"
+                            "   2. Firewall/proxy settings\n"
+                            "   3. API key validity")
+
+    def _geminiFallback(self, prompt: str, model: str, prompt_type: str = None, return_usage: bool = False):
+        """Answer an nvidiaResponse call with geminiLLMInterface; raises CircuitOpenError if that fails too."""
         import time
-        from openai import APIConnectionError
-        
+
+        print(f"⚠️ {self.base_url} unavailable; answering with Gemini instead of {model}")
+        metrics.count("llm_fallbacks", upstream=self.base_url)
+        started = time.perf_counter()
+        response_text = self.geminiLLMInterface(prompt)
+        if not response_text:
+            raise CircuitOpenError(f"❌ {self.base_url} is failing and the Gemini fallback returned nothing")
+        usage = {"model": "gemini-2.5-flash", "prompt_tokens": len(prompt) // 4,
+                 "completion_tokens": len(response_text) // 4, "finish_reason": "stop",
+                 "latency": time.perf_counter() - started, "key_index": None}
+        self.usage.record(usage["model"], usage["prompt_tokens"], usage["completion_tokens"], usage["latency"],
+                          prompt_type=prompt_type, finish_reason="stop")
+        return (response_text, usage) if return_usage else response_text
+
+    def _streamCompletion(self, api_key: str, prompt: str, model: str, temperature: float, top_p: float,
+                          max_tokens: int, attempt=None):
+        """
+        One streamed chat completion with one key. Returns (text, usage fields).
+        attempt: hedging.Attempt to report the first token to; its stream is closed once it is cancelled
+        """
+        # One client (and keep-alive connection pool) per endpoint and key, shared process-wide
+        client = clientRegistry.openai_client(self.base_url, api_key, timeout=30.0)
+
+        completion = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            top_p=top_p,
+            max_tokens=max_tokens,
+            stream=True,
+            # The last chunk then carries token usage (and no choices)
+            stream_options={"include_usage": True}
+        )
+        if attempt is not None:
+            # Closing the stream (not the shared client) stops a hedge that lost
+            attempt.on_cancel = completion.close
+            if attempt.cancelled.is_set():
+                completion.close()
+                return "", {"prompt_tokens": 0, "completion_tokens": 0, "finish_reason": None}
+
         response_text = ""
-        max_retries = len(self.nvapi_keys)
-        max_connection_retries = 3  # Retry connection errors
-
-        for attempt in range(max_retries):
-            # Rotate to the next key in a round-robin fashion
-            key_index = (self.current_key_index + attempt) % len(self.nvapi_keys)
-            api_key = self.nvapi_keys[key_index]
-
-            # Retry connection errors for this key
-            for conn_attempt in range(max_connection_retries):
-                try:
-                    # Create a new client for this key (avoids baking in a single key)
-                    client = OpenAI(
-                        base_url="https://integrate.api.nvidia.com/v1",
-                        api_key=api_key,
-                        timeout=30.0  # Add timeout
-                    )
-
-                    completion = client.chat.completions.create(
-                        model=model,
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=temperature,
-                        top_p=top_p,
-                        max_tokens=max_tokens,
-                        stream=True
-                    )
-
-                    for chunk in completion:
-                        # Skip chunks with empty choices list
-                        if not chunk.choices:
-                            continue
-                        
-                        delta = chunk.choices[0].delta
-                        if delta.content:
-                            response_text += delta.content
-
-                    # Success: Update current index to this key for future starts
-                    self.current_key_index = key_index
-                    return response_text
-
-                except APIConnectionError as e:
-                    if conn_attempt < max_connection_retries - 1:
-                        wait_time = 2 ** conn_attempt  # Exponential backoff: 1s, 2s, 4s
-                        print(f"⚠️ Connection error with key {key_index + 1}, attempt {conn_attempt + 1}/{max_connection_retries}. Retrying in {wait_time}s...")
-                        print(f"   Error: {e}")
-                        time.sleep(wait_time)
-                    else:
-                        print(f"❌ Connection failed after {max_connection_retries} attempts with key {key_index + 1}")
-                        print(f"   Please check your internet connection and firewall settings")
-                        # Try next key
-                        break
-                except RateLimitError as e:
-                    print(f"⚠️ Rate limit hit with key {key_index + 1}. Trying next key... (Error: {e})")
-                    # Continue to next key
-                    break
-                except Exception as e:
-                    print(f"❌ Unexpected error with key {key_index + 1}: {e}")
-                    # For non-rate-limit errors, re-raise to avoid silent failures
-                    raise
-
-        # All keys exhausted
-        raise ValueError("❌ All NVIDIA API keys exhausted or connection failed. Please check:\n"
-                        "   1. Your internet connection\n"
-                        "   2. Firewall/proxy settings\n"
-                        "   3. API key validity")
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "finish_reason": None}
+        for chunk in completion:
+            if attempt is not None and attempt.cancelled.is_set():
+                completion.close()
+                break
+            if getattr(chunk, "usage", None):
+                usage["prompt_tokens"] = chunk.usage.prompt_tokens
+                usage["completion_tokens"] = chunk.usage.completion_tokens
+            # Skip chunks with empty choices list
+            if not chunk.choices:
+                continue
+
+            delta = chunk.choices[0].delta
+            if delta.content:
+                if attempt is not None:
+                    attempt.first_token()
+                response_text += delta.content
+            if chunk.choices[0].finish_reason:
+                usage["finish_reason"] = chunk.choices[0].finish_reason
+        return response_text, usage
+
+    def _hedgedCompletion(self, key_index: int, prompt: str, model: str, temperature: float, top_p: float,
+                          max_tokens: int):
+        """
+        _streamCompletion on key_index, duplicated on the next key (or on hedge.hedge_model)
+        when no token arrives within the hedge delay. Returns (text, usage fields, key index, model).
+        """
+        # With a single key the duplicate goes to the same key (another upstream replica)
+        labels = [(key_index, model), ((key_index + 1) % len(self.nvapi_keys), self.hedge.hedge_model or model)]
+
+        def run(attempt):
+            index, attempt_model = attempt.label
+            return self._streamCompletion(self.nvapi_keys[index], prompt, attempt_model, temperature, top_p,
+                                          max_tokens, attempt=attempt)
+
+        winner = race(run, labels, self.hedge)
+        response_text, usage = winner.result
+        return response_text, usage, winner.label[0], winner.label[1]
 
     def geminiLLMInterface(self, prompt: str, imagePath: str = None) -> str:
         """
         Generates LLM response with or without image input.
         :param prompt: The text prompt to send to Gemini.
-        :param imagePath: Optional path to an image (for multimodal reasoning).
+        :param imagePath: Optional path to an image (for multimodal reasoning); it is downsampled,
+                          re-encoded and cached by imagePrep, and uploaded once if reused.
         :return: Cleaned text output.
         """
 
-        try:
-            if imagePath:
-                image = Image.open(imagePath)
-                response = self.model.generate_content([prompt, image])
-            else:
-                response = self.model.generate_content(prompt)
+        with metrics.span("llm.gemini", image=bool(imagePath)) as span:
+            span.add(prompt_chars=len(prompt))
+            try:
+                if imagePath:
+                    prepared = imagePrep.prepare_image(imagePath)
+                    span.add(image_bytes=prepared.source_bytes, upload_bytes=len(prepared.data))
+                    genai = _configure_gemini(self.GOOGLE_GEMINI_API_KEY)
+                    response = self.model.generate_content([prompt, imagePrep.image_part(genai, prepared)])
+                else:
+                    response = self.model.generate_content(prompt)
 
-            return response.text.strip()
+                usage = getattr(response, "usage_metadata", None)
+                if usage:
+                    span.add(tokens_in=usage.prompt_token_count, tokens_out=usage.candidates_token_count)
+                text = response.text.strip()
+                span.add(response_chars=len(text))
+                return text
 
-        except Exception as e:
-            print(f"❌ Error generating response: {e}")
-            return ""
+            except Exception as e:
+                span.label(status="error")
+                print(f"❌ Error generating response: {e}")
+                return ""
+
+    def get_embedding(self, text: str, task_type: str = "retrieval_document") -> list:
+        """
+        Generates embedding for the given text using Gemini ([] on failure).
+        """
+        embedding = self.get_embeddings([text], task_type=task_type)[0]
+        return embedding.tolist() if embedding.any() else []
 
-    def get_embedding(self, text: str) -> list:
+    def get_embeddings(self, texts: list, task_type: str = "retrieval_document",
+                       batch_size: int = EMBEDDING_BATCH_SIZE, max_retries: int = 3, retry_delay: float = 1.0):
         """
-        Generates embedding for the given text using Gemini.
+        Embeds many texts with Gemini in API-sized batches.
+
+        Args:
+            texts: Strings to embed
+            task_type: "retrieval_document" for stored texts, "retrieval_query" for search queries
+                       (or any other Gemini embedding task type)
+            batch_size: Texts per embed_content request (the API takes at most 100)
+            max_retries: Extra attempts, with exponential backoff, for a batch failing with a
+                         transient error (429, 5xx, connection); a batch still failing with one
+                         gets zero rows. A batch rejected outright is split in halves (tried once
+                         each), so one bad text only loses itself
+            retry_delay: Seconds before the first retry
+
+        Returns:
+            float32 array of shape (len(texts), dim); rows of texts that could not be embedded are all zeros
         """
-        try:
-            result = genai.embed_content(
-                model="models/text-embedding-004",
-                content=text,
-                task_type="retrieval_document",
-                title="Embedding of text"
-            )
-            return result['embedding']
-        except Exception as e:
-            print(f"❌ Error generating embedding: {e}")
-            return []
\ No newline at end of file
+        import time
+        import numpy as np
+
+        rows = [None] * len(texts)
+        with metrics.span("llm.embedding", task_type=task_type) as span:
+            span.add(prompt_chars=sum(len(text) for text in texts), texts=len(texts))
+            genai = None
+
+            def embed(start: int, end: int, retries: int):
+                nonlocal genai
+                for attempt in range(retries + 1):
+                    try:
+                        if genai is None:
+                            genai = _configure_gemini(self.GOOGLE_GEMINI_API_KEY)
+                        span.add(batches=1)
+                        result = genai.embed_content(
+                            model=EMBEDDING_MODEL,
+                            content=texts[start:end],
+                            task_type=task_type
+                        )
+                        rows[start:end] = result['embedding']
+                        return
+                    except Exception as e:
+                        error = e
+                        if attempt < retries and _is_transient(e):
+                            span.add(retries=1)
+                            time.sleep(retry_delay * 2 ** attempt)
+                        else:
+                            break
+                if end - start > 1 and not _is_transient(error):
+                    # Rejected input: halves get one try each, until the bad text is isolated
+                    middle = (start + end) // 2
+                    embed(start, middle, 0)
+                    embed(middle, end, 0)
+                else:
+                    # Splitting an outage or rate limit would only multiply the failing requests
+                    span.add(failed=end - start)
+                    print(f"❌ Error generating embedding: {error}")
+
+            for start in range(0, len(texts), batch_size):
+                embed(start, min(start + batch_size, len(texts)), max_retries)
+
+            dim = next((len(row) for row in rows if row), EMBEDDING_DIM)
+            embeddings = np.zeros((len(texts), dim), dtype=np.float32)
+            for i, row in enumerate(rows):
+                if row:
+                    embeddings[i] = row
+            if any(row is None for row in rows):
+                span.label(status="error")
+            return embeddings
@@ -0,0 +1,260 @@
+"""
+Lightweight spans, counters and a Prometheus-text endpoint for the agent.
+
+Disabled unless AURA_METRICS=1 (or enable() is called). While disabled,
+span() returns one shared no-op object and count() returns immediately, so
+instrumented hot paths pay a global lookup and a function call.
+
+    with metrics.span("llm.nvidia", model=model) as span:
+        ...
+        span.label(key_index=2)                 # becomes a label on every series
+        span.add(tokens_in=812, retries=1)      # summed into aura_<name>_total counters
+
+    metrics.count("cache_hits", cache="notion_users")
+
+Every finished span is observed in the aura_span_duration_seconds histogram
+(labels: span, status and the span's own labels) and, when AURA_METRICS_LOG
+is set ("-" for stderr, otherwise a file path), written as one JSON log line.
+
+    server = metrics.serve_metrics(9464)    # curl http://127.0.0.1:9464/metrics
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, TextIO, Tuple
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_enabled = os.getenv("AURA_METRICS", "") not in ("", "0")
+_log: Optional[TextIO] = None
+_lock = threading.Lock()
+
+# (name, sorted label items) -> value
+_counters: Dict[Tuple[str, Tuple], float] = {}
+# (name, sorted label items) -> [bucket counts..., sum, count]
+_histograms: Dict[Tuple[str, Tuple], list] = {}
+
+
+def _open_log(target: Optional[str]) -> Optional[TextIO]:
+    if not target:
+        return None
+    if target == "-":
+        return sys.stderr
+    return open(target, "a", encoding="utf-8", buffering=1)
+
+
+def enable(json_log: Optional[str] = None):
+    """Start recording; json_log is "-" for stderr or a file path for JSON lines."""
+    global _enabled, _log
+    _enabled = True
+    if json_log is not None:
+        _log = _open_log(json_log)
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """Drop everything recorded so far."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+# ---------------- RECORDING ----------------
+
+def _key(name: str, labels: Dict[str, Any]) -> Tuple[str, Tuple]:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def count(name: str, value: float = 1, **labels):
+    """Add to the aura_<name>_total counter."""
+    if not _enabled:
+        return
+    key = _key(f"aura_{name}_total", labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, seconds: float, **labels):
+    """Record one duration in a histogram."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0] * (len(DURATION_BUCKETS) + 2)
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                series[i] += 1
+        series[-2] += seconds
+        series[-1] += 1
+
+
+def _write_log(record: Dict[str, Any]):
+    log = _log
+    if log is None:
+        return
+    try:
+        log.write(json.dumps(record, default=str) + "\n")
+    except (OSError, ValueError):
+        pass
+
+
+class Span:
+    """Times a block and collects labels and numeric amounts for it"""
+
+    __slots__ = ("name", "labels", "amounts", "started")
+
+    def __init__(self, name: str, labels: Dict[str, Any]):
+        self.name = name
+        self.labels = labels
+        self.amounts: Dict[str, float] = {}
+        self.started = 0.0
+
+    def label(self, **labels):
+        self.labels.update(labels)
+
+    def add(self, **amounts):
+        for name, value in amounts.items():
+            if value:
+                self.amounts[name] = self.amounts.get(name, 0) + value
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.started
+        status = "error" if exc_type else self.labels.pop("status", "ok")
+        observe("aura_span_duration_seconds", duration, span=self.name, status=status, **self.labels)
+        for name, value in self.amounts.items():
+            count(name, value, span=self.name, **self.labels)
+        if _log is not None:
+            record = {"ts": datetime.now().isoformat(timespec="milliseconds"), "span": self.name,
+                      "duration_ms": round(duration * 1000, 3), "status": status, **self.labels, **self.amounts}
+            if exc_type:
+                record["error"] = f"{exc_type.__name__}: {exc}"
+            _write_log(record)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def label(self, **labels):
+        pass
+
+    def add(self, **amounts):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **labels):
+    """Context manager timing one network call, parse step or retrieval."""
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, labels)
+
+
+# ---------------- EXPORT ----------------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(items: Tuple, extra: Tuple = ()) -> str:
+    pairs = list(items) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render_prometheus() -> str:
+    """All counters and histograms in the Prometheus text exposition format."""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, list(series)) for key, series in _histograms.items())
+
+    lines, typed = [], set()
+    for (name, labels), value in counters:
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+    for (name, labels), series in histograms:
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        for bound, bucket in zip(DURATION_BUCKETS, series):
+            lines.append(f"{name}_bucket{_format_labels(labels, (('le', f'{bound:g}'),))} {bucket}")
+        lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {series[-1]}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {series[-2]:.6f}")
+        lines.append(f"{name}_count{_format_labels(labels)} {series[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot() -> Dict[str, Any]:
+    """Counters and span durations as plain JSON-friendly dicts."""
+    with _lock:
+        counters = [{"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(_counters.items())]
+        spans = [{"name": name, "labels": dict(labels), "count": series[-1],
+                  "sum_seconds": round(series[-2], 6)}
+                 for (name, labels), series in sorted(_histograms.items())]
+    return {"counters": counters, "histograms": spans}
+
+
+def serve_metrics(port: int = 9464, host: str = "127.0.0.1"):
+    """Serve /metrics (Prometheus text) and /metrics.json in a background thread; enables recording."""
+    # http.server is imported here: it is most of this module's import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                self._reply(200, render_prometheus().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+            elif path == "/metrics.json":
+                self._reply(200, json.dumps(snapshot()).encode("utf-8"), "application/json")
+            else:
+                self._reply(404, b"not found\n", "text/plain")
+
+        def _reply(self, status: int, data: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    enable()
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if _enabled:
+    _log = _open_log(os.getenv("AURA_METRICS_LOG"))
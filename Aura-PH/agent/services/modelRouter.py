@@ -0,0 +1,104 @@
+"""
+Cost-aware model choice and max_tokens caps per prompt type.
+
+Each taskProcessor prompt type has a ladder of models, smallest first. A call
+goes to the first model; only when its reply fails validation (unparseable
+or wrongly shaped JSON, or an empty answer) is the same prompt sent to the
+next, larger model. max_tokens starts from a per-type default and, once
+enough replies have been seen, is capped at the observed p95 completion size
+plus headroom, so small jobs stop reserving 4096 tokens. A truncated reply
+(finish_reason "length") doubles the cap for the retry.
+
+Observed completion sizes can be kept across runs with state_path.
+"""
+
+import os
+import json
+import threading
+from typing import Dict, List, Optional
+
+from services.usageLedger import UsageLedger
+
+SMALL_MODEL = "meta/llama-3.1-8b-instruct"
+MEDIUM_MODEL = "mistralai/mixtral-8x7b-instruct-v0.1"
+LARGE_MODEL = "meta/llama-3.3-70b-instruct"
+
+DEFAULT_ROUTES: Dict[str, List[str]] = {
+    # Short, strictly structured outputs: a small model is enough most of the time
+    "processTasks": [SMALL_MODEL, MEDIUM_MODEL, LARGE_MODEL],
+    "processHealthTasks": [SMALL_MODEL, MEDIUM_MODEL, LARGE_MODEL],
+    # Large nested schema with reasoning over the logs
+    "screenTimeAnalyzer": [MEDIUM_MODEL, LARGE_MODEL],
+    # Free text, nothing to validate beyond being non-empty
+    "defaultEnergyLookup": [MEDIUM_MODEL, LARGE_MODEL],
+}
+
+DEFAULT_MAX_TOKENS: Dict[str, int] = {
+    "processTasks": 1024,
+    "processHealthTasks": 1024,
+    "screenTimeAnalyzer": 3072,
+    "defaultEnergyLookup": 1024,
+}
+
+MAX_TOKENS_CEILING = 4096
+MAX_TOKENS_FLOOR = 256
+MIN_SAMPLES = 5
+
+
+class ModelRouter:
+    """Picks the model ladder and max_tokens for each prompt type"""
+
+    def __init__(self, ledger: Optional[UsageLedger] = None, routes: Optional[Dict[str, List[str]]] = None,
+                 default_max_tokens: Optional[Dict[str, int]] = None, state_path: Optional[str] = None):
+        """
+        Args:
+            ledger: Usage ledger the observed completion sizes come from (LLMInterface.usage)
+            routes: prompt type -> models to try in order (defaults to DEFAULT_ROUTES;
+                    AURA_MODEL_ROUTES may hold a JSON object overriding single types)
+            default_max_tokens: prompt type -> max_tokens before enough replies are observed
+            state_path: JSON file keeping observed completion sizes across runs
+        """
+        self.ledger = ledger or UsageLedger()
+        self.routes = dict(DEFAULT_ROUTES)
+        if os.getenv("AURA_MODEL_ROUTES"):
+            self.routes.update(json.loads(os.getenv("AURA_MODEL_ROUTES")))
+        self.routes.update(routes or {})
+        self.default_max_tokens = dict(DEFAULT_MAX_TOKENS, **(default_max_tokens or {}))
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self.escalations: Dict[str, int] = {}
+        self._load_state()
+
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.ledger.load_completion_sizes(json.load(f).get("completion_tokens", {}))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load router state: {e}")
+
+    def save_state(self):
+        if not self.state_path:
+            return
+        sizes = {prompt_type: self.ledger.completion_sizes(prompt_type) for prompt_type in self.routes}
+        try:
+            with open(self.state_path, 'w', encoding='utf-8') as f:
+                json.dump({"completion_tokens": {k: v for k, v in sizes.items() if v}}, f)
+        except OSError as e:
+            print(f"⚠️ Could not save router state: {e}")
+
+    def models_for(self, prompt_type: str) -> List[str]:
+        return self.routes.get(prompt_type) or [MEDIUM_MODEL]
+
+    def max_tokens_for(self, prompt_type: str) -> int:
+        """Observed p95 completion size * 1.5 + 64, within [MAX_TOKENS_FLOOR, MAX_TOKENS_CEILING]."""
+        sizes = sorted(self.ledger.completion_sizes(prompt_type))
+        if len(sizes) < MIN_SAMPLES:
+            return self.default_max_tokens.get(prompt_type, MAX_TOKENS_CEILING)
+        p95 = sizes[min(len(sizes) - 1, int(len(sizes) * 0.95))]
+        return max(MAX_TOKENS_FLOOR, min(MAX_TOKENS_CEILING, int(p95 * 1.5) + 64))
+
+    def escalated(self, prompt_type: str):
+        with self._lock:
+            self.escalations[prompt_type] = self.escalations.get(prompt_type, 0) + 1
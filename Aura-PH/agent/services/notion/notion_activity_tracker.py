@@ -1,25 +1,54 @@
 import os
+import sys
 import json
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from notion_client import Client
 
+# Shared instrumentation (services/metrics.py) lives in the agent package two levels up
+_AGENT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if _AGENT_ROOT not in sys.path:
+    sys.path.insert(0, _AGENT_ROOT)
+from services import metrics  # noqa: E402
+
 
 class NotionActivityTracker:
     """Track and retrieve activities from Notion workspace"""
     
-    def __init__(self, notion_token: Optional[str] = None):
+    def __init__(self, notion_token: Optional[str] = None, max_workers: int = 8,
+                 user_cache_size: int = 1024, user_cache_ttl: float = 3600.0,
+                 page_cache_size: int = 256):
         """
         Initialize Notion client
         
         Args:
             notion_token: Notion integration token (or set NOTION_TOKEN env var)
+            max_workers: Maximum concurrent requests when fetching page block trees
+            user_cache_size: Maximum number of users kept in the lookup cache
+            user_cache_ttl: Seconds a cached user stays valid
+            page_cache_size: Maximum number of page bodies kept in the content cache
         """
         self.token = notion_token or os.getenv('NOTION_TOKEN')
         if not self.token:
             raise ValueError("Notion token is required. Set NOTION_TOKEN env var or pass as parameter")
         
         self.client = Client(auth=self.token)
+        self.max_workers = max_workers
+        
+        # page_id -> (page last_edited_time, flattened lines of the whole page), least recently used first
+        self.page_cache_size = page_cache_size
+        self._block_cache: OrderedDict = OrderedDict()
+        self._block_cache_lock = threading.Lock()
+        
+        # user_id -> (expires_at, user info), least recently used first
+        self.user_cache_size = user_cache_size
+        self.user_cache_ttl = user_cache_ttl
+        self._user_cache: OrderedDict = OrderedDict()
+        self._user_cache_lock = threading.Lock()
     
     def get_all_pages(self, database_id: Optional[str] = None) -> List[Dict]:
         """
@@ -35,29 +64,33 @@ class NotionActivityTracker:
         try:
             if database_id:
                 # Query specific database
-                response = self.client.databases.query(database_id=database_id)
+                response = self._call("databases.query", self.client.databases.query, database_id=database_id)
                 pages = response.get('results', [])
             else:
                 # Search all pages (limited to accessible ones)
-                response = self.client.search(filter={"property": "object", "value": "page"})
+                response = self._call("search", self.client.search, filter={"property": "object", "value": "page"})
                 pages = response.get('results', [])
         except Exception as e:
             print(f"Error fetching pages: {e}")
         
         return pages
     
-    def get_page_activity(self, page_id: str) -> Dict[str, Any]:
+    def get_page_activity(self, page_id: str, include_content: bool = False,
+                          raise_errors: bool = False) -> Dict[str, Any]:
         """
         Get activity information for a specific page
         
         Args:
             page_id: The Notion page ID
+            include_content: Whether to fetch the page body as plain text
+            raise_errors: Re-raise API errors instead of returning {} (so callers can
+                          tell a missing page from a failed request)
         
         Returns:
             Dictionary with page activity information
         """
         try:
-            page = self.client.pages.retrieve(page_id)
+            page = self._call("pages.retrieve", self.client.pages.retrieve, page_id)
             
             activity = {
                 "type": "page",
@@ -69,14 +102,69 @@ class NotionActivityTracker:
                 "last_edited_by": page.get('last_edited_by', {}).get('id', 'unknown'),
                 "url": page.get('url', ''),
                 "archived": page.get('archived', False),
+                "in_trash": page.get('in_trash', False),
                 "properties": self._extract_properties(page)
             }
             
+            if include_content:
+                activity["content"] = self.get_page_content(page_id, page.get('last_edited_time'))
+            
             return activity
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Error fetching page activity for {page_id}: {e}")
             return {}
     
+    def get_page_content(self, page_id: str, last_edited_time: Optional[str] = None) -> str:
+        """
+        Get the body of a page as plain text suitable for chunking
+        
+        The block tree is fetched level by level: every block with children on
+        the current level is listed concurrently (bounded by max_workers), so
+        deep pages cost one round trip per level rather than one per block.
+        The flattened page is cached by the page's last_edited_time, which moves
+        on any edit inside the page; a nested block's own timestamp does not
+        change when one of its descendants is edited, so subtrees are not cached.
+        
+        Args:
+            page_id: The Notion page ID
+            last_edited_time: The page's last_edited_time, used to reuse a cached body
+        
+        Returns:
+            Page body with one block per line, nested blocks indented
+        
+        Raises:
+            Exception: A block list request failed; nothing is cached, so a
+                       later call fetches the whole page again
+        """
+        if last_edited_time:
+            cached = self._cached_page(page_id, last_edited_time)
+            if cached is not None:
+                return "\n".join(cached)
+        
+        children: Dict[str, List[Dict]] = {}
+        frontier = [page_id]
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while frontier:
+                results = pool.map(self._list_block_children, frontier)
+                next_frontier = []
+                for parent_id, blocks in zip(frontier, results):
+                    children[parent_id] = blocks
+                    next_frontier.extend(block['id'] for block in blocks if self._has_nested_blocks(block))
+                frontier = next_frontier
+        
+        lines = self._flatten_blocks(page_id, children)
+        if last_edited_time:
+            with self._block_cache_lock:
+                self._block_cache[page_id] = (last_edited_time, lines)
+                self._block_cache.move_to_end(page_id)
+                while len(self._block_cache) > self.page_cache_size:
+                    self._block_cache.popitem(last=False)
+        
+        return "\n".join(lines)
+    
     def get_database_activity(self, database_id: str) -> Dict[str, Any]:
         """
         Get activity information for a specific database
@@ -88,10 +176,10 @@ class NotionActivityTracker:
             Dictionary with database activity information
         """
         try:
-            database = self.client.databases.retrieve(database_id)
+            database = self._call("databases.retrieve", self.client.databases.retrieve, database_id)
             
             # Get recent entries
-            entries = self.client.databases.query(database_id=database_id)
+            entries = self._call("databases.query", self.client.databases.query, database_id=database_id)
             
             activity = {
                 "type": "database",
@@ -123,7 +211,7 @@ class NotionActivityTracker:
         """
         comments = []
         try:
-            response = self.client.comments.list(block_id=page_id)
+            response = self._call("comments.list", self.client.comments.list, block_id=page_id)
             comments = response.get('results', [])
             
             formatted_comments = []
@@ -150,7 +238,7 @@ class NotionActivityTracker:
         """
         databases = []
         try:
-            response = self.client.search(filter={"property": "object", "value": "database"})
+            response = self._call("search", self.client.search, filter={"property": "object", "value": "database"})
             databases = response.get('results', [])
         except Exception as e:
             print(f"Error fetching databases: {e}")
@@ -159,7 +247,7 @@ class NotionActivityTracker:
     
     def get_user_info(self, user_id: str) -> Dict[str, Any]:
         """
-        Get user information
+        Get user information (served from the user cache when possible)
         
         Args:
             user_id: The Notion user ID
@@ -167,21 +255,62 @@ class NotionActivityTracker:
         Returns:
             Dictionary with user information
         """
+        cached = self._get_cached_user(user_id)
+        if cached is not None:
+            return cached
+        
         try:
-            user = self.client.users.retrieve(user_id)
-            return {
-                "id": user.get('id'),
-                "name": user.get('name', 'Unknown'),
-                "type": user.get('type', 'unknown'),
-                "avatar_url": user.get('avatar_url', '')
-            }
+            user = self._format_user(self._call("users.retrieve", self.client.users.retrieve, user_id))
         except Exception as e:
             print(f"Error fetching user info for {user_id}: {e}")
-            return {"id": user_id, "name": "Unknown"}
+            user = {"id": user_id, "name": "Unknown"}
+            if not self._is_not_found(e):
+                # Timeouts, rate limits and 5xx answers are retried on the next lookup
+                return user
+        
+        # Users Notion reports as missing are cached too, so they cost one call per TTL
+        self._cache_user(user_id, user)
+        return user
+    
+    def prefetch_users(self) -> int:
+        """
+        Load every workspace user into the cache with paginated users.list calls
+        
+        Returns:
+            Number of users cached (0 if the integration cannot list users)
+        """
+        try:
+            users = self._paginate("users.list", self.client.users.list, page_size=100)
+        except Exception as e:
+            print(f"Error prefetching users: {e}")
+            return 0
+        
+        for user in users:
+            if user.get('id'):
+                self._cache_user(user['id'], self._format_user(user))
+        return len(users)
+    
+    def annotate_activities(self, activities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Add created_by_name / last_edited_by_name to activities in place
+        
+        Args:
+            activities: Activity dictionaries as returned by collect_all_activities
+        
+        Returns:
+            The same list, annotated
+        """
+        for activity in activities:
+            for field in ('created_by', 'last_edited_by'):
+                user_id = activity.get(field)
+                if user_id and user_id != 'unknown':
+                    activity[f"{field}_name"] = self.get_user_info(user_id).get('name', 'Unknown')
+        return activities
     
     def collect_all_activities(self, include_comments: bool = True, 
                               include_databases: bool = True,
-                              include_pages: bool = True) -> List[Dict[str, Any]]:
+                              include_pages: bool = True,
+                              resolve_users: bool = False) -> List[Dict[str, Any]]:
         """
         Collect all activities from Notion workspace
         
@@ -189,6 +318,7 @@ class NotionActivityTracker:
             include_comments: Whether to include comments
             include_databases: Whether to include database activities
             include_pages: Whether to include page activities
+            resolve_users: Whether to add user names (users are prefetched once per sync)
         
         Returns:
             List of all activity dictionaries
@@ -225,6 +355,10 @@ class NotionActivityTracker:
                 if activity:
                     all_activities.append(activity)
         
+        if resolve_users:
+            self.prefetch_users()
+            self.annotate_activities(all_activities)
+        
         # Sort by last edited time (most recent first)
         all_activities.sort(
             key=lambda x: x.get('last_edited_time', ''),
@@ -236,7 +370,8 @@ class NotionActivityTracker:
     def get_activities_json(self, include_comments: bool = True,
                            include_databases: bool = True,
                            include_pages: bool = True,
-                           pretty: bool = True) -> str:
+                           pretty: bool = True,
+                           resolve_users: bool = False) -> str:
         """
         Get all activities as JSON string
         
@@ -245,6 +380,7 @@ class NotionActivityTracker:
             include_databases: Whether to include database activities
             include_pages: Whether to include page activities
             pretty: Whether to format JSON with indentation
+            resolve_users: Whether to add user names to activities
         
         Returns:
             JSON string of all activities
@@ -252,7 +388,8 @@ class NotionActivityTracker:
         activities = self.collect_all_activities(
             include_comments=include_comments,
             include_databases=include_databases,
-            include_pages=include_pages
+            include_pages=include_pages,
+            resolve_users=resolve_users
         )
         
         result = {
@@ -266,6 +403,123 @@ class NotionActivityTracker:
         else:
             return json.dumps(result, ensure_ascii=False)
     
+    def _format_user(self, user: Dict) -> Dict[str, Any]:
+        return {
+            "id": user.get('id'),
+            "name": user.get('name', 'Unknown'),
+            "type": user.get('type', 'unknown'),
+            "avatar_url": user.get('avatar_url', '')
+        }
+    
+    @staticmethod
+    def _is_not_found(error: Exception) -> bool:
+        """True for Notion's 404 / object_not_found answer (APIResponseError carries status and code)"""
+        return getattr(error, 'status', None) == 404 or getattr(error, 'code', None) == 'object_not_found'
+    
+    def _get_cached_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._user_cache_lock:
+            entry = self._user_cache.get(user_id)
+            if entry is None:
+                metrics.count("cache_misses", cache="notion_users")
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._user_cache[user_id]
+                metrics.count("cache_misses", cache="notion_users")
+                return None
+            self._user_cache.move_to_end(user_id)
+            metrics.count("cache_hits", cache="notion_users")
+            return user
+    
+    def _cache_user(self, user_id: str, user: Dict[str, Any]):
+        with self._user_cache_lock:
+            self._user_cache[user_id] = (time.monotonic() + self.user_cache_ttl, user)
+            self._user_cache.move_to_end(user_id)
+            while len(self._user_cache) > self.user_cache_size:
+                self._user_cache.popitem(last=False)
+    
+    def _call(self, endpoint: str, method, *args, **kwargs):
+        """Make one Notion API request, timed as a metrics span"""
+        with metrics.span("notion.request", endpoint=endpoint):
+            return method(*args, **kwargs)
+    
+    def _paginate(self, endpoint: str, method, **kwargs) -> List[Dict]:
+        """Collect all results from a paginated Notion endpoint"""
+        results = []
+        cursor = None
+        while True:
+            if cursor:
+                kwargs['start_cursor'] = cursor
+            response = self._call(endpoint, method, **kwargs)
+            results.extend(response.get('results', []))
+            if not response.get('has_more'):
+                return results
+            cursor = response.get('next_cursor')
+    
+    def _list_block_children(self, block_id: str) -> List[Dict]:
+        """List all direct children of a block (or page); errors propagate so a partial body is never cached"""
+        return self._paginate("blocks.children.list", self.client.blocks.children.list,
+                              block_id=block_id, page_size=100)
+    
+    def _has_nested_blocks(self, block: Dict) -> bool:
+        """Child pages and databases are separate documents, so their contents are not inlined"""
+        return block.get('has_children', False) and block.get('type') not in ('child_page', 'child_database')
+    
+    def _cached_page(self, page_id: str, last_edited_time: Optional[str]) -> Optional[List[str]]:
+        with self._block_cache_lock:
+            cached = self._block_cache.get(page_id)
+            if cached:
+                self._block_cache.move_to_end(page_id)
+        if cached and last_edited_time and cached[0] == last_edited_time:
+            metrics.count("cache_hits", cache="notion_blocks")
+            return cached[1]
+        metrics.count("cache_misses", cache="notion_blocks")
+        return None
+    
+    def _flatten_blocks(self, parent_id: str, children: Dict[str, List[Dict]]) -> List[str]:
+        """Flatten the fetched subtree under parent_id into indented lines"""
+        lines = []
+        for block in children.get(parent_id, []):
+            lines.append(self._block_to_text(block))
+            if self._has_nested_blocks(block):
+                sub_lines = self._flatten_blocks(block['id'], children)
+                lines.extend(f"  {line}" if line else line for line in sub_lines)
+        
+        return lines
+    
+    def _block_to_text(self, block: Dict) -> str:
+        """Render a single block as one line of plain text"""
+        block_type = block.get('type', '')
+        content = block.get(block_type, {}) or {}
+        text = self._extract_rich_text(content.get('rich_text', []))
+        
+        if block_type == 'heading_1':
+            return f"# {text}"
+        elif block_type == 'heading_2':
+            return f"## {text}"
+        elif block_type == 'heading_3':
+            return f"### {text}"
+        elif block_type == 'bulleted_list_item':
+            return f"- {text}"
+        elif block_type == 'numbered_list_item':
+            return f"1. {text}"
+        elif block_type == 'to_do':
+            return f"[{'x' if content.get('checked') else ' '}] {text}"
+        elif block_type == 'quote':
+            return f"> {text}"
+        elif block_type == 'table_row':
+            return " | ".join(self._extract_rich_text(cell) for cell in content.get('cells', []))
+        elif block_type in ('child_page', 'child_database'):
+            return content.get('title', '')
+        elif block_type == 'equation':
+            return content.get('expression', '')
+        elif block_type in ('bookmark', 'embed', 'link_preview', 'video', 'image', 'file', 'pdf'):
+            caption = self._extract_rich_text(content.get('caption', []))
+            url = content.get('url') or content.get('external', {}).get('url', '')
+            return f"{caption} {url}".strip()
+        else:
+            return text
+    
     def _extract_title(self, obj: Dict) -> str:
         """Extract title from Notion object"""
         if 'properties' in obj:
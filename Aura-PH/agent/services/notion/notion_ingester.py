@@ -0,0 +1,473 @@
+"""
+Event-driven ingestion of Notion pages into the RAG store.
+
+Notion webhook events (or the polling fallback) mark pages as dirty. Bursts of
+edits to the same page are debounced, the page is re-read once, and only pages
+whose extracted text actually changed are embedded and pushed to the
+RAGProcessor in a single batched insert.
+
+Usage:
+    python notion_ingester.py --serve 8765      # receive Notion webhooks
+    python notion_ingester.py --poll 60         # poll using the saved watermark
+"""
+
+import os
+import sys
+import json
+import hmac
+import time
+import hashlib
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+
+PAGE_UPDATE_EVENTS = {
+    "page.created",
+    "page.content_updated",
+    "page.properties_updated",
+    "page.moved",
+    "page.undeleted",
+}
+PAGE_DELETE_EVENTS = {"page.deleted"}
+
+
+def _is_not_found(error: Exception) -> bool:
+    """Notion's 404 / object_not_found answer, as opposed to a failed request"""
+    return getattr(error, 'status', None) == 404 or getattr(error, 'code', None) == 'object_not_found'
+
+
+class NotionIngester:
+    """Debounce Notion page events and push changed pages into the RAG store"""
+
+    def __init__(self, tracker, rag, state_path: str = "ingest_state.json",
+                 debounce_seconds: float = 5.0, max_delay_seconds: float = 60.0,
+                 chunker: Optional[Callable[[str], List[str]]] = None,
+                 clock: Callable[[], float] = time.monotonic, max_retry_seconds: float = 900.0):
+        """
+        Args:
+            tracker: NotionActivityTracker (or anything exposing get_page_activity and client)
+            rag: RAGProcessor (or anything exposing store_many and delete)
+            state_path: JSON file holding the polling watermark and page content hashes
+            debounce_seconds: Quiet period after the last event before a page is ingested
+            max_delay_seconds: Upper bound on how long a continuously edited page may wait
+            chunker: Optional function splitting long page text into chunks (one RAG document each)
+            clock: Monotonic time source (injectable for tests)
+            max_retry_seconds: Longest backoff before retrying a page whose fetch or embedding failed
+        """
+        self.tracker = tracker
+        self.rag = rag
+        self.state_path = state_path
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.chunker = chunker
+        self.clock = clock
+        self.max_retry_seconds = max_retry_seconds
+
+        # page_id -> {"due": float, "first_seen": float, "deleted": bool}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # page_id -> consecutive failed ingestions
+        self._failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.state = self._load_state()
+
+    # ---------------- STATE ----------------
+
+    def _load_state(self) -> Dict[str, Any]:
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                    state.setdefault("watermark", None)
+                    state.setdefault("hashes", {})
+                    state.setdefault("doc_ids", {})
+                    return state
+            except Exception as e:
+                print(f"⚠️ Could not load ingest state: {e}. Starting fresh.")
+        return {"watermark": None, "hashes": {}, "doc_ids": {}}
+
+    def _save_state(self):
+        try:
+            with open(self.state_path, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, indent=2)
+        except Exception as e:
+            print(f"❌ Could not save ingest state: {e}")
+
+    # ---------------- EVENTS ----------------
+
+    def submit_event(self, event: Dict[str, Any]) -> bool:
+        """
+        Queue a Notion webhook event. Returns True if the event was accepted.
+
+        Only page events are handled; everything else is ignored.
+        """
+        entity = event.get("entity", {})
+        event_type = event.get("type", "")
+        if entity.get("type") != "page" or not entity.get("id"):
+            return False
+        if event_type not in PAGE_UPDATE_EVENTS and event_type not in PAGE_DELETE_EVENTS:
+            return False
+
+        self.mark_dirty(entity["id"], deleted=event_type in PAGE_DELETE_EVENTS)
+        return True
+
+    def mark_dirty(self, page_id: str, deleted: bool = False):
+        """Mark a page for (re-)ingestion after the debounce window"""
+        now = self.clock()
+        with self._lock:
+            pending = self._pending.get(page_id)
+            first_seen = pending["first_seen"] if pending else now
+            due = min(now + self.debounce_seconds, first_seen + self.max_delay_seconds)
+            self._pending[page_id] = {"due": due, "first_seen": first_seen, "deleted": deleted}
+
+    def _retry_later(self, page_id: str):
+        """Queue a page that could not be stored again, backing off exponentially"""
+        now = self.clock()
+        with self._lock:
+            failures = self._failures[page_id] = self._failures.get(page_id, 0) + 1
+            if page_id in self._pending:
+                return  # a newer event already re-queued it
+            delay = min(self.max_retry_seconds, self.debounce_seconds * 2 ** failures)
+            self._pending[page_id] = {"due": now + delay, "first_seen": now, "deleted": False}
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _take_due(self, force: bool) -> Dict[str, bool]:
+        now = self.clock()
+        with self._lock:
+            due = {
+                page_id: info["deleted"]
+                for page_id, info in self._pending.items()
+                if force or info["due"] <= now
+            }
+            for page_id in due:
+                del self._pending[page_id]
+        return due
+
+    # ---------------- INGESTION ----------------
+
+    def flush(self, force: bool = False) -> Dict[str, int]:
+        """
+        Ingest every page whose debounce window has elapsed.
+
+        Args:
+            force: Ingest all pending pages regardless of their debounce window
+
+        Pages that cannot be fetched (rate limits, 5xx, timeouts) or whose
+        embedding or insert fails are queued again with backoff. Only deletion
+        events, archived/trashed pages and 404 answers remove a page's documents.
+
+        Returns:
+            Counts of stored, unchanged, deleted and retried pages
+        """
+        due = self._take_due(force)
+        stats = {"stored": 0, "unchanged": 0, "deleted": 0, "retried": 0}
+        if not due:
+            return stats
+
+        hashes = self.state["hashes"]
+        doc_ids = self.state["doc_ids"]
+        texts, metadatas, ids = [], [], []
+        changed = []  # (page_id, digest, chunk ids)
+        deleted_ids = []
+
+        for page_id, deleted in due.items():
+            activity = None
+            if not deleted:
+                try:
+                    activity = self.tracker.get_page_activity(page_id, include_content=True, raise_errors=True)
+                except Exception as e:
+                    if not _is_not_found(e):
+                        print(f"⚠️ Could not fetch Notion page {page_id}, retrying later: {e}")
+                        self._retry_later(page_id)
+                        stats["retried"] += 1
+                        continue
+                    deleted = True
+            if deleted or activity.get("archived") or activity.get("in_trash"):
+                if page_id in hashes:
+                    deleted_ids.extend(doc_ids.pop(page_id, [page_id]))
+                    hashes.pop(page_id, None)
+                    stats["deleted"] += 1
+                continue
+
+            text = self.page_to_text(activity)
+            digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+            if hashes.get(page_id) == digest:
+                stats["unchanged"] += 1
+                continue
+
+            chunks = (self.chunker(text) if self.chunker else None) or [text]
+            chunk_ids = [page_id] if len(chunks) == 1 else [f"{page_id}#{i}" for i in range(len(chunks))]
+            changed.append((page_id, digest, chunk_ids))
+
+            for index, (chunk, chunk_id) in enumerate(zip(chunks, chunk_ids)):
+                texts.append(chunk)
+                ids.append(chunk_id)
+                metadatas.append({
+                    "source": "notion",
+                    "page_id": page_id,
+                    "chunk": index,
+                    "title": activity.get("title", "Untitled"),
+                    "url": activity.get("url", ""),
+                    "last_edited_time": activity.get("last_edited_time"),
+                    "content_hash": digest,
+                })
+
+        if texts:
+            try:
+                stored = set(self.rag.store_many(texts, metadatas, ids))
+            except Exception as e:
+                print(f"❌ Could not store Notion pages: {e}")
+                stored = set()
+            for page_id, digest, chunk_ids in changed:
+                if not all(chunk_id in stored for chunk_id in chunk_ids):
+                    self._retry_later(page_id)
+                    stats["retried"] += 1
+                    continue
+                self._failures.pop(page_id, None)
+                # Chunks left over from a longer previous version of the page
+                stale = set(doc_ids.get(page_id, [page_id])) - set(chunk_ids)
+                deleted_ids.extend(stale)
+                hashes[page_id] = digest
+                doc_ids[page_id] = chunk_ids
+                stats["stored"] += 1
+
+        if deleted_ids:
+            self.rag.delete(deleted_ids)
+
+        self._save_state()
+        return stats
+
+    def page_to_text(self, activity: Dict[str, Any]) -> str:
+        """Flatten a page activity (title, properties and body) into embeddable text"""
+        lines = [activity.get("title") or "Untitled"]
+        for name, prop in (activity.get("properties") or {}).items():
+            value = prop.get("value")
+            if prop.get("type") == "title" or value in (None, "", []):
+                continue
+            if isinstance(value, list):
+                value = ", ".join(str(v) for v in value)
+            elif isinstance(value, dict):
+                value = json.dumps(value, ensure_ascii=False, sort_keys=True)
+            lines.append(f"{name}: {value}")
+        if activity.get("content"):
+            lines.extend(["", activity["content"]])
+        return "\n".join(lines)
+
+    # ---------------- POLLING FALLBACK ----------------
+
+    def poll_once(self) -> int:
+        """
+        Mark pages edited since the saved watermark as dirty.
+
+        Uses search sorted by last_edited_time (newest first) and stops paging
+        as soon as it reaches pages older than the watermark. Notion reports
+        last_edited_time to the minute, so pages in the watermark's own minute
+        are marked again; the content hash skips the ones that did not change.
+
+        Returns:
+            Number of pages marked dirty
+        """
+        watermark = self.state.get("watermark")
+        newest = watermark
+        marked = 0
+        cursor = None
+
+        try:
+            while True:
+                kwargs = {
+                    "filter": {"property": "object", "value": "page"},
+                    "sort": {"direction": "descending", "timestamp": "last_edited_time"},
+                    "page_size": 100,
+                }
+                if cursor:
+                    kwargs["start_cursor"] = cursor
+                response = self.tracker.client.search(**kwargs)
+
+                reached_watermark = False
+                for page in response.get("results", []):
+                    edited = page.get("last_edited_time", "")
+                    if watermark and edited < watermark:
+                        reached_watermark = True
+                        break
+                    self.mark_dirty(page["id"], deleted=page.get("archived", False))
+                    marked += 1
+                    if not newest or edited > newest:
+                        newest = edited
+
+                if reached_watermark or not response.get("has_more"):
+                    break
+                cursor = response.get("next_cursor")
+        except Exception as e:
+            print(f"Error polling Notion: {e}")
+
+        if newest != watermark:
+            self.state["watermark"] = newest
+            self._save_state()
+        return marked
+
+    def run_polling(self, interval_seconds: float = 60.0, stop_event: Optional[threading.Event] = None):
+        """Poll for edits and flush due pages until stopped"""
+        stop_event = stop_event or threading.Event()
+        next_poll = 0.0
+        while not stop_event.is_set():
+            if self.clock() >= next_poll:
+                self.poll_once()
+                next_poll = self.clock() + interval_seconds
+            self._report(self.flush())
+            stop_event.wait(min(1.0, self.debounce_seconds))
+
+    def _report(self, stats: Dict[str, int]):
+        if any(stats.values()):
+            print(f"[{datetime.now().isoformat(timespec='seconds')}] "
+                  f"stored={stats['stored']} unchanged={stats['unchanged']} deleted={stats['deleted']} "
+                  f"retried={stats['retried']}")
+
+
+# ---------------- WEBHOOK RECEIVER ----------------
+
+def make_webhook_handler(ingester: NotionIngester, verification_token: Optional[str] = None):
+    """Build an HTTP handler class that feeds Notion webhook events into the ingester"""
+
+    class NotionWebhookHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+
+            try:
+                payload = json.loads(body or b"{}")
+            except json.JSONDecodeError:
+                self._reply(400, {"error": "invalid json"})
+                return
+
+            # Subscription handshake: Notion sends the token once, it must be copied into the integration
+            if "verification_token" in payload:
+                print(f"🔑 Notion verification token received: {payload['verification_token']}")
+                self._reply(200, {"ok": True})
+                return
+
+            if verification_token and not self._signature_valid(body):
+                self._reply(401, {"error": "invalid signature"})
+                return
+
+            accepted = ingester.submit_event(payload)
+            self._reply(200, {"accepted": accepted})
+
+        def _signature_valid(self, body: bytes) -> bool:
+            expected = "sha256=" + hmac.new(
+                verification_token.encode('utf-8'), body, hashlib.sha256
+            ).hexdigest()
+            return hmac.compare_digest(expected, self.headers.get("X-Notion-Signature", ""))
+
+        def _reply(self, status: int, payload: Dict[str, Any]):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return NotionWebhookHandler
+
+
+def serve_webhooks(ingester: NotionIngester, host: str = "127.0.0.1", port: int = 8765,
+                   verification_token: Optional[str] = None,
+                   stop_event: Optional[threading.Event] = None):
+    """Run the webhook receiver and flush debounced pages until stopped"""
+    server = ThreadingHTTPServer((host, port), make_webhook_handler(ingester, verification_token))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"📡 Listening for Notion webhooks on http://{host}:{server.server_address[1]}")
+
+    stop_event = stop_event or threading.Event()
+    try:
+        while not stop_event.is_set():
+            ingester._report(ingester.flush())
+            stop_event.wait(min(1.0, ingester.debounce_seconds))
+    finally:
+        server.shutdown()
+        server.server_close()
+        ingester._report(ingester.flush(force=True))
+
+
+# ---------------- FAKE EVENT SOURCE ----------------
+
+class FakeEventSource:
+    """Generate Notion-shaped webhook events locally, without network access"""
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+
+    def emit(self, event_type: str, page_id: str) -> Dict[str, Any]:
+        event = {
+            "id": f"evt-{len(self.events) + 1}",
+            "timestamp": datetime.now().isoformat(),
+            "type": event_type,
+            "entity": {"id": page_id, "type": "page"},
+        }
+        self.events.append(event)
+        return event
+
+    def page_edited(self, page_id: str, times: int = 1) -> List[Dict[str, Any]]:
+        return [self.emit("page.content_updated", page_id) for _ in range(times)]
+
+    def page_deleted(self, page_id: str) -> Dict[str, Any]:
+        return self.emit("page.deleted", page_id)
+
+    def replay(self, ingester: NotionIngester) -> int:
+        """Submit all generated events to an ingester and clear the queue"""
+        accepted = sum(1 for event in self.events if ingester.submit_event(event))
+        self.events = []
+        return accepted
+
+
+def main():
+    """Run the ingester as a webhook receiver or a polling loop"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest edited Notion pages into the RAG store")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--serve", type=int, metavar="PORT", help="Receive Notion webhooks on PORT")
+    mode.add_argument("--poll", type=float, metavar="SECONDS", help="Poll for edits every SECONDS")
+    parser.add_argument("--host", default="127.0.0.1", help="Webhook bind address")
+    parser.add_argument("--debounce", type=float, default=5.0, help="Seconds of quiet before a page is ingested")
+    parser.add_argument("--state", default="ingest_state.json", help="Watermark/hash state file")
+    args = parser.parse_args()
+
+    token = os.getenv('NOTION_TOKEN')
+    if not token:
+        print("❌ ERROR: NOTION_TOKEN not set!")
+        sys.exit(1)
+
+    # The RAG store lives in the agent package, two levels up from here; the
+    # shared chunker lives next to the medical report analyzer
+    agent_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    sys.path.insert(0, agent_root)
+    sys.path.insert(0, os.path.join(agent_root, "..", "pdftoprompt1"))
+    from notion_activity_tracker import NotionActivityTracker
+    from ragProcessor.rag import RAGProcessor
+    from text_chunker import chunk_text
+
+    tracker = NotionActivityTracker(notion_token=token)
+    rag = RAGProcessor(persistence_path=os.path.join(agent_root, "data", "rag_store.json"))
+    ingester = NotionIngester(tracker, rag, state_path=args.state, debounce_seconds=args.debounce,
+                              chunker=chunk_text)
+
+    try:
+        if args.serve is not None:
+            serve_webhooks(ingester, args.host, args.serve,
+                           verification_token=os.getenv('NOTION_WEBHOOK_TOKEN'))
+        else:
+            ingester.run_polling(interval_seconds=args.poll)
+    except KeyboardInterrupt:
+        ingester._report(ingester.flush(force=True))
+
+
+if __name__ == "__main__":
+    main()
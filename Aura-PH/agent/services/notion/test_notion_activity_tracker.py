@@ -0,0 +1,149 @@
+"""
+Offline checks for the Notion activity tracker's caches (the Notion client is faked).
+
+Usage:
+    python test_notion_activity_tracker.py
+"""
+
+import sys
+import types
+import importlib.util
+
+if importlib.util.find_spec("notion_client") is None:
+    # Only Client is needed at import time; every call below goes to a fake
+    sys.modules["notion_client"] = types.SimpleNamespace(Client=lambda auth=None: None)
+
+from notion_activity_tracker import NotionActivityTracker
+
+
+class FakeAPIResponseError(Exception):
+    """Shaped like notion_client.APIResponseError: an HTTP status and a Notion error code"""
+
+    def __init__(self, status, code):
+        super().__init__(f"{status} {code}")
+        self.status = status
+        self.code = code
+
+
+class FakeUsers:
+    def __init__(self, answers):
+        self.answers = answers  # user_id -> list of results (dicts or exceptions), consumed in order
+        self.calls = []
+
+    def retrieve(self, user_id):
+        self.calls.append(user_id)
+        answer = self.answers[user_id].pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+class FakeBlocks:
+    """blocks.children.list over a {parent_id: [block, ...]} tree"""
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.children = types.SimpleNamespace(list=self.list)
+        self.calls = []
+        self.failing = set()  # block ids whose next list call fails
+
+    def list(self, block_id, page_size=100, start_cursor=None):
+        self.calls.append(block_id)
+        if block_id in self.failing:
+            self.failing.discard(block_id)
+            raise FakeAPIResponseError(502, "bad_gateway")
+        return {"results": self.tree.get(block_id, []), "has_more": False}
+
+
+def block(block_id, text, edited, has_children=False):
+    return {"id": block_id, "type": "paragraph", "has_children": has_children, "last_edited_time": edited,
+            "paragraph": {"rich_text": [{"plain_text": text}]}}
+
+
+def tracker_with(**clients):
+    tracker = NotionActivityTracker(notion_token="fake-token")
+    tracker.client = types.SimpleNamespace(**clients)
+    return tracker
+
+
+def test_only_missing_users_are_cached_as_unknown():
+    users = FakeUsers({
+        "flaky": [TimeoutError("read timed out"), FakeAPIResponseError(429, "rate_limited"),
+                  FakeAPIResponseError(503, "service_unavailable"), {"id": "flaky", "name": "Asha"}],
+        "gone": [FakeAPIResponseError(404, "object_not_found")],
+        "known": [{"id": "known", "name": "Ravi", "type": "person"}],
+    })
+    tracker = tracker_with(users=users)
+
+    # Transient failures answer "Unknown" but are not cached, so the next lookup asks again
+    for _ in range(3):
+        assert tracker.get_user_info("flaky")["name"] == "Unknown"
+    assert tracker.get_user_info("flaky")["name"] == "Asha"
+    assert tracker.get_user_info("flaky")["name"] == "Asha"
+    assert users.calls.count("flaky") == 4
+
+    # A user Notion reports as missing is cached, like a found one
+    assert tracker.get_user_info("gone")["name"] == "Unknown"
+    assert tracker.get_user_info("gone")["name"] == "Unknown"
+    assert tracker.get_user_info("known")["name"] == "Ravi"
+    assert tracker.get_user_info("known")["type"] == "person"
+    assert users.calls.count("gone") == 1 and users.calls.count("known") == 1
+
+
+def test_grandchild_edit_refreshes_the_page_body():
+    tree = {
+        "page": [block("toggle", "Toggle", "T1", has_children=True)],
+        "toggle": [block("child", "Child", "T1", has_children=True)],
+        "child": [block("grandchild", "Old text", "T1")],
+    }
+    blocks = FakeBlocks(tree)
+    tracker = tracker_with(blocks=blocks)
+
+    assert tracker.get_page_content("page", "T1") == "Toggle\n  Child\n    Old text"
+    assert tracker.get_page_content("page", "T1") == "Toggle\n  Child\n    Old text"
+    assert blocks.calls == ["page", "toggle", "child"]
+
+    # Only the grandchild and the page move; the toggle and child keep their timestamps
+    tree["child"] = [block("grandchild", "New text", "T2")]
+    assert tracker.get_page_content("page", "T2") == "Toggle\n  Child\n    New text"
+    assert blocks.calls[3:] == ["page", "toggle", "child"]
+
+
+def test_failed_block_fetch_is_raised_and_not_cached():
+    tree = {
+        "page": [block("toggle", "Toggle", "T1", has_children=True)],
+        "toggle": [block("child", "Child", "T1")],
+    }
+    blocks = FakeBlocks(tree)
+    blocks.failing = {"toggle"}
+    tracker = tracker_with(blocks=blocks)
+
+    try:
+        tracker.get_page_content("page", "T1")
+        assert False, "a failed block list must not return a truncated body"
+    except FakeAPIResponseError:
+        pass
+    # Same last_edited_time once the API recovers: the whole page is fetched again
+    assert tracker.get_page_content("page", "T1") == "Toggle\n  Child"
+    assert blocks.calls == ["page", "toggle", "page", "toggle"]
+
+
+def test_page_cache_keeps_the_most_recent_pages():
+    tree = {f"page{i}": [block(f"b{i}", f"Body {i}", "T1")] for i in range(3)}
+    blocks = FakeBlocks(tree)
+    tracker = tracker_with(blocks=blocks)
+    tracker.page_cache_size = 2
+
+    for page_id in ("page0", "page1", "page0", "page2"):
+        tracker.get_page_content(page_id, "T1")
+    assert list(tracker._block_cache) == ["page0", "page2"]  # page1 was least recently used
+    tracker.get_page_content("page0", "T1")
+    assert blocks.calls == ["page0", "page1", "page2"]
+
+
+if __name__ == "__main__":
+    test_only_missing_users_are_cached_as_unknown()
+    test_grandchild_edit_refreshes_the_page_body()
+    test_failed_block_fetch_is_raised_and_not_cached()
+    test_page_cache_keeps_the_most_recent_pages()
+    print("✅ All activity tracker checks passed")
@@ -0,0 +1,262 @@
+"""
+Offline checks for the Notion ingester using the fake event source.
+
+Usage:
+    python test_notion_ingester.py
+"""
+
+import os
+import json
+import tempfile
+import threading
+import urllib.request
+
+from notion_ingester import NotionIngester, FakeEventSource, make_webhook_handler
+from http.server import ThreadingHTTPServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeAPIResponseError(Exception):
+    def __init__(self, status, code):
+        super().__init__(f"{status} {code}")
+        self.status = status
+        self.code = code
+
+
+class FakeTracker:
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetches = []
+        self.errors = []  # raised by the next fetches, in order
+
+    def search(self, **kwargs):
+        results = sorted(({"id": page_id, "last_edited_time": page["last_edited_time"]}
+                          for page_id, page in self.pages.items()),
+                         key=lambda page: page["last_edited_time"], reverse=True)
+        return {"results": results, "has_more": False}
+
+    def get_page_activity(self, page_id, include_content=False, raise_errors=False):
+        self.fetches.append(page_id)
+        if self.errors:
+            raise self.errors.pop(0)
+        if page_id not in self.pages:
+            raise FakeAPIResponseError(404, "object_not_found")
+        return dict(self.pages[page_id])
+
+
+class FakeRAG:
+    def __init__(self):
+        self.docs = {}
+        self.batches = []
+        self.failing = set()  # ids whose embedding fails
+
+    def store_many(self, texts, metadatas=None, ids=None):
+        self.batches.append(list(ids))
+        stored = []
+        for text, doc_id in zip(texts, ids):
+            if doc_id in self.failing:
+                stored.append(None)
+                continue
+            self.docs[doc_id] = text
+            stored.append(doc_id)
+        return stored
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.docs.pop(doc_id, None)
+        return len(ids)
+
+
+def _page(title, status):
+    return {
+        "title": title,
+        "url": f"https://notion.so/{title}",
+        "last_edited_time": "2026-01-23T10:00:00.000Z",
+        "properties": {
+            "Name": {"type": "title", "value": title},
+            "Status": {"type": "select", "value": status},
+        },
+    }
+
+
+def _make_ingester(pages, chunker=None):
+    state_path = os.path.join(tempfile.mkdtemp(), "state.json")
+    clock = FakeClock()
+    tracker, rag = FakeTracker(pages), FakeRAG()
+    ingester = NotionIngester(tracker, rag, state_path=state_path,
+                              debounce_seconds=5, max_delay_seconds=30,
+                              chunker=chunker, clock=clock)
+    return ingester, tracker, rag, clock
+
+
+def test_debounces_bursts_into_one_batch():
+    ingester, tracker, rag, clock = _make_ingester({"p1": _page("Plan", "Todo"), "p2": _page("Notes", "Done")})
+    source = FakeEventSource()
+    source.page_edited("p1", times=10)
+    source.page_edited("p2", times=3)
+    assert source.replay(ingester) == 13
+
+    assert ingester.flush()["stored"] == 0  # still inside the debounce window
+    clock.now = 6
+    stats = ingester.flush()
+
+    assert stats["stored"] == 2
+    assert sorted(tracker.fetches) == ["p1", "p2"]
+    assert len(rag.batches) == 1
+    assert "Status: Todo" in rag.docs["p1"]
+
+
+def test_skips_unchanged_and_handles_deletes():
+    pages = {"p1": _page("Plan", "Todo")}
+    ingester, tracker, rag, clock = _make_ingester(pages)
+    source = FakeEventSource()
+
+    source.page_edited("p1")
+    source.replay(ingester)
+    ingester.flush(force=True)
+
+    source.page_edited("p1")
+    source.replay(ingester)
+    assert ingester.flush(force=True) == {"stored": 0, "unchanged": 1, "deleted": 0, "retried": 0}
+
+    pages["p1"] = _page("Plan", "Doing")
+    source.page_edited("p1")
+    source.replay(ingester)
+    assert ingester.flush(force=True)["stored"] == 1
+
+    source.page_deleted("p1")
+    source.replay(ingester)
+    assert ingester.flush(force=True)["deleted"] == 1
+    assert "p1" not in rag.docs
+
+
+def test_chunked_pages_drop_stale_chunks():
+    pages = {"p1": dict(_page("Plan", "Todo"), content="a\nb\nc")}
+    ingester, _, rag, _ = _make_ingester(pages, chunker=lambda text: text.split("\n"))
+
+    ingester.mark_dirty("p1")
+    ingester.flush(force=True)
+    assert sorted(rag.docs) == ["p1#0", "p1#1", "p1#2", "p1#3", "p1#4", "p1#5"]
+
+    pages["p1"] = dict(_page("Plan", "Todo"), content="a")
+    ingester.mark_dirty("p1")
+    ingester.flush(force=True)
+    assert sorted(rag.docs) == ["p1#0", "p1#1", "p1#2", "p1#3"]
+
+    ingester.submit_event(FakeEventSource().page_deleted("p1"))
+    ingester.flush(force=True)
+    assert rag.docs == {}
+
+
+def test_max_delay_caps_continuous_edits():
+    ingester, _, rag, clock = _make_ingester({"p1": _page("Plan", "Todo")})
+    for second in range(0, 40, 2):
+        clock.now = second
+        ingester.mark_dirty("p1")
+        if ingester.flush()["stored"]:
+            break
+    assert clock.now >= 30 and "p1" in rag.docs
+
+
+def test_polling_rechecks_pages_in_the_watermark_minute():
+    pages = {"p1": _page("Plan", "Todo"), "p2": _page("Notes", "Done")}
+    ingester, tracker, rag, _ = _make_ingester(pages)
+    tracker.client = tracker
+    assert ingester.poll_once() == 2
+    assert ingester.flush(force=True)["stored"] == 2
+
+    # Edited again later in the same minute: same last_edited_time as the watermark
+    pages["p1"]["properties"]["Status"]["value"] = "Doing"
+    assert ingester.poll_once() == 2
+    assert ingester.flush(force=True) == {"stored": 1, "unchanged": 1, "deleted": 0, "retried": 0}
+    assert "Status: Doing" in rag.docs["p1"]
+
+    pages["p1"]["last_edited_time"] = pages["p2"]["last_edited_time"] = "2026-01-23T09:00:00.000Z"
+    assert ingester.poll_once() == 0
+
+
+def test_failed_embeddings_are_retried_with_backoff():
+    ingester, _, rag, clock = _make_ingester({"p1": _page("Plan", "Todo"), "p2": _page("Notes", "Done")})
+    rag.failing = {"p2"}
+    ingester.mark_dirty("p1")
+    ingester.mark_dirty("p2")
+    assert ingester.flush(force=True) == {"stored": 1, "unchanged": 0, "deleted": 0, "retried": 1}
+    assert ingester.pending_count() == 1
+
+    clock.now = 9
+    assert ingester.flush()["retried"] == 0  # first retry after 2 x debounce
+    clock.now = 10
+    assert ingester.flush()["retried"] == 1
+    clock.now = 29
+    assert ingester.flush()["retried"] == 0  # then 4 x debounce
+    rag.failing = set()
+    clock.now = 30
+    assert ingester.flush()["stored"] == 1
+    assert "p2" in rag.docs and ingester.pending_count() == 0
+
+
+def test_fetch_errors_are_retried_and_keep_the_docs():
+    pages = {"p1": _page("Plan", "Todo")}
+    ingester, tracker, rag, clock = _make_ingester(pages)
+    ingester.mark_dirty("p1")
+    ingester.flush(force=True)
+
+    pages["p1"] = _page("Plan", "Doing")
+    tracker.errors = [FakeAPIResponseError(429, "rate_limited")]
+    ingester.mark_dirty("p1")
+    assert ingester.flush(force=True) == {"stored": 0, "unchanged": 0, "deleted": 0, "retried": 1}
+    assert "Status: Todo" in rag.docs["p1"] and ingester.pending_count() == 1
+
+    clock.now = 10
+    assert ingester.flush()["stored"] == 1
+    assert "Status: Doing" in rag.docs["p1"]
+
+    # Archived and missing (404) pages are removed
+    pages["p1"] = dict(_page("Plan", "Doing"), archived=True)
+    ingester.mark_dirty("p1")
+    assert ingester.flush(force=True)["deleted"] == 1 and rag.docs == {}
+    pages["p1"] = _page("Plan", "Doing")
+    ingester.mark_dirty("p1")
+    assert ingester.flush(force=True)["stored"] == 1
+    pages.pop("p1")
+    ingester.mark_dirty("p1")
+    assert ingester.flush(force=True) == {"stored": 0, "unchanged": 0, "deleted": 1, "retried": 0}
+    assert rag.docs == {}
+
+
+def test_webhook_receiver_accepts_events():
+    ingester, _, _, _ = _make_ingester({})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_webhook_handler(ingester))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        event = FakeEventSource().emit("page.properties_updated", "p9")
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{server.server_address[1]}/",
+            data=json.dumps(event).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request) as response:
+            assert json.loads(response.read())["accepted"] is True
+        assert ingester.pending_count() == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_debounces_bursts_into_one_batch()
+    test_skips_unchanged_and_handles_deletes()
+    test_chunked_pages_drop_stale_chunks()
+    test_max_delay_caps_continuous_edits()
+    test_polling_rechecks_pages_in_the_watermark_minute()
+    test_failed_embeddings_are_retried_with_backoff()
+    test_fetch_errors_are_retried_and_keep_the_docs()
+    test_webhook_receiver_accepts_events()
+    print("✅ All ingester checks passed")
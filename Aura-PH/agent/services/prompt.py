@@ -172,6 +172,3 @@ class taskAnalyzerPrompts:
 
         Keep the tone professional, observant, and constructive.
         """
-
-    def situationSummarizer(self, situations):
-        return f"""
\ No newline at end of file
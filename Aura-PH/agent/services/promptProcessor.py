@@ -2,6 +2,10 @@ import re
 import json
 from services.prompt import taskAnalyzerPrompts
 from services.llmService import LLMInterface
+from services.modelRouter import ModelRouter
+from services import metrics
+
+
 def parseLLMJson(llm_output):
     """
     Extract and parse JSON from LLM output, ignoring extra text or <think> tags.
@@ -122,32 +126,83 @@ def extract_json_from_llm_response(text: str):
             raise ValueError(f"Extracted content is not valid JSON. Content: {json_str[:100]}... Error: {e}")
 
 
+def _require_task_list(result, keys):
+    """Raise ValueError unless result is a non-empty list of objects with the given keys."""
+    if not isinstance(result, list) or not result:
+        raise ValueError("Expected a non-empty JSON list of tasks")
+    for item in result:
+        if not isinstance(item, dict) or any(key not in item for key in keys):
+            raise ValueError(f"Every task must be an object with {', '.join(keys)}. Got: {str(item)[:100]}")
+
+
+def validate_categories(result):
+    _require_task_list(result, ("task", "category"))
+
+
+def validate_health(result):
+    _require_task_list(result, ("task", "category", "avoid"))
+
+
+def validate_screen_time(result):
+    if not isinstance(result, dict) or "overall_verdict" not in result:
+        raise ValueError("Expected a JSON object with overall_verdict")
+
+
 class taskProcessor:
-    def __init__(self):
+    def __init__(self, llm_interface=None, router: ModelRouter = None):
         self.taskAnalyzerPrompts = taskAnalyzerPrompts()
-        self.LLMInterface = LLMInterface()
+        self.LLMInterface = llm_interface or LLMInterface.shared()
+        self.router = router or ModelRouter(ledger=self.LLMInterface.usage)
+
+    def _analyze(self, task: str, prompt: str, validate=None, parse: bool = True):
+        """
+        Run one prompt on the router's models for this task, smallest first.
+        A reply that does not parse or validate is retried on the next model;
+        a truncated one also gets twice the max_tokens. Raises the last
+        validation error when every model fails.
+        """
+        models = self.router.models_for(task)
+        max_tokens = self.router.max_tokens_for(task)
+        error = None
+        with metrics.span("task.analyze", task=task) as analyze_span:
+            for attempt, model in enumerate(models):
+                if attempt:
+                    self.router.escalated(task)
+                    analyze_span.add(escalations=1)
+                llm_output, usage = self.LLMInterface.nvidiaResponse(
+                    prompt=prompt, model=model, max_tokens=max_tokens, prompt_type=task, return_usage=True)
+                if usage["finish_reason"] == "length":
+                    max_tokens = min(2 * max_tokens, 4096)
+
+                try:
+                    with metrics.span("task.parse", task=task) as span:
+                        span.add(response_chars=len(llm_output))
+                        if not parse:
+                            if not llm_output.strip():
+                                raise ValueError("Empty response")
+                            return llm_output
+                        result = extract_json_from_llm_response(llm_output)
+                        if validate:
+                            validate(result)
+                        return result
+                except ValueError as e:
+                    error = e
+                    print(f"⚠️ {task}: {model} reply rejected ({str(e)[:120]})"
+                          + (f", escalating to {models[attempt + 1]}" if attempt + 1 < len(models) else ""))
+        raise error
 
     def processTasks(self, tasks):
         prompt = self.taskAnalyzerPrompts.tastCategorizer(tasks)
-        llm_output = self.LLMInterface.nvidiaResponse(prompt=prompt, model="mistralai/mixtral-8x7b-instruct-v0.1")
-        return extract_json_from_llm_response(llm_output)
+        return self._analyze("processTasks", prompt, validate_categories)
     
     def processHealthTasks(self, tasks, health_condition, health_issue):
         prompt = self.taskAnalyzerPrompts.healthAnalyzerPrompts(tasks, health_condition, health_issue)
-        llm_output = self.LLMInterface.nvidiaResponse(prompt=prompt, model="mistralai/mixtral-8x7b-instruct-v0.1")
-        return extract_json_from_llm_response(llm_output)
+        return self._analyze("processHealthTasks", prompt, validate_health)
 
     def screenTimeAnalyzer(self, screenTimeData):
         prompt = self.taskAnalyzerPrompts.screenTimeAnalyzerPrompt(screenTimeData)
-        llm_output = self.LLMInterface.nvidiaResponse(prompt=prompt, model="mistralai/mixtral-8x7b-instruct-v0.1")
-        return extract_json_from_llm_response(llm_output)
+        return self._analyze("screenTimeAnalyzer", prompt, validate_screen_time)
 
     def defaultEnergyLookup(self, defaultHabitate):
         prompt = self.taskAnalyzerPrompts.defaultEneryLookup(defaultHabitate)
-        llm_output = self.LLMInterface.nvidiaResponse(prompt=prompt, model="mistralai/mixtral-8x7b-instruct-v0.1")
-        return llm_output
-
-    def 
-
-    
-
+        return self._analyze("defaultEnergyLookup", prompt, parse=False)
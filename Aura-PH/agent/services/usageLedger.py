@@ -0,0 +1,83 @@
+"""
+Per-model token and latency accounting for LLM calls.
+
+LLMInterface records every nvidiaResponse call here; summary() reports, per
+model, calls, errors, prompt/completion tokens and latency percentiles, and
+per prompt type the completion sizes the router uses to cap max_tokens.
+"""
+
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+
+def _percentile(values, pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class UsageLedger:
+    """Thread-safe running totals of LLM usage"""
+
+    def __init__(self, window: int = 500):
+        """
+        Args:
+            window: Latency and completion-size samples kept per model / prompt type
+        """
+        self.window = window
+        self._lock = threading.Lock()
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self._completions: Dict[str, deque] = {}
+
+    def record(self, model: str, prompt_tokens: int = 0, completion_tokens: int = 0, latency: float = 0.0,
+               ok: bool = True, prompt_type: Optional[str] = None, finish_reason: Optional[str] = None):
+        """Add one call; completion sizes are kept per prompt type for finished (not truncated) replies."""
+        with self._lock:
+            stats = self._models.get(model)
+            if stats is None:
+                stats = self._models[model] = {"calls": 0, "errors": 0, "truncated": 0, "prompt_tokens": 0,
+                                               "completion_tokens": 0, "latencies": deque(maxlen=self.window)}
+            stats["calls"] += 1
+            stats["errors"] += 0 if ok else 1
+            stats["truncated"] += 1 if finish_reason == "length" else 0
+            stats["prompt_tokens"] += prompt_tokens or 0
+            stats["completion_tokens"] += completion_tokens or 0
+            stats["latencies"].append(latency)
+            if prompt_type and ok and completion_tokens and finish_reason != "length":
+                self._completions.setdefault(prompt_type, deque(maxlen=self.window)).append(completion_tokens)
+
+    def completion_sizes(self, prompt_type: str) -> list:
+        with self._lock:
+            return list(self._completions.get(prompt_type, ()))
+
+    def load_completion_sizes(self, sizes: Dict[str, list]):
+        """Seed completion sizes, e.g. from a previous run's saved state."""
+        with self._lock:
+            for prompt_type, values in sizes.items():
+                self._completions.setdefault(prompt_type, deque(maxlen=self.window)).extend(values)
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-model totals with latency p50/p95 in ms, plus completion sizes per prompt type."""
+        with self._lock:
+            models = {
+                model: {
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "truncated": stats["truncated"],
+                    "prompt_tokens": stats["prompt_tokens"],
+                    "completion_tokens": stats["completion_tokens"],
+                    "latency_ms": {
+                        "p50": round((_percentile(stats["latencies"], 50) or 0) * 1000, 1),
+                        "p95": round((_percentile(stats["latencies"], 95) or 0) * 1000, 1),
+                    },
+                }
+                for model, stats in self._models.items()
+            }
+            completions = {
+                prompt_type: {"samples": len(values), "p50": _percentile(values, 50), "p95": _percentile(values, 95)}
+                for prompt_type, values in self._completions.items()
+            }
+        return {"models": models, "completion_tokens_by_prompt_type": completions}
@@ -0,0 +1,112 @@
+"""
+Offline checks for the per-upstream circuit breakers.
+
+Usage:
+    python test_circuit_breaker.py
+"""
+
+import os
+import time
+import socket
+import importlib.util
+
+from services import circuitBreaker
+from services.circuitBreaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_probes_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker("upstream", failure_threshold=3, reset_timeout=30, clock=clock)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure(ConnectionError("refused"))
+    breaker.record_success()  # failures must be consecutive
+    for _ in range(3):
+        breaker.record_failure(ConnectionError("refused"))
+    assert breaker.state == OPEN and not breaker.allow()
+    assert breaker.retry_after() == 30
+
+    clock.now += 30
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_failure(TimeoutError("slow"))
+    assert breaker.state == OPEN and not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+    health = breaker.health()
+    assert health["opened"] == 2 and health["rejected"] == 3
+    assert health["last_error"] == "TimeoutError: slow"
+
+
+def test_breakers_are_shared_per_upstream():
+    circuitBreaker.reset()
+    first = circuitBreaker.breaker_for("http://a", failure_threshold=1)
+    assert circuitBreaker.breaker_for("http://a") is first
+    assert circuitBreaker.breaker_for("http://b") is not first
+    first.record_failure()
+    assert circuitBreaker.health()["http://a"]["state"] == OPEN
+    circuitBreaker.reset()
+
+
+def test_llm_interface_fails_fast_while_open():
+    if importlib.util.find_spec("openai") is None:
+        print("⚠️ openai not installed; skipping the end-to-end circuit breaker check")
+        return
+
+    from services.llmService import LLMInterface
+
+    # A port nothing listens on: every request is a connection error
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        base_url = f"http://127.0.0.1:{sock.getsockname()[1]}/v1"
+
+    os.environ.setdefault("GOOGLE_GEMINI_API_KEY", "mock-gemini")
+    circuitBreaker.reset()
+    circuitBreaker.breaker_for(base_url, failure_threshold=1, reset_timeout=60)
+    try:
+        first = LLMInterface(base_url=base_url, gemini_fallback=False)
+        first.nvapi_keys = ["key-1", "key-2"]
+        try:
+            first.nvidiaResponse("Say hi")
+        except ValueError:
+            pass
+        assert circuitBreaker.health()[base_url]["state"] == OPEN
+
+        # Another instance sees the same open circuit and does not touch the network
+        second = LLMInterface(base_url=base_url, gemini_fallback=False)
+        second.nvapi_keys = ["key-1"]
+        started = time.perf_counter()
+        try:
+            second.nvidiaResponse("Say hi")
+        except CircuitOpenError:
+            pass
+        else:
+            raise AssertionError("expected CircuitOpenError")
+        assert time.perf_counter() - started < 0.1
+
+        fallback = LLMInterface(base_url=base_url, gemini_fallback=True)
+        fallback.nvapi_keys = ["key-1"]
+        fallback.geminiLLMInterface = lambda prompt, imagePath=None: "Hi from Gemini"
+        text, usage = fallback.nvidiaResponse("Say hi", prompt_type="defaultEnergyLookup", return_usage=True)
+        assert text == "Hi from Gemini" and usage["model"] == "gemini-2.5-flash"
+    finally:
+        circuitBreaker.reset()
+
+
+if __name__ == "__main__":
+    test_breaker_opens_probes_and_closes()
+    test_breakers_are_shared_per_upstream()
+    test_llm_interface_fails_fast_while_open()
+    print("✅ All circuit breaker checks passed")
@@ -0,0 +1,102 @@
+"""
+Offline checks for shared clients and process-wide LLMInterface reuse.
+
+Usage:
+    python test_client_registry.py
+"""
+
+import os
+import time
+import threading
+import importlib.util
+
+from mockLlmServer import MockLLMServer
+from services import clientRegistry
+
+
+def test_shared_builds_each_key_once():
+    clientRegistry.reset()
+    built = []
+
+    def factory():
+        time.sleep(0.05)
+        built.append(1)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(clientRegistry.shared("thing", factory)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1 and all(result is results[0] for result in results)
+    assert clientRegistry.shared("other", object) is not results[0]
+    clientRegistry.reset()
+    assert clientRegistry.shared("thing", factory) is not results[0]
+
+
+def test_forked_child_starts_with_an_empty_registry():
+    if not hasattr(os, "fork"):
+        print("⚠️ os.fork unavailable; skipping the fork check")
+        return
+    clientRegistry.reset()
+    parent_value = clientRegistry.shared("thing", object)
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            fresh = clientRegistry.shared("thing", object) is not parent_value
+            os.write(write_fd, b"1" if fresh else b"0")
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    answer = os.read(read_fd, 1)
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    assert answer == b"1"
+    assert clientRegistry.shared("thing", object) is parent_value
+    clientRegistry.reset()
+
+
+def test_llm_interface_reuses_clients_and_connections():
+    if importlib.util.find_spec("openai") is None:
+        print("⚠️ openai not installed; skipping the connection reuse check")
+        return
+
+    from services.llmService import LLMInterface
+    from services.promptProcessor import taskProcessor
+
+    os.environ.setdefault("GOOGLE_GEMINI_API_KEY", "mock-gemini")
+    clientRegistry.reset()
+    mock = MockLLMServer(port=0).start()
+    try:
+        llm = LLMInterface.shared(base_url=mock.url)
+        assert LLMInterface.shared(base_url=mock.url) is llm
+        llm.nvapi_keys = ["only-key"]
+        for _ in range(3):
+            llm.nvidiaResponse("Say hi")
+        assert list(clientRegistry._openai_clients) == [(mock.url, "only-key", 30.0)]
+
+        # Requests read to the end go back to the client's keep-alive pool
+        client = clientRegistry.openai_client(mock.url, "only-key")
+        connections = mock.stats["connections"]
+        for _ in range(3):
+            client.chat.completions.create(model="m", messages=[{"role": "user", "content": "Say hi"}])
+        assert mock.stats["connections"] - connections <= 1, mock.stats
+
+        os.environ["LLM_BASE_URL"] = mock.url
+        try:
+            assert taskProcessor().LLMInterface is llm
+        finally:
+            del os.environ["LLM_BASE_URL"]
+    finally:
+        mock.close()
+        clientRegistry.reset()
+
+
+if __name__ == "__main__":
+    test_shared_builds_each_key_once()
+    test_forked_child_starts_with_an_empty_registry()
+    test_llm_interface_reuses_clients_and_connections()
+    print("✅ All client registry checks passed")
@@ -0,0 +1,128 @@
+"""
+Offline checks for batched embeddings and the RAG paths built on them.
+
+Usage:
+    python test_embeddings.py
+"""
+
+import os
+import zlib
+import tempfile
+
+import numpy as np
+
+from services import llmService
+from services.llmService import LLMInterface
+from ragProcessor.rag import RAGProcessor
+
+
+class ServiceUnavailable(Exception):
+    code = 503
+
+
+class FakeGenai:
+    """embed_content stand-in: 8-dim vectors, optional transient and permanent failures"""
+
+    def __init__(self, flaky_calls=(), poison="poison", down=False):
+        self.calls = []
+        self.flaky_calls = set(flaky_calls)
+        self.poison = poison
+        self.down = down
+
+    def embed_content(self, model, content, task_type, title=None):
+        self.calls.append((len(content), task_type))
+        if self.down:
+            raise ServiceUnavailable("503 The model is overloaded")
+        if len(self.calls) in self.flaky_calls:
+            raise ConnectionError("503 Service Unavailable")
+        if self.poison in content:
+            raise ValueError("400 invalid content")
+        return {"embedding": [[float(zlib.crc32(f"{text}{i}".encode()) % 100) for i in range(8)]
+                              for text in content]}
+
+
+def interface_with(genai):
+    os.environ.setdefault("GOOGLE_GEMINI_API_KEY", "mock-gemini")
+    llm = LLMInterface(base_url="http://127.0.0.1:9/v1")
+    llmService._configure_gemini = lambda api_key: genai
+    return llm
+
+
+def test_batches_retry_only_the_failed_batch():
+    original = llmService._configure_gemini
+    try:
+        genai = FakeGenai(flaky_calls={2})
+        llm = interface_with(genai)
+        texts = [f"note {i}" for i in range(250)]
+        embeddings = llm.get_embeddings(texts, task_type="retrieval_query", retry_delay=0)
+        assert embeddings.dtype == np.float32 and embeddings.shape == (250, 8)
+        assert embeddings.all(axis=1).any()
+        # Batches of 100, 100 and 50; only the second is sent again
+        assert genai.calls == [(100, "retrieval_query"), (100, "retrieval_query"),
+                               (100, "retrieval_query"), (50, "retrieval_query")]
+        assert np.array_equal(embeddings[120], llm.get_embeddings(["note 120"])[0])
+    finally:
+        llmService._configure_gemini = original
+
+
+def test_a_bad_text_only_loses_its_own_row():
+    original = llmService._configure_gemini
+    try:
+        genai = FakeGenai()
+        llm = interface_with(genai)
+        texts = [f"note {i}" for i in range(7)] + ["poison"] + [f"note {i}" for i in range(8, 16)]
+        embeddings = llm.get_embeddings(texts, batch_size=16, max_retries=1, retry_delay=0)
+        failed = [i for i, row in enumerate(embeddings) if not row.any()]
+        assert failed == [7]
+        assert len(genai.calls) < 16  # split in halves, not one call per text
+        assert llm.get_embedding("poison", task_type="retrieval_query") == []
+        assert len(llm.get_embedding("note 1")) == 8
+    finally:
+        llmService._configure_gemini = original
+
+
+def test_an_outage_is_not_split_into_more_requests():
+    original = llmService._configure_gemini
+    try:
+        genai = FakeGenai(down=True)
+        llm = interface_with(genai)
+        embeddings = llm.get_embeddings([f"note {i}" for i in range(150)], max_retries=2, retry_delay=0)
+        assert embeddings.shape == (150, llmService.EMBEDDING_DIM) and not embeddings.any()
+        # Each batch of 100 and 50 gets its first try and two retries, then zero rows
+        assert genai.calls == [(100, "retrieval_document")] * 3 + [(50, "retrieval_document")] * 3
+    finally:
+        llmService._configure_gemini = original
+
+
+def test_rag_embeds_documents_in_batches_and_queries_as_queries():
+    original = llmService._configure_gemini
+    try:
+        genai = FakeGenai()
+        llm = interface_with(genai)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "store.json")
+            rag = RAGProcessor(persistence_path=path, llm_interface=llm)
+            ids = rag.store_many([f"note {i}" for i in range(30)] + ["poison"])
+            assert ids[-1] is None and all(ids[:-1])
+            assert genai.calls[0] == (31, "retrieval_document")
+
+            top = rag.retrieve("note 3", n_results=1)[0]
+            assert top["text"] == "note 3" and abs(top["score"] - 1.0) < 1e-5
+            assert genai.calls[-1] == (1, "retrieval_query")
+
+            # Stored vectors read back as the same float32 values
+            reloaded = RAGProcessor(persistence_path=path, llm_interface=llm)
+            stored = np.array(reloaded.documents[3]["embedding"], dtype=np.float32)
+            assert np.array_equal(stored, llm.get_embeddings(["note 3"])[0])
+            rag.delete([ids[3]])
+            assert rag.retrieve("note 3", n_results=1)[0]["text"] != "note 3"
+    finally:
+        llmService._configure_gemini = original
+
+
+if __name__ == "__main__":
+    test_batches_retry_only_the_failed_batch()
+    test_a_bad_text_only_loses_its_own_row()
+    test_an_outage_is_not_split_into_more_requests()
+    test_rag_embeds_documents_in_batches_and_queries_as_queries()
+    print("✅ All embedding checks passed")
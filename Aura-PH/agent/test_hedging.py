@@ -0,0 +1,87 @@
+"""
+Offline checks for hedged LLM requests.
+
+Usage:
+    python test_hedging.py
+"""
+
+import os
+import time
+import importlib.util
+
+from mockLlmServer import MockLLMServer
+from services.hedging import HedgePolicy, race
+
+
+def test_policy_delay_and_budget():
+    policy = HedgePolicy(percentile=90, budget=0.25, min_delay=0.05, max_delay=1.0, default_delay=0.5,
+                         min_samples=10)
+    assert policy.delay() == 0.5
+    for i in range(1, 11):
+        policy.record_ttft(i / 10)
+    assert policy.delay() == 1.0  # p90 of 0.1..1.0, within max_delay
+    policy.record_ttft(30.0)
+    assert policy.delay() == 1.0  # clamped
+
+    hedged = 0
+    for _ in range(40):
+        policy.started()
+        hedged += policy.try_hedge()
+    # One credit up front, then a quarter credit per call
+    assert hedged == 10, hedged
+    assert policy.stats["calls"] == 40 and policy.stats["denied"] == 30
+
+
+def test_race_takes_the_first_finisher_and_cancels_the_other():
+    def run(attempt):
+        delay = {"slow": 2.0, "fast": 0.05}[attempt.label]
+        if attempt.cancelled.wait(delay):
+            return "cancelled"
+        attempt.first_token()
+        return attempt.label
+
+    policy = HedgePolicy(default_delay=0.1)
+    started = time.perf_counter()
+    winner = race(run, ["slow", "fast"], policy)
+    assert winner.result == "fast" and time.perf_counter() - started < 1.0
+    assert policy.stats["hedges"] == 1 and policy.stats["hedge_wins"] == 1
+
+    # A primary that starts streaming in time is never duplicated
+    winner = race(run, ["fast", "slow"], policy)
+    assert winner.result == "fast" and policy.stats["hedges"] == 1
+
+    # Without budget the slow primary is simply awaited
+    broke = HedgePolicy(default_delay=0.05, budget=0.0, burst=0.0)
+    assert race(run, ["slow", "fast"], broke).result == "slow"
+    assert broke.stats["denied"] == 1
+
+
+def test_llm_interface_hedges_a_slow_key():
+    if importlib.util.find_spec("openai") is None:
+        print("⚠️ openai not installed; skipping the end-to-end hedging check")
+        return
+
+    from services.llmService import LLMInterface
+
+    os.environ.setdefault("GOOGLE_GEMINI_API_KEY", "mock-gemini")
+    mock = MockLLMServer(port=0, key_latency={"slow-key": 3.0}).start()
+    try:
+        llm = LLMInterface(base_url=mock.url, hedge=HedgePolicy(default_delay=0.2))
+        llm.nvapi_keys = ["slow-key", "fast-key"]
+        started = time.perf_counter()
+        text, usage = llm.nvidiaResponse("Say hi", model="meta/llama-3.1-8b-instruct", return_usage=True)
+        elapsed = time.perf_counter() - started
+    finally:
+        mock.close()
+
+    assert text and usage["key_index"] == 1, usage
+    assert elapsed < 2.0, elapsed
+    assert llm.hedge.stats["hedge_wins"] == 1
+    assert mock.stats["requests"] == 2
+
+
+if __name__ == "__main__":
+    test_policy_delay_and_budget()
+    test_race_takes_the_first_finisher_and_cancels_the_other()
+    test_llm_interface_hedges_a_slow_key()
+    print("✅ All hedging checks passed")
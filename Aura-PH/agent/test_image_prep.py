@@ -0,0 +1,92 @@
+"""
+Offline checks for Gemini image preparation.
+
+Usage:
+    python test_image_prep.py
+"""
+
+import os
+import tempfile
+import importlib.util
+
+from services import imagePrep
+
+
+def make_photo(path, size=(4000, 3000), orientation=None):
+    from PIL import Image
+
+    image = Image.linear_gradient("L").resize(size).convert("RGB")
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    image.save(path, format="JPEG", quality=95, exif=exif)
+
+
+class FakeGenai:
+    def __init__(self):
+        self.uploads = []
+
+    def upload_file(self, data, mime_type=None, display_name=None):
+        self.uploads.append((len(data.read()), mime_type))
+        return f"files/{len(self.uploads)}"
+
+
+def test_prepare_downsamples_rotates_and_caches():
+    if importlib.util.find_spec("PIL") is None:
+        print("⚠️ Pillow not installed; skipping the image preparation check")
+        return
+    imagePrep.reset()
+    with tempfile.TemporaryDirectory() as tmp:
+        photo = os.path.join(tmp, "report.jpg")
+        make_photo(photo, orientation=6)  # stored landscape, shown portrait
+
+        prepared = imagePrep.prepare_image(photo, cache_dir=os.path.join(tmp, "cache"))
+        assert (prepared.width, prepared.height) == (1152, 1536)
+        assert prepared.mime_type == "image/jpeg"
+        assert len(prepared.data) < prepared.source_bytes
+        assert imagePrep.prepare_image(photo, cache_dir=os.path.join(tmp, "cache")) is prepared
+
+        # A new process (empty memory cache) reads the prepared bytes from disk
+        imagePrep.reset()
+        again = imagePrep.prepare_image(photo, cache_dir=os.path.join(tmp, "cache"))
+        assert again.data == prepared.data and again.height == 1536
+
+        webp = imagePrep.prepare_image(photo, max_edge=512, fmt="WEBP", cache_dir="")
+        assert webp.mime_type == "image/webp" and max(webp.width, webp.height) == 512
+
+
+def test_repeated_images_are_uploaded_once():
+    if importlib.util.find_spec("PIL") is None:
+        print("⚠️ Pillow not installed; skipping the upload check")
+        return
+    imagePrep.reset()
+    with tempfile.TemporaryDirectory() as tmp:
+        photo = os.path.join(tmp, "report.jpg")
+        make_photo(photo, size=(800, 600))
+        prepared = imagePrep.prepare_image(photo, cache_dir="")
+        genai = FakeGenai()
+
+        first = imagePrep.image_part(genai, prepared)
+        assert first["mime_type"] == "image/jpeg" and genai.uploads == []
+        assert imagePrep.image_part(genai, prepared) == "files/1"
+        assert imagePrep.image_part(genai, prepared) == "files/1"
+        assert genai.uploads == [(len(prepared.data), "image/jpeg")]
+
+        # Another size or format of the same file is counted and uploaded separately
+        webp = imagePrep.prepare_image(photo, max_edge=256, fmt="WEBP", cache_dir="")
+        assert isinstance(imagePrep.image_part(genai, webp), dict)
+        assert imagePrep.image_part(genai, webp) == "files/2"
+        assert genai.uploads[1] == (len(webp.data), "image/webp")
+        assert imagePrep.image_part(genai, prepared) == "files/1"
+
+        # SDKs without the Files API keep sending the image inline
+        imagePrep.reset()
+        assert isinstance(imagePrep.image_part(object(), prepared), dict)
+        assert isinstance(imagePrep.image_part(object(), prepared), dict)
+    imagePrep.reset()
+
+
+if __name__ == "__main__":
+    test_prepare_downsamples_rotates_and_caches()
+    test_repeated_images_are_uploaded_once()
+    print("✅ All image preparation checks passed")
@@ -0,0 +1,129 @@
+"""
+Offline checks for the metrics layer and the spans around LLM and RAG calls.
+
+Usage:
+    python test_metrics.py
+"""
+
+import os
+import json
+import time
+import tempfile
+import importlib.util
+import urllib.request
+
+from services import metrics
+from mockLlmServer import MockLLMServer
+from ragBenchmark import FakeEmbedder
+from ragProcessor.rag import RAGProcessor
+
+
+def counter(name, **labels):
+    return sum(item["value"] for item in metrics.snapshot()["counters"]
+               if item["name"] == name and all(item["labels"].get(k) == str(v) for k, v in labels.items()))
+
+
+def spans(name, **labels):
+    return [item for item in metrics.snapshot()["histograms"]
+            if item["labels"].get("span") == name and all(item["labels"].get(k) == str(v) for k, v in labels.items())]
+
+
+def test_disabled_is_a_cheap_no_op():
+    metrics.disable()
+    metrics.reset()
+    started = time.perf_counter()
+    for _ in range(100000):
+        with metrics.span("hot.path", model="m") as span:
+            span.add(tokens_in=10)
+        metrics.count("cache_hits", cache="c")
+    elapsed = time.perf_counter() - started
+    assert metrics.snapshot() == {"counters": [], "histograms": []}
+    assert elapsed < 0.5, elapsed
+
+
+def test_spans_export_prometheus_text_and_json_logs():
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "metrics.jsonl")
+        metrics.enable(json_log=log_path)
+        metrics.reset()
+        server = None
+        try:
+            with metrics.span("llm.nvidia", model="small") as span:
+                span.label(key_index=1)
+                span.add(tokens_in=100, tokens_out=20, retries=1)
+            try:
+                with metrics.span("task.parse", task="processTasks"):
+                    raise ValueError("bad JSON")
+            except ValueError:
+                pass
+            metrics.count("cache_hits", cache="notion_users")
+
+            assert counter("aura_tokens_in_total", span="llm.nvidia", key_index=1, model="small") == 100
+            assert counter("aura_retries_total", span="llm.nvidia") == 1
+            assert spans("task.parse", status="error")[0]["count"] == 1
+
+            text = metrics.render_prometheus()
+            assert "# TYPE aura_span_duration_seconds histogram" in text
+            assert 'aura_cache_hits_total{cache="notion_users"} 1' in text
+            assert 'aura_span_duration_seconds_count{key_index="1",model="small",span="llm.nvidia",status="ok"} 1' in text
+
+            server = metrics.serve_metrics(port=0)
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5) as response:
+                assert response.read().decode("utf-8") == metrics.render_prometheus()
+
+            with open(log_path, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+            assert [record["span"] for record in records] == ["llm.nvidia", "task.parse"]
+            assert records[0]["tokens_out"] == 20 and records[0]["key_index"] == 1
+            assert records[1]["status"] == "error" and "bad JSON" in records[1]["error"]
+        finally:
+            if server:
+                server.shutdown()
+            metrics.enable(json_log="")
+            metrics.disable()
+            metrics.reset()
+
+
+def test_rag_and_task_processor_record_spans():
+    metrics.enable()
+    metrics.reset()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            rag = RAGProcessor(persistence_path=os.path.join(tmp, "store.json"), llm_interface=FakeEmbedder(dim=16))
+            rag.store_many(["deep coding in the morning", "gym in the evening"])
+            rag.retrieve("coding")
+            RAGProcessor(persistence_path=os.path.join(tmp, "store.json"), llm_interface=FakeEmbedder(dim=16))
+        assert counter("aura_documents_total", span="rag.retrieve") == 2
+        assert counter("aura_bytes_in_total", span="rag.load") > 0
+        assert spans("rag.save")[0]["count"] == 1
+
+        if importlib.util.find_spec("openai") is None:
+            print("⚠️ openai not installed; skipping the taskProcessor span check")
+            return
+
+        from services.llmService import LLMInterface
+        from services.promptProcessor import taskProcessor
+        from services.modelRouter import SMALL_MODEL
+
+        os.environ.setdefault("GOOGLE_GEMINI_API_KEY", "mock-gemini")
+        mock = MockLLMServer(port=0).start()
+        try:
+            llm = LLMInterface(base_url=mock.url)
+            llm.nvapi_keys = ["only-key"]
+            taskProcessor(llm_interface=llm).processTasks({"tasks": [{"title": "Write report"}]})
+        finally:
+            mock.close()
+        assert counter("aura_tokens_in_total", span="llm.nvidia", model=SMALL_MODEL, key_index=0) > 0
+        assert counter("aura_tokens_out_total", span="llm.nvidia") > 0
+        assert spans("task.parse", task="processTasks", status="ok")
+        assert spans("task.analyze", task="processTasks", status="ok")
+    finally:
+        metrics.disable()
+        metrics.reset()
+
+
+if __name__ == "__main__":
+    test_disabled_is_a_cheap_no_op()
+    test_spans_export_prometheus_text_and_json_logs()
+    test_rag_and_task_processor_record_spans()
+    print("✅ All metrics checks passed")
@@ -0,0 +1,109 @@
+"""
+Offline checks for the mock LLM server and taskProcessor against it.
+
+Usage:
+    python test_mock_llm_server.py
+"""
+
+import os
+import json
+import importlib.util
+import urllib.error
+import urllib.request
+
+from mockLlmServer import MockLLMServer
+from services.prompt import taskAnalyzerPrompts
+from services.promptProcessor import extract_json_from_llm_response
+
+TASKS = [{"title": "Debug Flask login API issue"}, {"title": "Go for gym workout"}]
+
+
+def post_chat(url: str, prompt: str, stream: bool, api_key: str = "k1"):
+    body = json.dumps({"model": "mock", "stream": stream,
+                       "messages": [{"role": "user", "content": prompt}]}).encode("utf-8")
+    request = urllib.request.Request(url + "/chat/completions", data=body, method="POST",
+                                     headers={"Content-Type": "application/json",
+                                              "Authorization": f"Bearer {api_key}"})
+    return urllib.request.urlopen(request, timeout=5)
+
+
+def read_stream(response):
+    """Content and finish_reason from an SSE chat completion."""
+    chunks, finish = [], None
+    for raw in response:
+        line = raw.decode("utf-8").strip()
+        if not line.startswith("data: ") or line == "data: [DONE]":
+            continue
+        choice = json.loads(line[6:])["choices"][0]
+        chunks.append(choice["delta"].get("content") or "")
+        finish = choice["finish_reason"] or finish
+    return chunks, finish
+
+
+def test_streams_canned_json_in_chunks():
+    mock = MockLLMServer(port=0, chunk_chars=8).start()
+    try:
+        prompt = taskAnalyzerPrompts().tastCategorizer({"tasks": TASKS})
+        with post_chat(mock.url, prompt, stream=True) as response:
+            assert response.headers["Content-Type"] == "text/event-stream"
+            chunks, finish = read_stream(response)
+        assert finish == "stop"
+        assert all(len(chunk) <= 8 for chunk in chunks) and len(chunks) > 5
+        parsed = extract_json_from_llm_response("".join(chunks))
+        assert [item["task"] for item in parsed] == ["Debug Flask login API issue", "Go for gym workout"]
+
+        with post_chat(mock.url, taskAnalyzerPrompts().screenTimeAnalyzerPrompt({}), stream=False) as response:
+            message = json.load(response)["choices"][0]["message"]["content"]
+        assert "overall_verdict" in extract_json_from_llm_response(message)
+    finally:
+        mock.close()
+
+
+def test_injects_rate_limits_and_truncation():
+    mock = MockLLMServer(port=0, rate_limited_keys=["bad-key"], truncate_rate=1.0).start()
+    try:
+        prompt = taskAnalyzerPrompts().screenTimeAnalyzerPrompt({})
+        try:
+            post_chat(mock.url, prompt, stream=True, api_key="bad-key")
+            assert False, "expected 429"
+        except urllib.error.HTTPError as e:
+            assert e.code == 429
+
+        with post_chat(mock.url, prompt, stream=True, api_key="good-key") as response:
+            chunks, finish = read_stream(response)
+        assert finish == "length"
+        try:
+            extract_json_from_llm_response("".join(chunks))
+            assert False, "truncated JSON should not parse"
+        except ValueError:
+            pass
+        assert mock.stats == {"connections": 2, "requests": 2, "rate_limited": 1, "truncated": 1, "completed": 1}
+    finally:
+        mock.close()
+
+
+def test_task_processor_rotates_keys_through_mock():
+    if importlib.util.find_spec("openai") is None:
+        print("⚠️ openai not installed; skipping the end-to-end taskProcessor check")
+        return
+
+    from services.llmService import LLMInterface
+    from services.promptProcessor import taskProcessor
+
+    os.environ.setdefault("GOOGLE_GEMINI_API_KEY", "mock-gemini")
+    mock = MockLLMServer(port=0, rate_limited_keys=["first"]).start()
+    try:
+        llm = LLMInterface(base_url=mock.url)
+        llm.nvapi_keys = ["first", "second"]
+        result = taskProcessor(llm_interface=llm).processTasks({"tasks": TASKS})
+        assert [item["task"] for item in result] == ["Debug Flask login API issue", "Go for gym workout"]
+        assert llm.current_key_index == 1
+    finally:
+        mock.close()
+
+
+if __name__ == "__main__":
+    test_streams_canned_json_in_chunks()
+    test_injects_rate_limits_and_truncation()
+    test_task_processor_rotates_keys_through_mock()
+    print("✅ All mock LLM server checks passed")
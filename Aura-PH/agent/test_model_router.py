@@ -0,0 +1,117 @@
+"""
+Offline checks for usage accounting and cost-aware model routing.
+
+Usage:
+    python test_model_router.py
+"""
+
+import os
+import json
+import tempfile
+import importlib.util
+
+from mockLlmServer import MockLLMServer, canned_reply
+from services.usageLedger import UsageLedger
+from services.modelRouter import ModelRouter, SMALL_MODEL, MEDIUM_MODEL, DEFAULT_MAX_TOKENS
+
+
+class ScriptedLLM:
+    """Stands in for LLMInterface: per-model replies and finish reasons, recording every call"""
+
+    def __init__(self, replies, finish_reasons=None):
+        self.usage = UsageLedger()
+        self.replies = replies
+        self.finish_reasons = finish_reasons or {}
+        self.calls = []
+
+    def nvidiaResponse(self, prompt, model, max_tokens=4096, prompt_type=None, return_usage=False, **kwargs):
+        self.calls.append((model, max_tokens))
+        text = self.replies[model] if model in self.replies else canned_reply(prompt)
+        usage = {"model": model, "prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4,
+                 "finish_reason": self.finish_reasons.get(model, "stop"), "latency": 0.01}
+        self.usage.record(model, usage["prompt_tokens"], usage["completion_tokens"], usage["latency"],
+                          prompt_type=prompt_type, finish_reason=usage["finish_reason"])
+        return (text, usage) if return_usage else text
+
+
+def test_max_tokens_follow_observed_completion_sizes():
+    ledger = UsageLedger()
+    router = ModelRouter(ledger=ledger)
+    assert router.max_tokens_for("processTasks") == DEFAULT_MAX_TOKENS["processTasks"]
+
+    for size in (120, 150, 180, 200, 200):
+        ledger.record(SMALL_MODEL, 400, size, 0.2, prompt_type="processTasks")
+    # Truncated and failed replies say nothing about the size a full answer needs
+    ledger.record(SMALL_MODEL, 400, 4000, 0.2, prompt_type="processTasks", finish_reason="length")
+    ledger.record(SMALL_MODEL, 400, 0, 0.2, ok=False, prompt_type="processTasks")
+    assert router.max_tokens_for("processTasks") == int(200 * 1.5) + 64
+
+    summary = ledger.summary()
+    small = summary["models"][SMALL_MODEL]
+    assert small["calls"] == 7 and small["errors"] == 1 and small["truncated"] == 1
+    assert small["prompt_tokens"] == 2800 and small["latency_ms"]["p50"] == 200.0
+    assert summary["completion_tokens_by_prompt_type"]["processTasks"]["samples"] == 5
+
+    with tempfile.TemporaryDirectory() as tmp:
+        state_path = os.path.join(tmp, "router.json")
+        ModelRouter(ledger=ledger, state_path=state_path).save_state()
+        restored = ModelRouter(state_path=state_path)
+        assert restored.max_tokens_for("processTasks") == router.max_tokens_for("processTasks")
+
+
+def test_invalid_reply_escalates_to_the_next_model():
+    from services.promptProcessor import taskProcessor
+
+    llm = ScriptedLLM(replies={SMALL_MODEL: '[{"task": "Write report"}]'})
+    processor = taskProcessor(llm_interface=llm)
+    result = processor.processTasks({"tasks": [{"title": "Write report"}]})
+    assert result[0]["task"] == "Write report" and "category" in result[0]
+    assert [model for model, _ in llm.calls] == [SMALL_MODEL, MEDIUM_MODEL]
+    assert processor.router.escalations == {"processTasks": 1}
+
+    # A truncated reply is retried with twice the budget
+    llm = ScriptedLLM(replies={SMALL_MODEL: '[{"task": "Wri'}, finish_reasons={SMALL_MODEL: "length"})
+    taskProcessor(llm_interface=llm).processTasks({"tasks": [{"title": "Write report"}]})
+    assert llm.calls[1][1] == 2 * llm.calls[0][1]
+
+    # Every model failing surfaces the last validation error
+    llm = ScriptedLLM(replies={model: "not json" for model in ModelRouter().models_for("processTasks")})
+    try:
+        taskProcessor(llm_interface=llm).processTasks({"tasks": [{"title": "Write report"}]})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError when every model fails")
+
+
+def test_llm_interface_records_usage_from_the_mock():
+    if importlib.util.find_spec("openai") is None:
+        print("⚠️ openai not installed; skipping the end-to-end usage check")
+        return
+
+    from services.llmService import LLMInterface
+    from services.promptProcessor import taskProcessor
+
+    os.environ.setdefault("GOOGLE_GEMINI_API_KEY", "mock-gemini")
+    mock = MockLLMServer(port=0).start()
+    try:
+        llm = LLMInterface(base_url=mock.url)
+        llm.nvapi_keys = ["only-key"]
+        taskProcessor(llm_interface=llm).processTasks({"tasks": [{"title": "Write report"}]})
+        text, usage = llm.nvidiaResponse("Say hi", model=MEDIUM_MODEL, return_usage=True)
+    finally:
+        mock.close()
+
+    assert text and usage["finish_reason"] == "stop" and usage["completion_tokens"] > 0
+    summary = llm.usage.summary()
+    assert summary["models"][SMALL_MODEL]["calls"] == 1
+    assert summary["models"][SMALL_MODEL]["prompt_tokens"] > 0
+    assert summary["completion_tokens_by_prompt_type"]["processTasks"]["samples"] == 1
+    json.dumps(summary)
+
+
+if __name__ == "__main__":
+    test_max_tokens_follow_observed_completion_sizes()
+    test_invalid_reply_escalates_to_the_next_model()
+    test_llm_interface_records_usage_from_the_mock()
+    print("✅ All model router checks passed")
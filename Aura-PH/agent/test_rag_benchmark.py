@@ -0,0 +1,42 @@
+"""
+Offline smoke check for the RAG benchmark harness (no API key needed).
+
+Usage:
+    python test_rag_benchmark.py
+"""
+
+import json
+
+from ragBenchmark import FakeEmbedder, run_benchmark, synthetic_texts
+from ragProcessor.rag import RAGProcessor
+
+
+def test_fake_embedder_and_corpus_are_deterministic():
+    embedder = FakeEmbedder(dim=32)
+    assert embedder.get_embedding("coding in the morning") == FakeEmbedder(dim=32).get_embedding("coding in the morning")
+    assert synthetic_texts(5) == synthetic_texts(5)
+
+
+def test_report_is_json_with_all_metrics(tmp_path):
+    rag = RAGProcessor(persistence_path=str(tmp_path / "store.json"), llm_interface=FakeEmbedder(dim=32))
+    rag.store_many(["user prefers deep coding in the morning", "blood pressure report from the doctor"])
+    assert rag.retrieve("coding morning", n_results=1)[0]["text"].startswith("user prefers")
+
+    report = json.loads(json.dumps(run_benchmark([50, 100], dim=16, queries=3, single_stores=2,
+                                                 workdir=str(tmp_path / "bench"))))
+    assert [result["documents"] for result in report["results"]] == [50, 100]
+    for result in report["results"]:
+        assert result["build"]["docs_per_sec"] > 0 and result["load"]["seconds"] >= 0
+        assert result["retrieve_ms"]["p50"] <= result["retrieve_ms"]["p99"]
+        assert result["store"]["calls"] == 2
+        assert result["disk_bytes"] > 0 and result["memory_bytes"]["per_document"] > 0
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_fake_embedder_and_corpus_are_deterministic()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_report_is_json_with_all_metrics(Path(tmp))
+    print("✅ All RAG benchmark checks passed")
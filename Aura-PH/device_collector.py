@@ -0,0 +1,304 @@
+"""
+Concurrent screen-time collection from every attached Android device.
+
+One `adb track-devices` stream reports devices as they are plugged in and
+out (no `adb devices` polling). Each device in the "device" state gets an
+asyncio task that runs the same event-driven sampling as DeviceSampler
+(sharing its command framing and parsing), using asyncio subprocesses: one persistent `adb -s SERIAL shell` for
+multiplexed queries and one `adb -s SERIAL shell logcat -b events` stream.
+N devices therefore cost 2N+1 long-lived adb processes and no per-tick
+process launches.
+
+Every device writes its own timeline (see screen_timeline) under
+OUTPUT_DIR/<serial>/, and prints a JSON summary line when it disconnects.
+With --snapshot-port, today's running totals per device are served at
+http://127.0.0.1:PORT/snapshot?serial=SERIAL (see screen_aggregator).
+
+Usage:
+    python device_collector.py --output screen_timeline [--snapshot-port 8767]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from datetime import date
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Union
+
+from device_sampler import (
+    ADB_PATH, BATTERY_QUERY, DEVICE_TIME_QUERY, AdbError, BaseSampler, MarkedOutput, adb_command,
+    events_command, frame_commands, parse_battery_level, parse_device_epoch,
+)
+from screen_aggregator import ScreenTimeAggregator, serve_snapshots
+from screen_timeline import TimelineRecorder, read_timeline
+
+
+def serial_directory(output_dir: str, serial: str) -> str:
+    """Per-device directory (network serials like 192.168.1.5:5555 are made path-safe)."""
+    return os.path.join(output_dir, re.sub(r"[^\w.-]", "_", serial))
+
+
+async def track_devices(adb_path: Union[str, Sequence[str]] = ADB_PATH) -> AsyncIterator[Dict[str, str]]:
+    """
+    Yield {serial: state} every time the set of attached devices changes.
+
+    Wraps `adb track-devices`, whose messages are a 4-digit hex length
+    followed by "serial<TAB>state" lines. Ends when the adb server goes away.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *adb_command(adb_path), "track-devices",
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                length = int((await process.stdout.readexactly(4)).decode("ascii"), 16)
+                payload = (await process.stdout.readexactly(length)).decode("utf-8") if length else ""
+            except (asyncio.IncompleteReadError, ValueError):
+                return
+            devices = {}
+            for line in payload.splitlines():
+                if "\t" in line:
+                    serial, state = line.split("\t", 1)
+                    devices[serial.strip()] = state.strip()
+            yield devices
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+
+class AsyncAdbShell:
+    """asyncio version of AdbShell: one `adb shell` session running many commands"""
+
+    def __init__(self, adb_path: Union[str, Sequence[str]] = ADB_PATH, serial: Optional[str] = None,
+                 timeout: float = 10.0):
+        self.adb_path = adb_path
+        self.serial = serial
+        self.timeout = timeout
+        self.process = None
+        self._marker = f"__AURA_{uuid.uuid4().hex[:8]}__"
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            *adb_command(self.adb_path, self.serial), "shell",
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+
+    async def run_many(self, commands: Sequence[str]) -> List[str]:
+        """Run several commands in one round trip; raises AdbError if the session ends."""
+        async with self._lock:
+            try:
+                self.process.stdin.write(frame_commands(commands, self._marker).encode("utf-8"))
+                await self.process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError, RuntimeError):
+                raise AdbError("adb shell session is closed")
+
+            output = MarkedOutput(self._marker, len(commands))
+            try:
+                while not output.done:
+                    raw = await asyncio.wait_for(self.process.stdout.readline(), self.timeout)
+                    if not raw:
+                        raise AdbError("adb shell session ended")
+                    output.feed(raw.decode("utf-8", "replace"))
+            except asyncio.TimeoutError:
+                raise AdbError(f"adb shell did not answer within {self.timeout}s")
+            return output.outputs
+
+    async def run(self, command: str) -> str:
+        return (await self.run_many([command]))[0]
+
+    async def close(self):
+        if self.process is None or self.process.returncode is not None:
+            return
+        try:
+            self.process.stdin.write(b"exit\n")
+            await self.process.stdin.drain()
+            await asyncio.wait_for(self.process.wait(), 2)
+        except (BrokenPipeError, ConnectionResetError, RuntimeError, asyncio.TimeoutError):
+            self.process.kill()
+            await self.process.wait()
+
+
+class AsyncDeviceSampler(BaseSampler):
+    """asyncio transport for BaseSampler: one device over an AsyncAdbShell and an events stream"""
+
+    def __init__(self, adb_path: Union[str, Sequence[str]], serial: str, battery_interval: float = 60.0,
+                 poll_interval: float = 2.0, use_events: bool = True,
+                 clock: Callable[[], float] = time.monotonic,
+                 on_change: Optional[Callable[[str, object], None]] = None):
+        super().__init__(adb_path, serial, battery_interval, poll_interval, use_events, clock, on_change)
+        self.shell = AsyncAdbShell(adb_path, serial)
+        self._events = None
+
+    async def _query_state(self, include_battery: bool):
+        self._apply_state(await self.shell.run_many(self._state_commands(include_battery)))
+
+    async def _follow_events(self):
+        self._events = await asyncio.create_subprocess_exec(
+            *events_command(self.adb_path, self.serial),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+        )
+        async for raw in self._events.stdout:
+            self._apply_event(raw.decode("utf-8", "replace"))
+
+    async def _sample_periodically(self):
+        next_battery = time.monotonic() + self.battery_interval
+        while True:
+            await asyncio.sleep(self.poll_interval if not self.use_events else self.battery_interval)
+            due = time.monotonic() >= next_battery
+            if not self.use_events:
+                await self._query_state(include_battery=due)
+            elif due:
+                self._apply("battery", parse_battery_level(await self.shell.run(BATTERY_QUERY)))
+            if due:
+                next_battery = time.monotonic() + self.battery_interval
+
+    async def run(self) -> dict:
+        """Sample until the device disconnects (or the task is cancelled); returns the summary."""
+        await self.shell.start()
+        try:
+            self._device_start_epoch = parse_device_epoch(await self.shell.run(DEVICE_TIME_QUERY))
+            await self._query_state(include_battery=True)
+
+            tasks = [asyncio.ensure_future(self._sample_periodically())]
+            if self.use_events:
+                tasks.append(asyncio.ensure_future(self._follow_events()))
+            try:
+                # The event stream ends, or a shell query fails, when the device goes away
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() and not isinstance(task.exception(), AdbError):
+                        raise task.exception()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except AdbError:
+            pass
+        finally:
+            if self._events is not None and self._events.returncode is None:
+                self._events.kill()
+                await self._events.wait()
+            await self.shell.close()
+        return self.tracker.summary()
+
+
+class DeviceCollector:
+    """Runs one AsyncDeviceSampler per attached device, following hot-plug events"""
+
+    def __init__(self, adb_path: Union[str, Sequence[str]] = ADB_PATH, output_dir: str = "screen_timeline",
+                 battery_interval: float = 60.0, use_events: bool = True,
+                 on_summary: Optional[Callable[[str, dict], None]] = None,
+                 snapshot_port: Optional[int] = None):
+        """
+        Args:
+            adb_path: adb executable (or a command list, e.g. a fake adb for tests)
+            output_dir: Per-device timelines are written to output_dir/<serial>/
+            battery_interval: Seconds between battery reads on each device
+            use_events: Follow each device's event log; False polls through the shell
+            on_summary: Called with (serial, summary) when a device disconnects
+            snapshot_port: Serve today's running totals per device on this local port
+        """
+        self.adb_path = adb_path
+        self.output_dir = output_dir
+        self.battery_interval = battery_interval
+        self.use_events = use_events
+        self.on_summary = on_summary or self._print_summary
+        self.snapshot_port = snapshot_port
+        # Kept after a device disconnects so its totals for today stay queryable
+        self.aggregators: Dict[str, ScreenTimeAggregator] = {}
+        self.samplers: Dict[str, AsyncDeviceSampler] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def _print_summary(serial: str, summary: dict):
+        print(json.dumps({"serial": serial, **summary}), flush=True)
+
+    def _aggregator(self, serial: str) -> ScreenTimeAggregator:
+        if serial not in self.aggregators:
+            aggregator = ScreenTimeAggregator()
+            aggregator.replay(read_timeline(serial_directory(self.output_dir, serial), date.today()))
+            self.aggregators[serial] = aggregator
+        return self.aggregators[serial]
+
+    async def _sample_device(self, serial: str):
+        recorder = TimelineRecorder(serial_directory(self.output_dir, serial))
+        aggregator = self._aggregator(serial)
+
+        def on_change(kind, value):
+            recorder.on_change(kind, value)
+            aggregator.on_change(kind, value)
+
+        sampler = AsyncDeviceSampler(self.adb_path, serial, battery_interval=self.battery_interval,
+                                     use_events=self.use_events, on_change=on_change)
+        self.samplers[serial] = sampler
+        try:
+            await sampler.run()
+        finally:
+            recorder.close()
+            aggregator.mark_stopped()
+            self.samplers.pop(serial, None)
+            self.tasks.pop(serial, None)
+            self.on_summary(serial, sampler.tracker.summary())
+
+    def _start(self, serial: str):
+        if serial not in self.tasks:
+            self.tasks[serial] = asyncio.ensure_future(self._sample_device(serial))
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """Collect until stop is set (or the adb server exits)."""
+        stop = stop or asyncio.Event()
+
+        async def follow_hotplug():
+            async for devices in track_devices(self.adb_path):
+                for serial, state in devices.items():
+                    if state == "device":
+                        self._start(serial)
+                # A sampler whose device is gone finishes by itself when its adb processes end
+
+        server = serve_snapshots(self.aggregators, port=self.snapshot_port) if self.snapshot_port else None
+        tracker = asyncio.ensure_future(follow_hotplug())
+        stopper = asyncio.ensure_future(stop.wait())
+        try:
+            await asyncio.wait([tracker, stopper], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (tracker, stopper):
+                task.cancel()
+            await asyncio.gather(tracker, stopper, return_exceptions=True)
+            tasks = list(self.tasks.values())
+            if stop.is_set():
+                for task in tasks:
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if server is not None:
+                server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect screen-time from every attached Android device")
+    parser.add_argument("--output", default=os.getenv("TIMELINE_DIR", "screen_timeline"),
+                        help="Directory for per-device timelines (default: TIMELINE_DIR or ./screen_timeline)")
+    parser.add_argument("--battery-interval", type=float, default=60.0)
+    parser.add_argument("--poll", action="store_true",
+                        help="Poll screen/foreground state through the shell instead of the event log")
+    parser.add_argument("--snapshot-port", type=int, default=None,
+                        help="Serve today's running totals per device on this local port")
+    args = parser.parse_args()
+
+    collector = DeviceCollector(ADB_PATH, args.output, args.battery_interval, use_events=not args.poll,
+                                snapshot_port=args.snapshot_port)
+    try:
+        asyncio.run(collector.run())
+    except KeyboardInterrupt:
+        print("Stopped", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+"""
+Event-driven Android usage sampler over adb.
+
+Instead of launching a new `adb shell dumpsys ...` process for every query
+every 2 seconds, the sampler keeps two long-lived adb processes per device:
+
+  - one interactive `adb shell`, through which queries are multiplexed
+    (each is filtered on the device with grep and terminated by an echo
+    marker, so only the relevant lines cross the USB link), and
+  - one `adb shell logcat -b events` stream that reports foreground
+    activity changes and screen on/off as they happen.
+
+Battery level is the only thing read periodically. Devices whose event log
+lacks those tags can use poll mode, which queries screen and foreground
+state through the persistent shell instead.
+
+The summary has the same shape script.py has always printed:
+    {"screen": {...}, "battery": {...}, "apps": {package: seconds}}
+"""
+
+import os
+import re
+import time
+import uuid
+import queue
+import threading
+import subprocess
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+
+ADB_PATH = os.getenv("ADB_PATH", "adb")
+
+POWER_QUERY = "dumpsys power | grep -E 'Display Power: state=|mWakefulness='"
+ACTIVITY_QUERY = "dumpsys activity activities | grep ResumedActivity"
+BATTERY_QUERY = "dumpsys battery | grep level:"
+DEVICE_TIME_QUERY = "date +%s"
+
+# Event log tags: foreground activity (Android 10+ and older) and screen state
+RESUMED_TAGS = ("wm_set_resumed_activity", "am_set_resumed_activity")
+SCREEN_TAG = "screen_toggled"
+
+# "1700000000.123  1000  1234 I wm_set_resumed_activity: [0,com.app/.Main,reason]"
+EVENT_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s+\d+\s+\d+\s+\w\s+([\w.]+)\s*:\s*(.*)$")
+
+
+class AdbError(Exception):
+    """Raised when the adb shell session ends or stops responding"""
+
+
+def adb_command(adb_path: Union[str, Sequence[str]], serial: Optional[str] = None) -> List[str]:
+    """Base adb command line; adb_path may also be a list (e.g. [python, fake_adb.py])."""
+    command = [adb_path] if isinstance(adb_path, str) else list(adb_path)
+    if serial:
+        command += ["-s", serial]
+    return command
+
+
+# ---------------- PARSING ----------------
+
+def parse_screen_on(power_output: str) -> bool:
+    return any(
+        "Display Power: state=ON" in line or "mWakefulness=Awake" in line
+        for line in power_output.splitlines()
+    )
+
+
+def parse_resumed_app(activity_output: str) -> Optional[str]:
+    resumed = [line for line in activity_output.splitlines() if "ResumedActivity" in line]
+    if resumed:
+        for part in resumed[0].split():
+            if "/" in part:
+                return part.split("/")[0]
+    return None
+
+
+def parse_battery_level(battery_output: str) -> Optional[int]:
+    for line in battery_output.splitlines():
+        if "level:" in line:
+            try:
+                return int(line.split(":")[1].strip())
+            except ValueError:
+                return None
+    return None
+
+
+def parse_device_epoch(date_output: str) -> float:
+    """Device clock from DEVICE_TIME_QUERY (0.0 if unreadable, so no event is dropped)"""
+    try:
+        return float(date_output.strip())
+    except ValueError:
+        return 0.0
+
+
+def parse_event(line: str) -> Optional[tuple]:
+    """
+    Parse one `logcat -b events -v epoch` line.
+
+    Returns:
+        (device_epoch, kind, value) where kind is "app" (value: package) or
+        "screen" (value: bool), or None for other lines
+    """
+    match = EVENT_RE.match(line)
+    if not match:
+        return None
+    epoch, tag, payload = float(match.group(1)), match.group(2), match.group(3).strip()
+
+    if tag in RESUMED_TAGS:
+        # [user, component, reason]; older releases omit the reason
+        fields = payload.strip("[]").split(",")
+        component = fields[1] if len(fields) > 1 else fields[0]
+        return epoch, "app", component.split("/")[0].strip() or None
+    if tag == SCREEN_TAG:
+        return epoch, "screen", payload.strip("[]").strip() == "1"
+    return None
+
+
+# ---------------- SHELL FRAMING ----------------
+
+def frame_commands(commands: Sequence[str], marker: str) -> str:
+    """Shell script running each command followed by an echo of marker+index"""
+    return "".join(f"{command}; echo {marker}{index}\n" for index, command in enumerate(commands))
+
+
+class MarkedOutput:
+    """Splits a shell's output lines into per-command outputs at the frame_commands markers"""
+
+    def __init__(self, marker: str, count: int):
+        self.marker = marker
+        self.count = count
+        self.outputs: List[str] = []
+        self._current: List[str] = []
+
+    @property
+    def done(self) -> bool:
+        return len(self.outputs) >= self.count
+
+    def feed(self, line: str):
+        line = line.rstrip("\r\n")
+        if line == f"{self.marker}{len(self.outputs)}":
+            self.outputs.append("\n".join(self._current))
+            self._current = []
+        else:
+            self._current.append(line)
+
+
+def events_command(adb_path: Union[str, Sequence[str]], serial: Optional[str] = None) -> List[str]:
+    """The `logcat -b events` command streaming foreground activity and screen changes"""
+    return adb_command(adb_path, serial) + ["shell", "logcat", "-b", "events", "-v", "epoch", "-T", "1",
+                                            "-s", *RESUMED_TAGS, SCREEN_TAG]
+
+
+# ---------------- PERSISTENT SHELL ----------------
+
+class AdbShell:
+    """One interactive `adb shell` session that runs many commands"""
+
+    def __init__(self, adb_path: Union[str, Sequence[str]] = ADB_PATH, serial: Optional[str] = None,
+                 timeout: float = 10.0):
+        self.timeout = timeout
+        self._marker = f"__AURA_{uuid.uuid4().hex[:8]}__"
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.process = subprocess.Popen(
+            adb_command(adb_path, serial) + ["shell"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, bufsize=1,
+        )
+        # A reader thread (rather than select) keeps timeouts working on Windows pipes too
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            self._lines.put(line.rstrip("\r\n"))
+        self._lines.put(None)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run_many(self, commands: Sequence[str]) -> List[str]:
+        """
+        Run several commands in one round trip and return each one's output.
+
+        Raises:
+            AdbError: the session ended (device disconnected) or timed out
+        """
+        with self._lock:
+            try:
+                self.process.stdin.write(frame_commands(commands, self._marker))
+                self.process.stdin.flush()
+            except (BrokenPipeError, OSError, ValueError):
+                raise AdbError("adb shell session is closed")
+
+            output = MarkedOutput(self._marker, len(commands))
+            deadline = time.monotonic() + self.timeout
+            while not output.done:
+                try:
+                    line = self._lines.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    raise AdbError(f"adb shell did not answer within {self.timeout}s")
+                if line is None:
+                    raise AdbError("adb shell session ended")
+                output.feed(line)
+            return output.outputs
+
+    def run(self, command: str) -> str:
+        return self.run_many([command])[0]
+
+    def close(self):
+        if self.alive:
+            try:
+                self.process.stdin.write("exit\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=2)
+            except (BrokenPipeError, OSError, ValueError, subprocess.TimeoutExpired):
+                self.process.kill()
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+# ---------------- USAGE ACCOUNTING ----------------
+
+class UsageTracker:
+    """Integrates screen and foreground-app time between state changes"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.screen_on = False
+        self.screen_on_seconds = 0.0
+        self.screen_off_seconds = 0.0
+        self.current_app = None
+        self.app_usage: Dict[str, float] = defaultdict(float)
+        self.battery_start = None
+        self.battery_end = None
+        self._screen_since = None
+        self._app_since = None
+        self._lock = threading.Lock()
+
+    def set_screen(self, on: bool, now: Optional[float] = None):
+        now = self.clock() if now is None else now
+        with self._lock:
+            if self._screen_since is not None:
+                elapsed = max(0.0, now - self._screen_since)
+                if self.screen_on:
+                    self.screen_on_seconds += elapsed
+                else:
+                    self.screen_off_seconds += elapsed
+            self.screen_on = on
+            self._screen_since = now
+
+    def set_app(self, app: Optional[str], now: Optional[float] = None):
+        now = self.clock() if now is None else now
+        with self._lock:
+            if app == self.current_app and self._app_since is not None:
+                return
+            if self.current_app and self._app_since is not None:
+                self.app_usage[self.current_app] += max(0.0, now - self._app_since)
+            self.current_app = app
+            self._app_since = now
+
+    def set_battery(self, level: Optional[int]):
+        if level is None:
+            return
+        with self._lock:
+            if self.battery_start is None:
+                self.battery_start = level
+            self.battery_end = level
+
+    def summary(self, now: Optional[float] = None) -> dict:
+        """Totals up to now (the open screen/app intervals are counted but not closed)."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            on, off = self.screen_on_seconds, self.screen_off_seconds
+            if self._screen_since is not None:
+                if self.screen_on:
+                    on += max(0.0, now - self._screen_since)
+                else:
+                    off += max(0.0, now - self._screen_since)
+            apps = dict(self.app_usage)
+            if self.current_app and self._app_since is not None:
+                apps[self.current_app] = apps.get(self.current_app, 0.0) + max(0.0, now - self._app_since)
+            start, end = self.battery_start, self.battery_end
+
+        return {
+            "screen": {
+                "on_seconds": int(on),
+                "off_seconds": int(off)
+            },
+            "battery": {
+                "start_percent": start,
+                "end_percent": end,
+                "drain_percent": start - end if start is not None and end is not None else None
+            },
+            "apps": {app: int(seconds) for app, seconds in apps.items()}
+        }
+
+
+# ---------------- SAMPLER ----------------
+
+class BaseSampler:
+    """
+    Usage accounting for one device, fed by query outputs and event lines.
+
+    DeviceSampler (threads) and AsyncDeviceSampler in device_collector (asyncio)
+    only differ in how they talk to adb; both go through these methods.
+    """
+
+    def __init__(self, adb_path: Union[str, Sequence[str]] = ADB_PATH, serial: Optional[str] = None,
+                 battery_interval: float = 60.0, poll_interval: float = 2.0, use_events: bool = True,
+                 clock: Callable[[], float] = time.monotonic,
+                 on_change: Optional[Callable[[str, object], None]] = None):
+        self.adb_path = adb_path
+        self.serial = serial
+        self.battery_interval = battery_interval
+        self.poll_interval = poll_interval
+        self.use_events = use_events
+        self.clock = clock
+        self.on_change = on_change
+        self.tracker = UsageTracker(clock)
+        self._device_start_epoch = 0.0
+
+    def _apply(self, kind: str, value, now: Optional[float] = None):
+        if kind == "screen":
+            self.tracker.set_screen(value, now)
+        elif kind == "app":
+            self.tracker.set_app(value, now)
+        elif kind == "battery":
+            self.tracker.set_battery(value)
+        if self.on_change:
+            self.on_change(kind, value)
+
+    @staticmethod
+    def _state_commands(include_battery: bool) -> List[str]:
+        return [POWER_QUERY, ACTIVITY_QUERY] + ([BATTERY_QUERY] if include_battery else [])
+
+    def _apply_state(self, outputs: Sequence[str]):
+        """Apply the outputs of _state_commands (battery included when it was queried)."""
+        now = self.clock()
+        self._apply("screen", parse_screen_on(outputs[0]), now)
+        self._apply("app", parse_resumed_app(outputs[1]), now)
+        if len(outputs) > 2:
+            self._apply("battery", parse_battery_level(outputs[2]))
+
+    def _apply_event(self, line: str):
+        event = parse_event(line)
+        # -T replays the newest buffered event, which predates the initial query
+        if event and event[0] >= self._device_start_epoch:
+            self._apply(event[1], event[2])
+
+    def summary(self) -> dict:
+        return self.tracker.summary()
+
+
+class DeviceSampler(BaseSampler):
+    """Tracks one device's screen, foreground app and battery with two adb processes"""
+
+    def __init__(self, adb_path: Union[str, Sequence[str]] = ADB_PATH, serial: Optional[str] = None,
+                 battery_interval: float = 60.0, poll_interval: float = 2.0, use_events: bool = True,
+                 clock: Callable[[], float] = time.monotonic,
+                 on_change: Optional[Callable[[str, object], None]] = None):
+        """
+        Args:
+            adb_path: adb executable (or a command list, e.g. a fake adb for tests)
+            serial: Device serial when several devices are connected
+            battery_interval: Seconds between battery reads
+            poll_interval: Seconds between screen/foreground queries in poll mode
+            use_events: Follow the event log; False polls through the persistent shell
+            clock: Monotonic clock used for all durations
+            on_change: Optional callback(kind, value) for "screen"/"app"/"battery" changes
+        """
+        super().__init__(adb_path, serial, battery_interval, poll_interval, use_events, clock, on_change)
+        self.shell: Optional[AdbShell] = None
+        self.events_process: Optional[subprocess.Popen] = None
+        self._events_thread: Optional[threading.Thread] = None
+        self._disconnected = threading.Event()
+
+    # -------- queries --------
+
+    def _query_state(self, include_battery: bool):
+        self._apply_state(self.shell.run_many(self._state_commands(include_battery)))
+
+    def sample_battery(self):
+        self._apply("battery", parse_battery_level(self.shell.run(BATTERY_QUERY)))
+
+    # -------- lifecycle --------
+
+    def start(self):
+        """Open the adb session, read the initial state and start following events."""
+        self.shell = AdbShell(self.adb_path, self.serial)
+        self._device_start_epoch = parse_device_epoch(self.shell.run(DEVICE_TIME_QUERY))
+        self._query_state(include_battery=True)
+
+        if self.use_events:
+            self.events_process = subprocess.Popen(
+                events_command(self.adb_path, self.serial),
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1,
+            )
+            self._events_thread = threading.Thread(target=self._follow_events, daemon=True)
+            self._events_thread.start()
+
+    def _follow_events(self):
+        for line in self.events_process.stdout:
+            self._apply_event(line)
+        # The stream only ends when adb loses the device (or on stop())
+        self._disconnected.set()
+
+    @property
+    def connected(self) -> bool:
+        return not self._disconnected.is_set() and self.shell is not None and self.shell.alive
+
+    def run(self, stop_event: Optional[threading.Event] = None, duration: Optional[float] = None):
+        """
+        Sample until stop_event is set, duration elapses or the device disconnects.
+
+        Only battery is read periodically in event mode; in poll mode screen
+        and foreground state are also queried every poll_interval.
+        """
+        stop_event = stop_event or threading.Event()
+        started = time.monotonic()
+        next_battery = time.monotonic() + self.battery_interval
+        interval = self.poll_interval if not self.use_events else min(self.battery_interval, 1.0)
+
+        while self.connected and not stop_event.is_set():
+            if duration is not None and time.monotonic() - started >= duration:
+                break
+            if stop_event.wait(interval) or self._disconnected.is_set():
+                break
+            try:
+                due = time.monotonic() >= next_battery
+                if not self.use_events:
+                    self._query_state(include_battery=due)
+                elif due:
+                    self.sample_battery()
+                if due:
+                    next_battery = time.monotonic() + self.battery_interval
+            except AdbError:
+                self._disconnected.set()
+                break
+
+    def stop(self) -> dict:
+        """Close the adb processes and return the usage summary."""
+        if self.connected:
+            # Final battery reading, so sessions shorter than battery_interval still report drain
+            try:
+                self.sample_battery()
+            except AdbError:
+                pass
+        summary = self.tracker.summary()
+        if self.events_process is not None:
+            if self.events_process.poll() is None:
+                self.events_process.terminate()
+                try:
+                    self.events_process.wait(timeout=2)
+                except subprocess.TimeoutExpired:
+                    self.events_process.kill()
+            self._events_thread.join(timeout=2)
+            self.events_process.stdout.close()
+        if self.shell is not None:
+            self.shell.close()
+        return summary
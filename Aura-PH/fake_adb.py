@@ -0,0 +1,127 @@
+"""
+Stand-in for adb, used to test device_sampler without a phone.
+
+Behaviour is driven by a JSON scenario file named in FAKE_ADB_SCENARIO:
+
+    {
+      "device_epoch": 1700000000,         device clock at startup
+      "screen_on": true,                  initial screen state
+      "app": "com.example.mail",          initial foreground package
+      "battery": [80, 79],                successive battery levels returned
+      "events": [[0.1, "wm_set_resumed_activity", "[0,com.b/.Main,resume]"],
+                 [0.2, "screen_toggled", "0"]],   (delay, tag, payload)
+      "disconnect_after": 0.5,            seconds until the device "unplugs"
+      "calls_log": "/tmp/adb_calls.txt",  one line appended per adb launch
+      "devices": [[0.0, {"A1": "device"}], [0.3, {"A1": "device", "B2": "device"}]],
+                                          (delay, attached devices) for track-devices
+      "serials": {"B2": {"app": "com.b", "disconnect_after": 0.6}}
+                                          per-device overrides of the keys above
+    }
+
+Supports `adb [-s SERIAL] shell` (interactive, reading commands from stdin),
+`adb [-s SERIAL] shell logcat ...` (streams the scenario's events) and
+`adb track-devices` (streams the scenario's device lists).
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+
+
+def load_scenario() -> dict:
+    with open(os.environ["FAKE_ADB_SCENARIO"], "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def emit(line: str):
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
+
+
+def disconnect_later(seconds):
+    if seconds is None:
+        return
+    timer = threading.Timer(seconds, lambda: os._exit(0))
+    timer.daemon = True
+    timer.start()
+
+
+def run_shell(scenario: dict):
+    battery = list(scenario.get("battery", [100]))
+    for line in sys.stdin:
+        for command in line.strip().split(";"):
+            command = command.strip()
+            if not command:
+                continue
+            if command == "exit":
+                return
+            if command.startswith("echo "):
+                emit(command[5:])
+            elif command.startswith("date"):
+                emit(str(int(scenario.get("device_epoch", 1700000000))))
+            elif "dumpsys power" in command:
+                state = "ON" if scenario.get("screen_on", True) else "OFF"
+                emit(f"Display Power: state={state}")
+                emit(f"  mWakefulness={'Awake' if state == 'ON' else 'Asleep'}")
+            elif "dumpsys activity" in command:
+                if scenario.get("app"):
+                    emit(f"  mResumedActivity: ActivityRecord{{5f2a u0 {scenario['app']}/.MainActivity t42}}")
+            elif "dumpsys battery" in command:
+                level = battery.pop(0) if len(battery) > 1 else battery[0]
+                emit(f"  level: {level}")
+
+
+def run_track_devices(scenario: dict):
+    started = time.monotonic()
+    for delay, devices in scenario.get("devices", []):
+        time.sleep(max(0.0, delay - (time.monotonic() - started)))
+        payload = "".join(f"{serial}\t{state}\n" for serial, state in devices.items())
+        sys.stdout.write(f"{len(payload.encode('utf-8')):04x}{payload}")
+        sys.stdout.flush()
+
+    while True:
+        time.sleep(60)
+
+
+def run_logcat(scenario: dict):
+    epoch = float(scenario.get("device_epoch", 1700000000))
+    # logcat -T 1 replays the newest buffered event first; it predates the session
+    emit(f"{epoch - 30:.3f}  1000  1234 I screen_toggled: 0")
+
+    started = time.monotonic()
+    for delay, tag, payload in scenario.get("events", []):
+        time.sleep(max(0.0, delay - (time.monotonic() - started)))
+        emit(f"{epoch + delay:.3f}  1000  1234 I {tag}: {payload}")
+
+    while True:
+        time.sleep(60)
+
+
+def main():
+    args = sys.argv[1:]
+    scenario = load_scenario()
+    if scenario.get("calls_log"):
+        with open(scenario["calls_log"], "a", encoding="utf-8") as f:
+            f.write(" ".join(args) + "\n")
+
+    if args[:1] == ["-s"]:
+        scenario.update(scenario.get("serials", {}).get(args[1], {}))
+        args = args[2:]
+    if args[:1] == ["track-devices"]:
+        run_track_devices(scenario)
+        return
+    if args[:1] != ["shell"]:
+        emit("List of devices attached")
+        return
+
+    disconnect_later(scenario.get("disconnect_after"))
+    if len(args) > 1 and args[1] == "logcat":
+        run_logcat(scenario)
+    else:
+        run_shell(scenario)
+
+
+if __name__ == "__main__":
+    main()
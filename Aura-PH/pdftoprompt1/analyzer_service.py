@@ -0,0 +1,438 @@
+"""
+Long-running local HTTP service around the medical report analyzer.
+
+Extraction workers are started once and import the PDF/OCR libraries up
+front, so an upload pays only for its own extraction and LLM calls instead of
+interpreter startup and imports. LLM requests share one pooled HTTP session.
+
+Endpoints:
+    POST /analyze   Raw file bytes with ?filename=report.pdf, or a JSON body
+                    {"path": "/local/report.pdf"} naming a file inside one of the
+                    --allow-dir directories (refused with 403 when none is given).
+                    Options (query string or JSON): mode=auto|single|map-reduce,
+                    structured=1, llm=auto|always|never
+    GET  /status    Queue depth, jobs in flight, counters and per-stage
+                    latency percentiles (ms)
+    GET  /health    Liveness check
+
+When every worker is busy and the queue is full, /analyze answers 503 with a
+Retry-After header instead of piling up work.
+
+Usage:
+    python analyzer_service.py --port 8766 --workers 4 --queue-size 16 --allow-dir /data/reports
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import parse_qs, urlparse
+
+from medical_report_analyzer import (
+    DEFAULT_MODEL, SUPPORTED_EXTENSIONS, ocr_available, pdf2image_available,
+    docx_available, prepare_report, summarize_report,
+)
+from report_cache import ReportCache
+
+
+DEFAULT_MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+MODES = ("auto", "single", "map-reduce")
+LLM_CHOICES = ("auto", "always", "never")
+
+
+class QueueFull(Exception):
+    """Raised when a job arrives while every worker is busy and the queue is full"""
+
+
+class LatencyStats:
+    """Sliding window of per-stage latencies with percentile summaries"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, timings: Dict[str, float]):
+        """Add one job's stage timings (seconds)."""
+        with self._lock:
+            for stage, seconds in timings.items():
+                self._samples.setdefault(stage, deque(maxlen=self.window)).append(seconds)
+
+    def percentiles(self) -> Dict[str, Dict[str, float]]:
+        """Return {stage: {count, p50, p95, p99}} in milliseconds."""
+        with self._lock:
+            snapshot = {stage: sorted(samples) for stage, samples in self._samples.items()}
+
+        def rank(values, pct):
+            # Nearest-rank percentile
+            index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values) + 0.5)) - 1))
+            return round(values[index] * 1000, 1)
+
+        return {
+            stage: {"count": len(values), "p50": rank(values, 50),
+                    "p95": rank(values, 95), "p99": rank(values, 99)}
+            for stage, values in snapshot.items() if values
+        }
+
+
+# ---------------- WORKER PROCESSES ----------------
+
+_worker_cache = None
+
+
+def _init_worker(cache_dir: Optional[str], use_cache: bool):
+    """Runs once per worker: open the cache and import the extraction libraries."""
+    global _worker_cache
+    _worker_cache = ReportCache(cache_dir) if use_cache else None
+
+    import pdfplumber  # noqa: F401
+    if ocr_available():
+        import pytesseract  # noqa: F401
+        from PIL import Image  # noqa: F401
+    if pdf2image_available():
+        import pdf2image  # noqa: F401
+    if docx_available():
+        import docx  # noqa: F401
+
+    # Per-page progress output from every job would flood the service log
+    sys.stdout = open(os.devnull, "w")
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _extract_job(file_path: str, options: Dict[str, Any], submitted: float) -> dict:
+    queued = time.time() - submitted
+    prepared = prepare_report(file_path, workers=1, cache=_worker_cache, **options)
+    prepared["timings"]["queue"] = max(0.0, queued)
+    return prepared
+
+
+# ---------------- SERVICE ----------------
+
+class AnalyzerService:
+    """Warm worker pool plus bounded admission in front of prepare/summarize_report"""
+
+    def __init__(self, api_key: str, base_url: str = None, model: str = None,
+                 workers: Optional[int] = None, queue_size: int = 16, llm_concurrency: int = 4,
+                 llm_workers: int = 4, ocr_dpi: int = 200, cache_dir: Optional[str] = None,
+                 use_cache: bool = True, window: int = 1000):
+        """
+        Args:
+            api_key: NVIDIA API key
+            base_url: NVIDIA API base URL (optional)
+            model: Model name (optional)
+            workers: Extraction worker processes (default: CPU count)
+            queue_size: Jobs allowed to wait for a worker before new ones are rejected
+            llm_concurrency: Reports summarized at the same time
+            llm_workers: Concurrent LLM requests per report in map-reduce mode
+            ocr_dpi: Resolution for rasterizing scanned PDF pages
+            cache_dir: ReportCache directory (optional)
+            use_cache: Read/write the report cache
+            window: Jobs kept for latency percentiles
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model or DEFAULT_MODEL
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.queue_size = max(0, queue_size)
+        self.llm_workers = llm_workers
+        self.ocr_dpi = ocr_dpi
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.cache = ReportCache(cache_dir) if use_cache else None
+
+        self.latency = LatencyStats(window)
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._llm_slots = threading.Semaphore(max(1, llm_concurrency))
+        self._lock = threading.Lock()
+        self._pool = None
+        self._started = time.time()
+        # Counters since startup, and gauges of jobs currently in each stage
+        self._stats = {"accepted": 0, "completed": 0, "failed": 0, "rejected": 0,
+                       "extracting": 0, "waiting_for_llm": 0, "summarizing": 0}
+
+    def start(self):
+        """Start the worker processes and wait until every one has finished warming up."""
+        self._pool = self._new_pool()
+        for future in [self._pool.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+        print(f"✅ {self.workers} warm worker(s) ready")
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=(self.cache_dir, self.use_cache))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _add(self, name: str, delta: int = 1):
+        with self._lock:
+            self._stats[name] += delta
+
+    def analyze(self, file_path: str, mode: str = "auto", structured: bool = False,
+                use_llm: str = "auto") -> dict:
+        """
+        Analyze one report on the warm pool.
+
+        Raises:
+            QueueFull: every worker is busy and queue_size jobs are already waiting
+        """
+        if not self._slots.acquire(blocking=False):
+            self._add("rejected")
+            raise QueueFull("Analyzer queue is full, retry later")
+
+        self._add("accepted")
+        submitted = time.time()
+        started = time.perf_counter()
+        options = {"model": self.model, "mode": mode, "ocr_dpi": self.ocr_dpi,
+                   "structured": structured, "use_llm": use_llm}
+        try:
+            self._add("extracting")
+            try:
+                pool = self._pool
+                prepared = pool.submit(_extract_job, file_path, options, submitted).result()
+            except BrokenProcessPool:
+                # A worker died (e.g. killed by the OOM killer): replace the pool for later jobs
+                with self._lock:
+                    if self._pool is pool:
+                        self._pool = self._new_pool()
+                raise RuntimeError("Extraction worker crashed; the worker pool was restarted")
+            finally:
+                self._add("extracting", -1)
+
+            self._add("waiting_for_llm")
+            waited = time.perf_counter()
+            with self._llm_slots:
+                self._add("waiting_for_llm", -1)
+                self._add("summarizing")
+                try:
+                    prepared["timings"]["llm_queue"] = time.perf_counter() - waited
+                    result = summarize_report(prepared, self.api_key, self.base_url, self.model,
+                                              mode=mode, llm_workers=self.llm_workers,
+                                              cache=self.cache, structured=structured,
+                                              use_llm=use_llm)
+                finally:
+                    self._add("summarizing", -1)
+
+            result["timings"]["total"] = time.perf_counter() - started
+            self.latency.record(result["timings"])
+            self._add("completed")
+            return result
+        except Exception:
+            self._add("failed")
+            raise
+        finally:
+            self._slots.release()
+
+    def status(self) -> dict:
+        """Queue depth, jobs per stage, counters and latency percentiles."""
+        with self._lock:
+            stats = dict(self._stats)
+        # Jobs submitted beyond the number of workers are waiting in the pool's queue
+        extracting = stats.pop("extracting")
+        return {
+            "uptime_seconds": round(time.time() - self._started, 1),
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queue_depth": max(0, extracting - self.workers),
+            "extracting": min(extracting, self.workers),
+            **stats,
+            "latency_ms": self.latency.percentiles(),
+        }
+
+
+# ---------------- HTTP ----------------
+
+def _flag(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+def _allowed_path(file_path: str, allow_dirs: List[Path]) -> Optional[str]:
+    """The resolved path if it lies inside one of allow_dirs (symlinks and '..' followed), else None"""
+    resolved = Path(file_path).resolve()
+    if any(resolved.is_relative_to(directory) for directory in allow_dirs):
+        return str(resolved)
+    return None
+
+
+def make_handler(service: AnalyzerService, max_upload_bytes: int = DEFAULT_MAX_UPLOAD_BYTES,
+                 allow_dirs: Sequence[str] = ()):
+    """Build an HTTP handler class that runs uploads through the service"""
+    allow_dirs = [Path(directory).resolve() for directory in allow_dirs]
+
+    class AnalyzerHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == "/status":
+                self._reply(200, service.status())
+            elif path == "/health":
+                self._reply(200, {"ok": True})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/analyze":
+                self._reply(404, {"error": "not found"})
+                return
+
+            length = int(self.headers.get("Content-Length", 0))
+            if length > max_upload_bytes:
+                self._reply(413, {"error": f"upload larger than {max_upload_bytes} bytes"})
+                self.close_connection = True
+                return
+            body = self.rfile.read(length)
+            options = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+            temp_path = None
+            try:
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    try:
+                        payload = json.loads(body or b"{}")
+                    except json.JSONDecodeError:
+                        self._reply(400, {"error": "invalid json"})
+                        return
+                    options.update(payload)
+                    if not options.get("path"):
+                        self._reply(400, {"error": "missing 'path'"})
+                        return
+                    if not allow_dirs:
+                        self._reply(403, {"error": "local paths are disabled; upload the file or start with --allow-dir"})
+                        return
+                    file_path = _allowed_path(str(options["path"]), allow_dirs)
+                    if file_path is None:
+                        self._reply(403, {"error": "path is outside the allowed directories"})
+                        return
+                else:
+                    suffix = Path(options.get("filename", "")).suffix.lower()
+                    if suffix not in SUPPORTED_EXTENSIONS:
+                        self._reply(400, {"error": f"filename must end in one of {', '.join(SUPPORTED_EXTENSIONS)}"})
+                        return
+                    fd, temp_path = tempfile.mkstemp(suffix=suffix)
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(body)
+                    file_path = temp_path
+
+                mode = options.get("mode", "auto")
+                use_llm = options.get("llm", "auto")
+                if mode not in MODES or use_llm not in LLM_CHOICES:
+                    self._reply(400, {"error": f"mode must be one of {MODES}, llm one of {LLM_CHOICES}"})
+                    return
+
+                result = service.analyze(file_path, mode=mode,
+                                         structured=_flag(options.get("structured", False)),
+                                         use_llm=use_llm)
+                if temp_path:
+                    result["file"] = options.get("filename")
+                result["timings"] = {stage: round(seconds, 3) for stage, seconds in result["timings"].items()}
+                self._reply(200, result)
+            except QueueFull as e:
+                self._reply(503, {"error": str(e)}, {"Retry-After": "1"})
+            except (FileNotFoundError, ValueError) as e:
+                self._reply(400, {"error": str(e)})
+            except Exception as e:
+                self._reply(500, {"error": str(e)})
+            finally:
+                if temp_path:
+                    try:
+                        os.remove(temp_path)
+                    except OSError:
+                        pass
+
+        def _reply(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+            data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return AnalyzerHandler
+
+
+def serve(service: AnalyzerService, host: str = "127.0.0.1", port: int = 8766,
+          max_upload_bytes: int = DEFAULT_MAX_UPLOAD_BYTES, allow_dirs: Sequence[str] = (),
+          stop_event: Optional[threading.Event] = None):
+    """Start the workers and serve requests until stopped"""
+    service.start()
+    server = ThreadingHTTPServer((host, port), make_handler(service, max_upload_bytes, allow_dirs))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"📡 Medical report analyzer listening on http://{host}:{server.server_address[1]}")
+
+    stop_event = stop_event or threading.Event()
+    try:
+        while not stop_event.is_set():
+            stop_event.wait(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the medical report analyzer over local HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Warm extraction worker processes (default: CPU count)")
+    parser.add_argument("--queue-size", type=int, default=16,
+                        help="Jobs allowed to wait for a worker before answering 503 (default: 16)")
+    parser.add_argument("--llm-concurrency", type=int, default=4,
+                        help="Reports summarized at the same time (default: 4)")
+    parser.add_argument("--llm-workers", type=int, default=4,
+                        help="Concurrent LLM requests per report in map-reduce mode (default: 4)")
+    parser.add_argument("--api-key", default=None,
+                        help="NVIDIA API key (or set NVIDIA_API_KEY environment variable)")
+    parser.add_argument("--base-url", default=None, help="NVIDIA API base URL")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--ocr-dpi", type=int, default=200)
+    parser.add_argument("--max-upload-mb", type=int, default=DEFAULT_MAX_UPLOAD_BYTES // (1024 * 1024))
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--allow-dir", action="append", default=[],
+                        help="Directory whose files may be analyzed by JSON {\"path\": ...} requests "
+                             "(repeatable; without it only uploads are accepted)")
+    args = parser.parse_args()
+
+    api_key = args.api_key or os.getenv("NVIDIA_API_KEY")
+    if not api_key:
+        print("Error: NVIDIA API key is required (set NVIDIA_API_KEY or pass --api-key)")
+        sys.exit(1)
+
+    service = AnalyzerService(
+        api_key, args.base_url, args.model, workers=args.workers, queue_size=args.queue_size,
+        llm_concurrency=args.llm_concurrency, llm_workers=args.llm_workers, ocr_dpi=args.ocr_dpi,
+        cache_dir=args.cache_dir, use_cache=not args.no_cache
+    )
+    serve(service, args.host, args.port, max_upload_bytes=args.max_upload_mb * 1024 * 1024,
+          allow_dirs=args.allow_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark text_chunker.chunk_text against the previous character-based chunker
+on multi-megabyte report text.
+
+Usage:
+    python benchmark_chunking.py
+    python benchmark_chunking.py --sizes-mb 1 4 16
+"""
+
+import json
+import time
+import random
+import argparse
+from typing import List
+
+from text_chunker import chunk_text, estimate_tokens
+
+
+def legacy_chunk_text(text: str, chunk_size: int = 3000, overlap: int = 200) -> List[str]:
+    """The original rfind-based chunker, kept here as the baseline."""
+    if len(text) <= chunk_size:
+        return [text]
+
+    chunks = []
+    start = 0
+    previous_start = -1
+
+    while start < len(text):
+        if start <= previous_start:
+            # The original loops forever here (a break inside the overlap moves start backwards)
+            raise RuntimeError(f"legacy chunker stalled at offset {start}")
+        previous_start = start
+        end = start + chunk_size
+
+        if end < len(text):
+            for break_char in ['. ', '\n\n', '\n']:
+                last_break = text.rfind(break_char, start, end)
+                if last_break != -1:
+                    end = last_break + len(break_char)
+                    break
+
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+
+        start = end - overlap
+
+    return chunks
+
+
+def generate_report_text(size_bytes: int, seed: int = 7) -> str:
+    """Lab-report-like text: headers, prose, and ' | '-separated table rows."""
+    rng = random.Random(seed)
+    tests = ["Hemoglobin", "WBC Count", "Platelets", "Glucose", "Cholesterol", "LDL", "HDL", "TSH"]
+    parts = []
+    size = 0
+    page = 1
+    while size < size_bytes:
+        block = [f"\n--- Page {page} ---\n"]
+        for _ in range(rng.randint(3, 8)):
+            block.append(
+                "The patient reports mild fatigue. Follow-up recommended in "
+                f"{rng.randint(2, 12)} weeks. Values were reviewed by the physician. "
+            )
+        block.append("\n\n")
+        for _ in range(rng.randint(10, 30)):
+            name = rng.choice(tests)
+            block.append(f"{name} | {rng.uniform(1, 300):.1f} | mg/dL | 10 - 200\n")
+        text = "".join(block)
+        parts.append(text)
+        size += len(text)
+        page += 1
+    return "".join(parts)
+
+
+def generate_sparse_text(size_bytes: int) -> str:
+    """OCR-like text with a sentence break every ~2,900 characters (stalls the legacy chunker)."""
+    sentence = "x" * 2897 + ". "
+    return sentence * (size_bytes // len(sentence) + 1)
+
+
+def run(label: str, fn, text: str) -> dict:
+    start = time.perf_counter()
+    try:
+        chunks = fn(text)
+    except RuntimeError as e:
+        return {"chunker": label, "error": str(e)}
+    seconds = time.perf_counter() - start
+    sizes = [estimate_tokens(c) for c in chunks[:2000]]
+    return {
+        "chunker": label,
+        "seconds": round(seconds, 3),
+        "mb_per_second": round(len(text) / 1e6 / seconds, 2),
+        "chunks": len(chunks),
+        "max_tokens_seen": max(sizes) if sizes else 0,
+        "min_tokens_seen": min(sizes) if sizes else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text chunking")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    results = []
+    for size_mb in args.sizes_mb:
+        for corpus, generate in (("report", generate_report_text), ("sparse", generate_sparse_text)):
+            text = generate(int(size_mb * 1e6))
+            for label, fn in (("legacy", legacy_chunk_text), ("token", chunk_text)):
+                result = run(label, fn, text)
+                result.update(size_mb=size_mb, corpus=corpus)
+                results.append(result)
+                if "error" in result:
+                    print(f"{size_mb:>6} MB  {corpus:<7} {label:<7} {result['error']}")
+                else:
+                    print(f"{size_mb:>6} MB  {corpus:<7} {label:<7} {result['seconds']:8.3f}s  "
+                          f"{result['chunks']:>7} chunks")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark serial vs. parallel PDF text extraction on generated multi-page reports.
+
+Usage:
+    python benchmark_extraction.py
+    python benchmark_extraction.py --pages 50 200 --workers 1 2 4 8
+"""
+
+import os
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+import io
+
+from medical_report_analyzer import extract_text_from_pdf
+
+
+LAB_TESTS = [
+    ("Hemoglobin", "g/dL", "13.0 - 17.0"),
+    ("WBC Count", "10^3/uL", "4.0 - 11.0"),
+    ("Platelet Count", "10^3/uL", "150 - 450"),
+    ("Fasting Glucose", "mg/dL", "70 - 100"),
+    ("Total Cholesterol", "mg/dL", "< 200"),
+    ("LDL Cholesterol", "mg/dL", "< 100"),
+    ("HDL Cholesterol", "mg/dL", "> 40"),
+    ("Triglycerides", "mg/dL", "< 150"),
+    ("Creatinine", "mg/dL", "0.7 - 1.3"),
+    ("TSH", "uIU/mL", "0.4 - 4.0"),
+]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_sample_pdf(path: str, num_pages: int, lines_per_page: int = 40):
+    """Write a text-based lab report PDF with `num_pages` pages (no third-party deps)."""
+    objects = []  # object bodies, object number = index + 1
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree exists
+    pages = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_ids = []
+    for page_num in range(1, num_pages + 1):
+        lines = [f"Patient Lab Report - Page {page_num}"]
+        for i in range(lines_per_page):
+            name, unit, ref = LAB_TESTS[(page_num + i) % len(LAB_TESTS)]
+            value = 50 + ((page_num * 37 + i * 11) % 200) / 10
+            lines.append(f"{name}   {value:.1f} {unit}   Ref: {ref}")
+
+        ops = ["BT", "/F1 10 Tf", "12 TL", "40 800 Td"]
+        ops += [f"({_escape(line)}) Tj T*" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages, font, content)
+        ))
+
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[pages - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+              % (len(objects) + 1, catalog, xref))
+
+    with open(path, "wb") as f:
+        f.write(out.getvalue())
+
+
+def time_extraction(pdf_path: str, workers: int, repeats: int) -> tuple:
+    best = float("inf")
+    text = ""
+    for _ in range(repeats):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            text = extract_text_from_pdf(pdf_path, workers=workers)
+        best = min(best, time.perf_counter() - start)
+    return best, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF text extraction")
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_pages in args.pages:
+            pdf_path = os.path.join(tmp, f"report_{num_pages}.pdf")
+            write_sample_pdf(pdf_path, num_pages)
+
+            baseline_time, baseline_text = None, None
+            for workers in args.workers:
+                seconds, text = time_extraction(pdf_path, workers, args.repeats)
+                if baseline_time is None:
+                    baseline_time, baseline_text = seconds, text
+                results.append({
+                    "pages": num_pages,
+                    "workers": workers,
+                    "seconds": round(seconds, 3),
+                    "pages_per_second": round(num_pages / seconds, 1),
+                    "speedup": round(baseline_time / seconds, 2),
+                    "matches_first_run": text == baseline_text,
+                })
+                print(f"{num_pages:>5} pages  {workers:>2} worker(s)  {seconds:7.3f}s  "
+                      f"x{baseline_time / seconds:.2f}")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
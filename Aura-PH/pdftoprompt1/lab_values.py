@@ -0,0 +1,326 @@
+"""
+Deterministic extraction of lab values from report tables and text.
+
+Table rows (from pdfplumber's page.extract_tables()) and text lines are
+parsed into records of the form:
+
+    {"test": "Hemoglobin", "value": 11.2, "unit": "g/dL",
+     "reference_range": "13.0 - 17.0", "flag": "L"}
+
+Abnormal flags are computed locally from the reference range (falling back
+to a flag printed in the report), so only the compact abnormal set needs to
+be sent to the LLM.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+# Thousands-grouped (4,000 / 1,20,000 / 1,000,000), decimal comma (12,5) or plain (11.2)
+NUMBER = r"(?:\d{1,3}(?:,\d{2,3})*,\d{3}(?!\d)(?:\.\d+)?|\d+,\d{1,2}(?![\d,])|\d+(?:\.\d+)?)"
+VALUE_RE = re.compile(rf"^\s*[<>]?\s*({NUMBER})\s*(?:\*|\b[HL]\b|\b(?:high|low)\b)?\s*$", re.IGNORECASE)
+RANGE_RE = re.compile(
+    # Not part of a date such as 12-05-2024
+    rf"(?<![\d/.,])(?<!\d-)({NUMBER})\s*(?:-|–|—|to)\s*({NUMBER})(?!\d|[-/]\d)"
+    rf"|(<=|>=|<|>|≤|≥|up to|upto|below|above|less than|more than|greater than)\s*({NUMBER})",
+    re.IGNORECASE,
+)
+FLAG_RE = re.compile(r"^\s*\*?\s*(H|L|HH|LL|HIGH|LOW|ABNORMAL|CRITICAL)\s*\*?\s*$", re.IGNORECASE)
+UNIT_RE = re.compile(r"^\s*(%|[a-zA-Zµμ]+(?:\^?\d+)?(?:/[a-zA-Z0-9µμ.^]+)+|[a-zA-Zµμ]{1,6}|10\^\d+/[a-zA-Zµμ]+)\s*$")
+
+# A text line: a test name (which may contain digits, e.g. "Vitamin D 25-OH"), then a
+# numeric result standing on its own, then unit/range/flag
+TEST_NAME_RE = re.compile(r"^[A-Za-z][A-Za-z0-9 ,()/%.'\-]*$")
+VALUE_CANDIDATE_RE = re.compile(rf"(?<!\S)([<>]?\s*{NUMBER})(?=\s|\*|$)")
+# Bare words accepted as a unit right after a text-line value ("Ref", "Date" or "OH" are not;
+# a lone H or L is a flag)
+PLAIN_UNITS = {
+    "g", "mg", "ug", "µg", "μg", "ng", "pg", "kg", "dl", "ml", "fl", "u", "iu", "miu", "uiu", "µiu",
+    "mu", "meq", "mmol", "umol", "µmol", "nmol", "pmol", "mosm", "mm", "mmhg", "sec", "s", "min",
+    "cells", "ratio", "index", "titre", "titer", "cumm", "lakhs", "million", "thou",
+}
+
+HEADER_KEYWORDS = {
+    "test": ("test", "parameter", "investigation", "analyte", "name", "description"),
+    "value": ("result", "value", "observed", "observation"),
+    "unit": ("unit", "units"),
+    "reference_range": ("reference", "range", "normal", "interval", "ref", "bio"),
+    "flag": ("flag", "status", "h/l", "remark"),
+}
+
+
+def _to_float(text: str) -> Optional[float]:
+    """Number from report text: a comma is a decimal point only before 1-2 final digits."""
+    try:
+        text = text.strip()
+        if re.fullmatch(r"\d+,\d{1,2}", text):
+            return float(text.replace(",", "."))
+        return float(text.replace(",", ""))
+    except (AttributeError, ValueError):
+        return None
+
+
+def parse_reference_range(text: str) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Parse a reference range such as "13.0 - 17.0", "< 200" or "> 40".
+
+    Returns:
+        (low, high); either bound may be None
+    """
+    if not text:
+        return None, None
+    match = RANGE_RE.search(text)
+    if not match:
+        return None, None
+    if match.group(1):
+        low, high = _to_float(match.group(1)), _to_float(match.group(2))
+        return (low, high) if low <= high else (high, low)
+
+    op, bound = match.group(3).lower(), _to_float(match.group(4))
+    if op in ("<", "<=", "≤", "up to", "upto", "below", "less than"):
+        return None, bound
+    return bound, None
+
+
+def compute_flag(value: Optional[float], reference_range: str, reported_flag: str = "") -> Optional[str]:
+    """
+    Classify a value as "H", "L" or "N" against its reference range.
+
+    Falls back to the flag printed in the report when no range is available.
+    """
+    low, high = parse_reference_range(reference_range)
+    if value is not None and (low is not None or high is not None):
+        if low is not None and value < low:
+            return "L"
+        if high is not None and value > high:
+            return "H"
+        return "N"
+
+    reported = (reported_flag or "").strip(" *").upper()
+    if reported in ("H", "HH", "HIGH"):
+        return "H"
+    if reported in ("L", "LL", "LOW"):
+        return "L"
+    if reported in ("ABNORMAL", "CRITICAL"):
+        return "A"
+    return None
+
+
+def _make_record(test: str, value_text: str, unit: str = "", reference_range: str = "",
+                 reported_flag: str = "") -> Optional[Dict]:
+    test = re.sub(r"\s+", " ", (test or "")).strip(" :-|")
+    match = VALUE_RE.match(value_text or "")
+    if not test or not match:
+        return None
+
+    # A flag may be attached to the value itself, e.g. "11.2 L" or "240*"
+    if not reported_flag:
+        suffix = (value_text or "")[match.end(1):].strip()
+        if suffix:
+            reported_flag = "ABNORMAL" if suffix == "*" else suffix
+
+    value = _to_float(match.group(1))
+    reference_range = (reference_range or "").strip()
+    return {
+        "test": test,
+        "value": value,
+        "unit": (unit or "").strip(),
+        "reference_range": reference_range,
+        "flag": compute_flag(value, reference_range, reported_flag),
+    }
+
+
+def _header_columns(row: List[str]) -> Optional[Dict[str, int]]:
+    """Map field -> column index if the row looks like a table header."""
+    columns = {}
+    for index, cell in enumerate(row):
+        cell = (cell or "").strip().lower()
+        if not cell:
+            continue
+        for field, keywords in HEADER_KEYWORDS.items():
+            if field not in columns and any(keyword in cell for keyword in keywords):
+                columns[field] = index
+                break
+    if "test" in columns and "value" in columns:
+        return columns
+    return None
+
+
+def parse_cells(cells: List[str]) -> Optional[Dict]:
+    """Parse one table row without a known header, using the shape of each cell."""
+    cells = [(cell or "").strip() for cell in cells]
+    test = value = unit = reference_range = flag = ""
+
+    for cell in cells:
+        if not cell:
+            continue
+        if not value and not test and re.search(r"[A-Za-z]", cell) and not VALUE_RE.match(cell):
+            test = cell
+        elif test and not value and VALUE_RE.match(cell):
+            value = cell
+        elif value and not reference_range and RANGE_RE.search(cell) and re.search(r"\d", cell):
+            reference_range = cell
+        elif value and not flag and FLAG_RE.match(cell):
+            flag = cell
+        elif value and not unit and UNIT_RE.match(cell):
+            unit = cell
+
+    return _make_record(test, value, unit, reference_range, flag)
+
+
+def parse_tables(tables: List[List[List[str]]]) -> List[Dict]:
+    """
+    Parse pdfplumber tables (lists of rows of cells) into lab records.
+
+    Uses the header row to locate columns when there is one, and falls back
+    to per-cell heuristics otherwise. Rows that are not lab values are skipped.
+    """
+    records = []
+    for table in tables:
+        columns = None
+        for row in table:
+            if not row:
+                continue
+            header = _header_columns(row)
+            if header:
+                columns = header
+                continue
+
+            record = None
+            if columns:
+                def cell(field):
+                    index = columns.get(field)
+                    return (row[index] or "") if index is not None and index < len(row) else ""
+                record = _make_record(cell("test"), cell("value"), cell("unit"),
+                                      cell("reference_range"), cell("flag"))
+            if record is None:
+                record = parse_cells(row)
+            if record:
+                records.append(record)
+    return records
+
+
+def _is_line_unit(token: str) -> bool:
+    """Unit after a text-line value: compound (mg/dL, 10^3/uL), per-volume (/cumm) or a known word."""
+    if re.fullmatch(r"/[a-zA-Zµμ]+", token):
+        return True
+    if not UNIT_RE.match(token):
+        return False
+    return not token.isalpha() or token.lower() in PLAIN_UNITS
+
+
+def _split_line(line: str) -> Optional[Tuple[str, str, str]]:
+    """
+    (test, value, rest) for the first number in the line that is followed by a
+    unit, a reference range or a flag; numbers inside names such as
+    "Vitamin D 25-OH" or "Patient ID 12345" are not results.
+    """
+    for match in VALUE_CANDIDATE_RE.finditer(line):
+        test = line[:match.start()].strip().rstrip(":-").strip()
+        if not TEST_NAME_RE.match(test):
+            continue
+        rest = line[match.end():]
+        stripped = rest.lstrip()
+        tokens = stripped.split()
+        if (stripped.startswith("*") or RANGE_RE.match(stripped)
+                or (tokens and (FLAG_RE.match(tokens[0]) or _is_line_unit(tokens[0])))):
+            return test, match.group(1), rest
+    return None
+
+
+def parse_line(line: str) -> Optional[Dict]:
+    """Parse one text line such as "Hemoglobin 11.2 g/dL 13.0 - 17.0 L"."""
+    if " | " in line:
+        return parse_cells(line.split(" | "))
+
+    parts = _split_line(line)
+    if parts is None:
+        return None
+    test, value, rest = parts
+    flag = ""
+    if rest.lstrip().startswith("*"):
+        flag, rest = "ABNORMAL", rest.lstrip()[1:]
+
+    reference_range = ""
+    range_match = RANGE_RE.search(rest)
+    if range_match:
+        reference_range = range_match.group(0)
+        before, after = rest[:range_match.start()], rest[range_match.end():]
+    else:
+        before, after = rest, ""
+
+    tokens = before.split()
+    unit = tokens[0] if tokens and _is_line_unit(tokens[0]) else ""
+    if not flag:
+        for token in tokens[1 if unit else 0:] + after.split():
+            if FLAG_RE.match(token):
+                flag = token
+                break
+
+    return _make_record(test, value, unit, reference_range, flag)
+
+
+def parse_text(text: str) -> Tuple[List[Dict], List[str]]:
+    """
+    Parse lab records out of free text, one line at a time.
+
+    Returns:
+        (records, context_lines) where context_lines are the lines that were
+        not lab values (findings, impressions, notes)
+    """
+    records, context = [], []
+    for line in text.splitlines():
+        if not line.strip() or line.startswith("--- Page"):
+            continue
+        record = parse_line(line)
+        if record and record["flag"] is not None:
+            records.append(record)
+        else:
+            context.append(line.strip())
+    return records, context
+
+
+def merge_records(*groups: List[Dict]) -> List[Dict]:
+    """Concatenate record lists, dropping duplicates of the same test and value."""
+    seen = set()
+    merged = []
+    for group in groups:
+        for record in group:
+            key = (record["test"].lower(), record["value"])
+            if key not in seen:
+                seen.add(key)
+                merged.append(record)
+    return merged
+
+
+def abnormal(records: List[Dict]) -> List[Dict]:
+    """Records flagged high, low or abnormal."""
+    return [record for record in records if record["flag"] in ("H", "L", "A")]
+
+
+def format_record(record: Dict) -> str:
+    """Compact one-line rendering, e.g. "Hemoglobin: 11.2 g/dL (ref 13.0 - 17.0) LOW"."""
+    label = {"H": "HIGH", "L": "LOW", "A": "ABNORMAL", "N": "normal"}.get(record["flag"], "")
+    value = f"{record['value']:g}"
+    unit = f" {record['unit']}" if record["unit"] else ""
+    ref = f" (ref {record['reference_range']})" if record["reference_range"] else ""
+    return f"{record['test']}: {value}{unit}{ref} {label}".rstrip()
+
+
+def local_summary(records: List[Dict]) -> str:
+    """Plain-language summary built without an LLM."""
+    flagged = abnormal(records)
+    if not flagged:
+        return f"All {len(records)} recognized lab values are within their reference ranges."
+
+    words = {"H": "high", "L": "low", "A": "abnormal"}
+    parts = []
+    for record in flagged:
+        unit = f" {record['unit']}" if record["unit"] else ""
+        ref = f", ref {record['reference_range']}" if record["reference_range"] else ""
+        parts.append(f"{record['test']} is {words[record['flag']]} ({record['value']:g}{unit}{ref})")
+    normal_count = len(records) - len(flagged)
+    summary = "; ".join(parts) + "."
+    if normal_count:
+        summary += f" The other {normal_count} recognized lab values are within their reference ranges."
+    return summary
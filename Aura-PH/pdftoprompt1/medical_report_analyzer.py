@@ -1,45 +1,50 @@
 import sys
 import os
+import importlib
+import importlib.util
 from pathlib import Path
 import argparse
-from typing import List
+from typing import List, Optional, Tuple
 import shutil
+import threading
+import time
+import json
+import glob
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 
-# Try importing required libraries
-try:
-    import pdfplumber
-except ImportError:
-    print("Error: pdfplumber is not installed. Please install it using: pip install pdfplumber")
-    sys.exit(1)
+import lab_values
+import text_chunker
+from report_cache import ReportCache, file_sha256, text_sha256
 
-try:
-    import requests
-except ImportError:
-    print("Error: requests is not installed. Please install it using: pip install requests")
-    sys.exit(1)
+# Third-party libraries are imported by the code paths that need them, so the
+# CLI, batch workers and importers of this module start quickly. The checks
+# below only look the modules up without importing them.
 
-try:
-    from PIL import Image
-    import pytesseract
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
-    print("Warning: OCR libraries not available. Image-based PDFs and image files will not be processed.")
-    print("Install with: pip install pytesseract pillow pdf2image")
+def _has_modules(*names: str) -> bool:
+    return all(importlib.util.find_spec(name) is not None for name in names)
 
-try:
-    from pdf2image import convert_from_path
-    PDF2IMAGE_AVAILABLE = True
-except ImportError:
-    PDF2IMAGE_AVAILABLE = False
 
-try:
-    from docx import Document
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
-    print("Warning: python-docx not available. Word documents (.docx) will not be supported.")
-    print("Install with: pip install python-docx")
+def ocr_available() -> bool:
+    """True if pytesseract and Pillow are installed."""
+    return _has_modules("PIL", "pytesseract")
+
+
+def pdf2image_available() -> bool:
+    """True if pdf2image is installed."""
+    return _has_modules("pdf2image")
+
+
+def docx_available() -> bool:
+    """True if python-docx is installed."""
+    return _has_modules("docx")
+
+
+def _require(module: str, package: str):
+    """Import a required dependency on first use."""
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise ImportError(f"{package} is not installed. Please install it using: pip install {package}")
 
 
 def extract_text_with_ocr(image_path: str) -> str:
@@ -52,9 +57,12 @@ def extract_text_with_ocr(image_path: str) -> str:
     Returns:
         Extracted text as a string
     """
-    if not OCR_AVAILABLE:
+    if not ocr_available():
         raise Exception("OCR is not available. Please install pytesseract and pillow.")
     
+    from PIL import Image
+    import pytesseract
+    
     try:
         image = Image.open(image_path)
         text = pytesseract.image_to_string(image)
@@ -63,88 +71,237 @@ def extract_text_with_ocr(image_path: str) -> str:
         raise Exception(f"Error performing OCR: {str(e)}")
 
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+# Below this many pages, spawning worker processes costs more than it saves
+PARALLEL_MIN_PAGES = 8
+
+
+def extract_page_content(page, page_num: int, with_tables: bool = False) -> Tuple[str, list]:
+    """
+    Extract the text section (and optionally the tables) of a single pdfplumber page.
+    
+    Args:
+        page: pdfplumber page object
+        page_num: 1-based page number (used for the section header)
+        with_tables: Whether to return the page's tables even when it has text
+        
+    Returns:
+        (section, tables): the page section (header + text or tables), or ""
+        if nothing was found, and the tables from page.extract_tables()
+        (empty unless with_tables is set or the page had no text)
+    """
+    page_text = page.extract_text()
+    has_text = page_text and len(page_text.strip()) > 10  # Meaningful text found
+    
+    # Tables are only needed for the section when no text was found
+    tables = page.extract_tables() if with_tables or not has_text else []
+    if has_text:
+        return f"\n--- Page {page_num} ---\n" + page_text, tables
+    if not tables:
+        return "", tables
+    
+    parts = [f"\n--- Page {page_num} (Tables) ---\n"]
+    for table in tables:
+        for row in table:
+            if row:
+                parts.append(" | ".join([str(cell) if cell else "" for cell in row]) + "\n")
+    return "".join(parts), tables
+
+
+def extract_page_range(pdf_path: str, first_page: int, last_page: int,
+                       with_tables: bool = False) -> List[Tuple[str, list]]:
+    """
+    Extract (section, tables) for pages first_page..last_page (1-based, inclusive).
+    
+    Opens the PDF independently so it can run in a worker process.
+    """
+    pdfplumber = _require("pdfplumber", "pdfplumber")
+    with pdfplumber.open(pdf_path) as pdf:
+        return [extract_page_content(pdf.pages[page_num - 1], page_num, with_tables)
+                for page_num in range(first_page, last_page + 1)]
+
+
+def split_page_ranges(num_pages: int, workers: int) -> List[tuple]:
+    """Split pages 1..num_pages into at most `workers` contiguous, balanced ranges."""
+    workers = max(1, min(workers, num_pages))
+    size, extra = divmod(num_pages, workers)
+    ranges = []
+    start = 1
+    for i in range(workers):
+        end = start + size - 1 + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end + 1
+    return ranges
+
+
+def ocr_unavailable_reason() -> Optional[str]:
+    """Return why PDF OCR cannot run here, or None if it can."""
+    if not ocr_available():
+        return "OCR support is not installed. Install with: pip install pytesseract pillow pdf2image"
+    if not pdf2image_available():
+        return "OCR requires pdf2image. Install with: pip install pdf2image"
+    # pdf2image requires Poppler (pdftoppm/pdfinfo) to be installed and available on PATH
+    if shutil.which("pdftoppm") is None or shutil.which("pdfinfo") is None:
+        return (
+            "OCR requires Poppler, but it was not found on your PATH.\n"
+            "- macOS: brew install poppler\n"
+            "- Ubuntu/Debian: sudo apt-get install poppler-utils\n"
+            "- Windows: install Poppler and add its bin folder to PATH\n"
+        )
+    return None
+
+
+def ocr_pdf_page(pdf_path: str, page_num: int, dpi: int = 200) -> str:
+    """
+    Rasterize a single PDF page and OCR it.
+    
+    Only this page is rendered, and the image is released before returning, so
+    a worker holds at most one page image in memory at a time.
+    
+    Returns:
+        The page section (header + OCR text), or "" if OCR found nothing
+    """
+    from pdf2image import convert_from_path
+    import pytesseract
+    
+    try:
+        images = convert_from_path(pdf_path, dpi=dpi, first_page=page_num, last_page=page_num)
+    except Exception as e:
+        raise Exception(
+            "OCR failed while converting PDF pages to images. "
+            "If you see 'Unable to get page count', install Poppler.\n"
+            f"Details: {str(e)}"
+        )
+    
+    try:
+        page_text = pytesseract.image_to_string(images[0]) if images else ""
+    finally:
+        for image in images:
+            image.close()
+    
+    if not page_text.strip():
+        return ""
+    return f"\n--- Page {page_num} (OCR) ---\n" + page_text
+
+
+def ocr_pdf_pages(pdf_path: str, page_nums: List[int], dpi: int = 200, workers: int = 1) -> List[str]:
+    """
+    OCR the given pages, in parallel worker processes when workers > 1.
+    
+    Returns:
+        One section per requested page, in the same order as page_nums
+    """
+    workers = max(1, min(workers, len(page_nums)))
+    if workers == 1:
+        sections = []
+        for page_num in page_nums:
+            print(f"Performing OCR on page {page_num}...")
+            sections.append(ocr_pdf_page(pdf_path, page_num, dpi))
+        return sections
+    
+    print(f"Performing OCR on {len(page_nums)} page(s) with {workers} worker process(es)...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(ocr_pdf_page, [pdf_path] * len(page_nums), page_nums, [dpi] * len(page_nums)))
+
+
+def extract_text_from_pdf(pdf_path: str, workers: Optional[int] = None,
+                          ocr_dpi: int = 200, ocr_workers: Optional[int] = None) -> str:
     """
     Extract text from a PDF file. Tries text extraction first, then OCR if needed.
     
+    See extract_pdf_content for the parameters.
+    
+    Returns:
+        Extracted text as a string
+    """
+    return extract_pdf_content(pdf_path, workers, ocr_dpi, ocr_workers)[0]
+
+
+def extract_pdf_content(pdf_path: str, workers: Optional[int] = None, ocr_dpi: int = 200,
+                        ocr_workers: Optional[int] = None, with_tables: bool = False) -> Tuple[str, list]:
+    """
+    Extract text (and optionally tables) from a PDF file. Tries text extraction first, then OCR if needed.
+    
+    Large PDFs are split into page ranges that are extracted in parallel worker
+    processes, each opening the PDF on its own; results are joined in page order.
+    Pages that yield no text (e.g. scanned pages in a mixed report) are
+    rasterized one at a time at `ocr_dpi` and OCRed by a pool of workers.
+    
     Args:
         pdf_path: Path to the PDF file
+        workers: Number of worker processes (default: CPU count; 1 disables the pool)
+        ocr_dpi: Resolution used to rasterize pages for OCR
+        ocr_workers: Number of OCR worker processes (default: same as workers)
+        with_tables: Also return every table found by page.extract_tables()
         
     Returns:
-        Extracted text as a string
+        (text, tables) where tables is a list of tables (lists of rows), in page order
     """
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"PDF file not found: {pdf_path}")
     
-    text = ""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    pdfplumber = _require("pdfplumber", "pdfplumber")
     try:
         with pdfplumber.open(pdf_path) as pdf:
             num_pages = len(pdf.pages)
             
             print(f"Processing PDF with {num_pages} page(s)...")
             
-            for page_num, page in enumerate(pdf.pages, 1):
-                page_text = page.extract_text()
-                if page_text and len(page_text.strip()) > 10:  # Meaningful text found
-                    text += f"\n--- Page {page_num} ---\n"
-                    text += page_text
-                else:
-                    # Try extracting tables if no text found
-                    tables = page.extract_tables()
-                    if tables:
-                        text += f"\n--- Page {page_num} (Tables) ---\n"
-                        for table in tables:
-                            for row in table:
-                                if row:
-                                    text += " | ".join([str(cell) if cell else "" for cell in row]) + "\n"
+            parallel = workers > 1 and num_pages >= PARALLEL_MIN_PAGES
+            if not parallel:
+                pages = [extract_page_content(page, page_num, with_tables)
+                         for page_num, page in enumerate(pdf.pages, 1)]
+        
+        if parallel:
+            ranges = split_page_ranges(num_pages, workers)
+            print(f"Extracting pages with {len(ranges)} worker process(es)...")
+            with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+                results = pool.map(
+                    extract_page_range,
+                    [pdf_path] * len(ranges),
+                    [first for first, _ in ranges],
+                    [last for _, last in ranges],
+                    [with_tables] * len(ranges),
+                )
+                pages = [page for range_pages in results for page in range_pages]
                 
     except Exception as e:
         raise Exception(f"Error reading PDF: {str(e)}")
     
-    # If no text extracted and OCR is available, try OCR
-    if not text.strip():
-        if not OCR_AVAILABLE:
-            raise ValueError(
-                "No text could be extracted from the PDF (likely scanned/image-based). "
-                "OCR support is not installed. Install with: pip install pytesseract pillow pdf2image"
-            )
-        if not PDF2IMAGE_AVAILABLE:
-            raise ValueError(
-                "No text could be extracted from the PDF (likely scanned/image-based). "
-                "OCR requires pdf2image. Install with: pip install pdf2image"
-            )
-
-        # pdf2image requires Poppler (pdftoppm/pdfinfo) to be installed and available on PATH
-        if shutil.which("pdftoppm") is None or shutil.which("pdfinfo") is None:
+    sections = [section for section, _ in pages]
+    tables = [table for _, page_tables in pages for table in page_tables]
+    
+    # Pages with neither text nor tables are likely scanned: OCR just those pages
+    ocr_pages = [page_num for page_num, section in enumerate(sections, 1) if not section]
+    if ocr_pages:
+        all_scanned = len(ocr_pages) == len(sections)
+        missing = ocr_unavailable_reason()
+        if missing and all_scanned:
             raise ValueError(
-                "OCR requires Poppler, but it was not found on your PATH.\n"
-                "- macOS: brew install poppler\n"
-                "- Ubuntu/Debian: sudo apt-get install poppler-utils\n"
-                "- Windows: install Poppler and add its bin folder to PATH\n"
-            )
-
-        print("No text found in PDF. Attempting OCR on image-based PDF...")
-        try:
-            images = convert_from_path(pdf_path)
-            for page_num, image in enumerate(images, 1):
-                print(f"Performing OCR on page {page_num}...")
-                page_text = pytesseract.image_to_string(image)
-                if page_text.strip():
-                    text += f"\n--- Page {page_num} (OCR) ---\n"
-                    text += page_text
-        except Exception as e:
-            raise Exception(
-                "OCR failed while converting PDF pages to images. "
-                "If you see 'Unable to get page count', install Poppler.\n"
-                f"Details: {str(e)}"
+                "No text could be extracted from the PDF (likely scanned/image-based). " + missing
             )
+        elif missing:
+            print(f"Warning: skipping OCR for {len(ocr_pages)} page(s) without text. {missing}")
+        else:
+            if all_scanned:
+                print("No text found in PDF. Attempting OCR on image-based PDF...")
+            else:
+                print(f"Attempting OCR on {len(ocr_pages)} page(s) without text...")
+            
+            ocr_workers = workers if ocr_workers is None else ocr_workers
+            for page_num, section in zip(ocr_pages, ocr_pdf_pages(pdf_path, ocr_pages, ocr_dpi, ocr_workers)):
+                sections[page_num - 1] = section
+    
+    text = "".join(sections)
     
     if not text.strip():
         raise ValueError(
             "No text could be extracted from the PDF. It may be corrupted, encrypted, or OCR failed."
         )
     
-    return text
+    return text, tables
 
 
 def extract_text_from_image(image_path: str) -> str:
@@ -160,7 +317,7 @@ def extract_text_from_image(image_path: str) -> str:
     if not os.path.exists(image_path):
         raise FileNotFoundError(f"Image file not found: {image_path}")
     
-    if not OCR_AVAILABLE:
+    if not ocr_available():
         raise Exception("OCR is not available. Please install pytesseract and pillow.")
     
     print("Performing OCR on image...")
@@ -185,9 +342,11 @@ def extract_text_from_docx(docx_path: str) -> str:
     if not os.path.exists(docx_path):
         raise FileNotFoundError(f"Word document not found: {docx_path}")
     
-    if not DOCX_AVAILABLE:
+    if not docx_available():
         raise Exception("python-docx is not available. Please install it using: pip install python-docx")
     
+    from docx import Document
+    
     try:
         doc = Document(docx_path)
         text = ""
@@ -211,13 +370,15 @@ def extract_text_from_docx(docx_path: str) -> str:
         raise Exception(f"Error reading Word document: {str(e)}")
 
 
-def extract_text_from_file(file_path: str) -> str:
+def extract_text_from_file(file_path: str, workers: Optional[int] = None, ocr_dpi: int = 200) -> str:
     """
     Extract text from a file (PDF, JPEG, PNG, or Word document).
     Automatically detects file type and uses appropriate extraction method.
     
     Args:
         file_path: Path to the file
+        workers: Worker processes for PDF page extraction and OCR (default: CPU count)
+        ocr_dpi: Resolution used to rasterize scanned PDF pages for OCR
         
     Returns:
         Extracted text as a string
@@ -228,7 +389,7 @@ def extract_text_from_file(file_path: str) -> str:
     file_ext = Path(file_path).suffix.lower()
     
     if file_ext == '.pdf':
-        return extract_text_from_pdf(file_path)
+        return extract_text_from_pdf(file_path, workers=workers, ocr_dpi=ocr_dpi)
     elif file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif']:
         return extract_text_from_image(file_path)
     elif file_ext in ['.docx', '.doc']:
@@ -239,68 +400,30 @@ def extract_text_from_file(file_path: str) -> str:
         raise ValueError(f"Unsupported file format: {file_ext}. Supported formats: PDF, JPEG, PNG, DOCX")
 
 
-def chunk_text(text: str, chunk_size: int = 3000, overlap: int = 200) -> List[str]:
+def chunk_text(text: str, max_tokens: int = 750, overlap_tokens: int = 50) -> List[str]:
     """
     Split text into chunks with overlap to maintain context.
     
+    Chunks break at paragraph, sentence or line (table row) boundaries and are
+    sized in approximate tokens; see text_chunker.chunk_text.
+    
     Args:
         text: The text to chunk
-        chunk_size: Maximum size of each chunk
-        overlap: Number of characters to overlap between chunks
+        max_tokens: Approximate maximum tokens per chunk
+        overlap_tokens: Approximate tokens to overlap between chunks
         
     Returns:
         List of text chunks
     """
-    if len(text) <= chunk_size:
-        return [text]
-    
-    chunks = []
-    start = 0
-    
-    while start < len(text):
-        end = start + chunk_size
-        
-        # Try to break at a sentence or paragraph boundary
-        if end < len(text):
-            # Look for sentence endings
-            for break_char in ['. ', '\n\n', '\n']:
-                last_break = text.rfind(break_char, start, end)
-                if last_break != -1:
-                    end = last_break + len(break_char)
-                    break
-        
-        chunk = text[start:end].strip()
-        if chunk:
-            chunks.append(chunk)
-        
-        start = end - overlap  # Overlap for context
-    
-    return chunks
+    return text_chunker.chunk_text(text, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
 
 
-def analyze_with_llm(text_chunks: List[str], api_key: str, base_url: str = None, model: str = None) -> str:
-    """
-    Send text chunks to NVIDIA LLM and get a brief medical summary.
-    
-    Args:
-        text_chunks: List of text chunks from the PDF
-        api_key: NVIDIA API key
-        base_url: NVIDIA API base URL (optional, defaults to NIM endpoint)
-        model: Model name (optional, defaults to llama-3.1-8b-instruct)
-        
-    Returns:
-        Brief medical summary
-    """
-    # Combine all chunks for analysis
-    full_text = "\n\n".join(text_chunks)
-    
-    # Truncate if too long (NVIDIA API has token limits)
-    max_chars = 12000  # Roughly 3000 tokens
-    if len(full_text) > max_chars:
-        print(f"Warning: Text is very long ({len(full_text)} chars). Truncating to {max_chars} chars for analysis.")
-        full_text = full_text[:max_chars] + "\n\n[... text truncated ...]"
-    
-    prompt = """You are a medical assistant. Analyze the following medical report and provide a brief, concise summary of the key findings.
+# Roughly 3000 tokens; the most report text sent in a single request
+MAX_PROMPT_CHARS = 12000
+
+SYSTEM_PROMPT = "You are a helpful medical assistant that provides brief, clear summaries of medical reports."
+
+SUMMARY_PROMPT = """You are a medical assistant. Analyze the following medical report and provide a brief, concise summary of the key findings.
 
 Focus on:
 - Abnormal values (high/low indicators)
@@ -313,8 +436,84 @@ Format your response as a brief, easy-to-understand summary. Use simple language
 Medical Report:
 {}
 
-Brief Summary:""".format(full_text)
+Brief Summary:"""
+
+CHUNK_PROMPT = """You are a medical assistant. The following is one part of a longer medical report.
+List the key findings in this part only: abnormal values (with their numbers and reference ranges), medical conditions or concerns, and test results that need attention.
+Be concise. If this part contains nothing clinically relevant, answer "No significant findings."
+
+Report Part:
+{}
+
+Key Findings:"""
+
+COMBINE_PROMPT = """You are a medical assistant. The following are key findings extracted from consecutive parts of one medical report.
+Merge them into a single list of key findings, removing duplicates and keeping every abnormal value.
+
+Findings:
+{}
+
+Merged Findings:"""
+
+
+# Non-lab report text sent along with the abnormal values in structured mode
+STRUCTURED_CONTEXT_CHARS = 3000
+
+STRUCTURED_PROMPT = """You are a medical assistant. Lab values from a medical report have already been parsed and checked against their reference ranges.
+Write a brief, easy-to-understand summary of the key findings for the patient. Use simple language like:
+"Cholesterol is high, blood pressure is low, etc."
+
+Abnormal Lab Values:
+{abnormal}
+
+({normal_count} other lab values were within their reference ranges.)
+
+Other Report Text (findings, impressions, notes):
+{context}
+
+Brief Summary:"""
+
+
+HTTP_POOL_SIZE = 16
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """
+    Shared requests.Session for LLM calls, created on first use.
     
+    Reusing one session keeps TLS connections to the API alive across calls
+    and threads instead of reconnecting for every request.
+    """
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            requests = _require("requests", "requests")
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+
+def call_llm(prompt: str, api_key: str, base_url: str = None, model: str = None,
+             max_tokens: int = 500) -> str:
+    """
+    Send a single prompt to the NVIDIA chat completions endpoint.
+    
+    Args:
+        prompt: User prompt
+        api_key: NVIDIA API key
+        base_url: NVIDIA API base URL (optional, defaults to NIM endpoint)
+        model: Model name (optional, defaults to llama-3.1-8b-instruct)
+        max_tokens: Maximum tokens to generate
+        
+    Returns:
+        The model's reply
+    """
     # Default NVIDIA NIM endpoint
     if base_url is None:
         base_url = "https://integrate.api.nvidia.com/v1"
@@ -334,18 +533,18 @@ Brief Summary:""".format(full_text)
     payload = {
         "model": model,
         "messages": [
-            {"role": "system", "content": "You are a helpful medical assistant that provides brief, clear summaries of medical reports."},
+            {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": prompt}
         ],
         "temperature": 0.3,
-        "max_tokens": 500,
+        "max_tokens": max_tokens,
         "top_p": 0.7,
         "stream": False
     }
     
+    requests = _require("requests", "requests")
     try:
-        print("Sending to NVIDIA LLM for analysis...")
-        response = requests.post(
+        response = get_http_session().post(
             api_url,
             json=payload,
             headers=headers,
@@ -357,8 +556,7 @@ Brief Summary:""".format(full_text)
         
         # Extract the summary from NVIDIA API response
         if "choices" in result and len(result["choices"]) > 0:
-            summary = result["choices"][0]["message"]["content"].strip()
-            return summary
+            return result["choices"][0]["message"]["content"].strip()
         else:
             raise Exception("Unexpected response format from NVIDIA API")
         
@@ -374,6 +572,464 @@ Brief Summary:""".format(full_text)
         raise Exception(f"Error calling NVIDIA API: {str(e)}")
 
 
+def group_by_size(texts: List[str], max_chars: int) -> List[List[str]]:
+    """Group consecutive texts so each group's joined length stays within max_chars."""
+    groups = [[]]
+    size = 0
+    for text in texts:
+        if groups[-1] and size + len(text) + 2 > max_chars:
+            groups.append([])
+            size = 0
+        groups[-1].append(text)
+        size += len(text) + 2
+    return groups
+
+
+def map_reduce_summarize(text_chunks: List[str], api_key: str, base_url: str = None,
+                         model: str = None, max_workers: int = 4,
+                         max_chars: int = MAX_PROMPT_CHARS) -> str:
+    """
+    Summarize a long report without truncation.
+    
+    Map: each chunk is summarized concurrently (at most max_workers requests
+    in flight). Reduce: partial summaries are merged in one final call; if they
+    are still too long for one prompt they are merged in groups first, level by
+    level, with each level's groups also run concurrently.
+    
+    Returns:
+        Brief medical summary
+    """
+    def run_all(prompts: List[str]) -> List[str]:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(prompts)))) as pool:
+            return list(pool.map(lambda prompt: call_llm(prompt, api_key, base_url, model), prompts))
+    
+    print(f"Summarizing {len(text_chunks)} chunk(s) with up to {max_workers} concurrent request(s)...")
+    partials = run_all([CHUNK_PROMPT.format(chunk) for chunk in text_chunks])
+    
+    level = 1
+    while sum(len(p) + 2 for p in partials) > max_chars and len(partials) > 1:
+        groups = group_by_size(partials, max_chars)
+        if len(groups) == len(partials):
+            # Every partial alone fills a prompt: merge pairwise so the tree still shrinks
+            groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+        print(f"Merging {len(partials)} partial summaries into {len(groups)} (level {level})...")
+        partials = run_all([COMBINE_PROMPT.format("\n\n".join(group)) for group in groups])
+        level += 1
+    
+    findings = "\n\n".join(partials)
+    if len(findings) > max_chars:
+        findings = findings[:max_chars] + "\n\n[... findings truncated ...]"
+    
+    print("Sending combined findings to NVIDIA LLM for the final summary...")
+    return call_llm(SUMMARY_PROMPT.format(findings), api_key, base_url, model)
+
+
+def analyze_with_llm(text_chunks: List[str], api_key: str, base_url: str = None, model: str = None,
+                     mode: str = "auto", max_workers: int = 4) -> str:
+    """
+    Send text chunks to NVIDIA LLM and get a brief medical summary.
+    
+    Args:
+        text_chunks: List of text chunks from the PDF
+        api_key: NVIDIA API key
+        base_url: NVIDIA API base URL (optional, defaults to NIM endpoint)
+        model: Model name (optional, defaults to llama-3.1-8b-instruct)
+        mode: "single" (one request, truncating long reports), "map-reduce"
+              (summarize chunks concurrently, then merge) or "auto" (single
+              when the report fits in one prompt, map-reduce otherwise)
+        max_workers: Maximum concurrent requests in map-reduce mode
+        
+    Returns:
+        Brief medical summary
+    """
+    # Combine all chunks for analysis
+    full_text = "\n\n".join(text_chunks)
+    
+    if mode == "auto":
+        mode = "map-reduce" if len(full_text) > MAX_PROMPT_CHARS and len(text_chunks) > 1 else "single"
+    
+    if mode == "map-reduce":
+        return map_reduce_summarize(text_chunks, api_key, base_url, model, max_workers)
+    
+    # Truncate if too long (NVIDIA API has token limits)
+    if len(full_text) > MAX_PROMPT_CHARS:
+        print(f"Warning: Text is very long ({len(full_text)} chars). Truncating to {MAX_PROMPT_CHARS} chars for analysis.")
+        full_text = full_text[:MAX_PROMPT_CHARS] + "\n\n[... text truncated ...]"
+    
+    print("Sending to NVIDIA LLM for analysis...")
+    return call_llm(SUMMARY_PROMPT.format(full_text), api_key, base_url, model)
+
+
+# Bump whenever extraction output changes, so cached text from older versions is not reused
+EXTRACTOR_VERSION = "2"
+
+DEFAULT_MODEL = "meta/llama-3.1-8b-instruct"
+
+NO_LAB_VALUES_SUMMARY = ("No lab values with reference ranges were recognized in this report, "
+                         "and LLM summarization is disabled (--llm never).")
+
+
+def summarize_lab_values(records: List[dict], context_lines: List[str], api_key: str,
+                         base_url: str = None, model: str = None, use_llm: str = "auto") -> str:
+    """
+    Summarize parsed lab values, sending only the abnormal ones to the LLM.
+    
+    Args:
+        records: Lab records from lab_values
+        context_lines: Report lines that were not lab values (findings, notes)
+        api_key: NVIDIA API key
+        base_url: NVIDIA API base URL (optional)
+        model: Model name (optional)
+        use_llm: "always", "never", or "auto" (only when something is abnormal)
+        
+    Returns:
+        Brief medical summary
+    """
+    flagged = lab_values.abnormal(records)
+    if use_llm == "never" or (use_llm == "auto" and not flagged):
+        return lab_values.local_summary(records)
+    
+    abnormal_lines = "\n".join(lab_values.format_record(record) for record in flagged) or "None"
+    context = "\n".join(context_lines)
+    if len(context) > STRUCTURED_CONTEXT_CHARS:
+        context = context[:STRUCTURED_CONTEXT_CHARS] + "\n[... context truncated ...]"
+    
+    prompt = STRUCTURED_PROMPT.format(
+        abnormal=abnormal_lines,
+        normal_count=len(records) - len(flagged),
+        context=context or "None"
+    )
+    print(f"Sending {len(flagged)} abnormal lab value(s) to NVIDIA LLM ({len(prompt)} chars)...")
+    return call_llm(prompt, api_key, base_url, model)
+
+
+def prepare_report(file_path: str, model: str = None, mode: str = "auto",
+                   workers: Optional[int] = None, ocr_dpi: int = 200,
+                   cache: Optional[ReportCache] = None, structured: bool = False,
+                   use_llm: str = "auto") -> dict:
+    """
+    First stage of analyze_report: cache lookup and text extraction (CPU-bound).
+    
+    Returns a dictionary that can be passed to summarize_report, possibly in
+    another process: it carries the extracted text and tables, or the cached
+    summary if one was found.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+    
+    model = model or DEFAULT_MODEL
+    result = {"file": file_path, "summary": None, "text_chars": None, "chunks": None,
+              "lab_values": None, "text_cached": False, "summary_cached": False,
+              "timings": {}, "text": None, "tables": [], "summary_key": None}
+    timings = result["timings"]
+    
+    # Structured runs need the PDF's tables too: they are cached with the text, as JSON
+    with_tables = structured and Path(file_path).suffix.lower() == '.pdf'
+    text_key = None
+    if cache is not None:
+        started = time.perf_counter()
+        file_hash = file_sha256(file_path)
+        text_key = cache.text_key(file_hash, EXTRACTOR_VERSION,
+                                  f"dpi={ocr_dpi}" + (";tables" if with_tables else ""))
+        prompt_hash = text_sha256(SYSTEM_PROMPT, SUMMARY_PROMPT, CHUNK_PROMPT, COMBINE_PROMPT,
+                                  STRUCTURED_PROMPT)
+        result["summary_key"] = cache.summary_key(file_hash, EXTRACTOR_VERSION, model, prompt_hash,
+                                                  f"dpi={ocr_dpi};mode={mode};chunker=tokens-v1;"
+                                                  f"structured={structured};llm={use_llm}")
+        
+        summary = cache.get(result["summary_key"])
+        timings["hash"] = time.perf_counter() - started
+        if summary is not None:
+            result.update(summary=summary, summary_cached=True)
+            return result
+    
+    started = time.perf_counter()
+    tables = []
+    cached = cache.get(text_key) if cache is not None else None
+    if cached is not None:
+        result["text_cached"] = True
+        if with_tables:
+            entry = json.loads(cached)
+            text, tables = entry["text"], entry["tables"]
+        else:
+            text = cached
+    else:
+        if with_tables:
+            text, tables = extract_pdf_content(file_path, workers=workers, ocr_dpi=ocr_dpi, with_tables=True)
+        else:
+            text = extract_text_from_file(file_path, workers=workers, ocr_dpi=ocr_dpi)
+        if cache is not None:
+            cache.put(text_key, json.dumps({"text": text, "tables": tables}) if with_tables else text)
+    timings["extract"] = time.perf_counter() - started
+    result.update(text=text, tables=tables, text_chars=len(text))
+    return result
+
+
+def summarize_report(prepared: dict, api_key: str, base_url: str = None, model: str = None,
+                     mode: str = "auto", llm_workers: int = 4,
+                     cache: Optional[ReportCache] = None, structured: bool = False,
+                     use_llm: str = "auto") -> dict:
+    """
+    Second stage of analyze_report: lab value parsing, chunking and the LLM calls.
+    
+    Takes the dictionary returned by prepare_report and returns it completed,
+    without the intermediate text, tables and cache key.
+    """
+    result = dict(prepared)
+    text = result.pop("text")
+    tables = result.pop("tables")
+    summary_key = result.pop("summary_key")
+    timings = result["timings"] = dict(result["timings"])
+    if result["summary_cached"]:
+        return result
+    
+    model = model or DEFAULT_MODEL
+    started = time.perf_counter()
+    
+    # --llm never always takes the local path, structured or not
+    if structured or use_llm == "never":
+        text_records, context_lines = lab_values.parse_text(text)
+        records = lab_values.merge_records(lab_values.parse_tables(tables), text_records)
+        result["lab_values"] = records
+        timings["parse"] = time.perf_counter() - started
+        if records:
+            print(f"Parsed {len(records)} lab value(s), {len(lab_values.abnormal(records))} abnormal\n")
+            started = time.perf_counter()
+            summary = summarize_lab_values(records, context_lines, api_key, base_url, model, use_llm)
+            timings["summarize"] = time.perf_counter() - started
+            if cache is not None:
+                cache.put(summary_key, summary)
+            result["summary"] = summary
+            return result
+        if use_llm == "never":
+            print("No lab values recognized; LLM disabled, so no summary is generated\n")
+            summary = NO_LAB_VALUES_SUMMARY
+            if cache is not None:
+                cache.put(summary_key, summary)
+            result["summary"] = summary
+            return result
+        print("No lab values recognized; falling back to the full-text summary\n")
+        started = time.perf_counter()
+    
+    chunks = chunk_text(text)
+    result["chunks"] = len(chunks)
+    timings["chunk"] = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    summary = analyze_with_llm(chunks, api_key, base_url, model, mode=mode, max_workers=llm_workers)
+    timings["summarize"] = time.perf_counter() - started
+    if cache is not None:
+        cache.put(summary_key, summary)
+    result["summary"] = summary
+    return result
+
+
+def analyze_report(file_path: str, api_key: str, base_url: str = None, model: str = None,
+                   mode: str = "auto", llm_workers: int = 4, workers: Optional[int] = None,
+                   ocr_dpi: int = 200, cache: Optional[ReportCache] = None,
+                   structured: bool = False, use_llm: str = "auto") -> dict:
+    """
+    Extract, chunk and summarize one report, reusing cached results when possible.
+    
+    Text is cached by the file's SHA-256 and EXTRACTOR_VERSION; summaries also
+    by model, mode and a hash of the prompts, so a re-upload of the same file
+    returns without extraction, OCR or an LLM call.
+    
+    In structured mode lab values are parsed locally from tables and text
+    lines; only the abnormal ones (plus the non-lab text as context) are sent
+    to the LLM, and the LLM call is skipped entirely when use_llm allows it.
+    Reports without recognizable lab values fall back to the chunked summary.
+    
+    Args:
+        file_path: Path to the report file
+        api_key: NVIDIA API key
+        base_url: NVIDIA API base URL (optional)
+        model: Model name (optional)
+        mode: Summarization mode (see analyze_with_llm)
+        llm_workers: Maximum concurrent LLM requests in map-reduce mode
+        workers: Worker processes for PDF extraction and OCR
+        ocr_dpi: Resolution for rasterizing scanned PDF pages
+        cache: ReportCache to read/write (None disables caching)
+        structured: Parse lab values locally and send only the abnormal ones
+        use_llm: In structured mode: "always", "never", or "auto" (only if something is abnormal)
+        
+    Returns:
+        Dictionary with file, summary, text_chars, chunks, lab_values, text_cached,
+        summary_cached and timings (seconds per stage)
+    """
+    prepared = prepare_report(file_path, model, mode, workers=workers, ocr_dpi=ocr_dpi,
+                              cache=cache, structured=structured, use_llm=use_llm)
+    return summarize_report(prepared, api_key, base_url, model, mode=mode, llm_workers=llm_workers,
+                            cache=cache, structured=structured, use_llm=use_llm)
+
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.docx')
+
+
+def is_batch_target(target: str) -> bool:
+    """True if target is a directory or a glob pattern rather than a single file."""
+    return os.path.isdir(target) or (not os.path.exists(target) and glob.has_magic(target))
+
+
+def find_report_files(target: str) -> List[str]:
+    """
+    List the supported report files under a directory (recursively) or matching a glob.
+    
+    Returns:
+        Sorted list of file paths
+    """
+    if os.path.isdir(target):
+        paths = (str(path) for path in Path(target).rglob("*"))
+    else:
+        paths = glob.iglob(target, recursive=True)
+    return sorted(path for path in paths
+                  if os.path.isfile(path) and Path(path).suffix.lower() in SUPPORTED_EXTENSIONS)
+
+
+_worker_cache = None
+
+
+def _init_batch_worker(cache_dir: Optional[str], use_cache: bool):
+    global _worker_cache
+    _worker_cache = ReportCache(cache_dir) if use_cache else None
+    # Per-page progress from many workers would drown the batch log; errors are reported per file
+    sys.stdout = open(os.devnull, "w")
+
+
+def _prepare_in_worker(file_path: str, options: dict) -> dict:
+    # Runs in a batch worker process; extraction is serial inside each worker
+    return prepare_report(file_path, workers=1, cache=_worker_cache, **options)
+
+
+def _batch_record(result: dict, structured: bool) -> dict:
+    record = {"file": result["file"], "status": "ok"}
+    record.update((key, result[key]) for key in
+                  ("summary", "text_chars", "chunks", "text_cached", "summary_cached"))
+    if structured:
+        record["lab_values"] = result["lab_values"]
+    record["timings"] = {stage: round(seconds, 3) for stage, seconds in result["timings"].items()}
+    return record
+
+
+def load_completed_files(output_path: str) -> set:
+    """Files already summarized successfully in an existing NDJSON output."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok":
+                completed.add(record["file"])
+    return completed
+
+
+def analyze_batch(file_paths: List[str], output_path: str, api_key: str, base_url: str = None,
+                  model: str = None, mode: str = "auto", llm_workers: int = 4,
+                  extract_workers: Optional[int] = None, llm_concurrency: int = 4,
+                  ocr_dpi: int = 200, cache_dir: Optional[str] = None, use_cache: bool = True,
+                  structured: bool = False, use_llm: str = "auto", resume: bool = False) -> dict:
+    """
+    Analyze many reports in one process, writing one JSON line per file.
+    
+    Files are extracted in a pool of extract_workers processes; each extracted
+    report is summarized as soon as it is ready by one of llm_concurrency
+    threads sharing one HTTP session. The number of extracted reports waiting
+    for a summary is bounded, so memory stays flat on large archives.
+    
+    Each output line has the file, status ("ok" or "error"), summary and
+    per-stage timings in seconds (hash, extract, queue, parse, chunk,
+    summarize, total); failures record the stage and error instead.
+    
+    Args:
+        file_paths: Report files to analyze
+        output_path: NDJSON file to write
+        api_key: NVIDIA API key
+        base_url: NVIDIA API base URL (optional)
+        model: Model name (optional)
+        mode: Summarization mode (see analyze_with_llm)
+        llm_workers: Concurrent LLM requests per report in map-reduce mode
+        extract_workers: Extraction processes (default: CPU count)
+        llm_concurrency: Reports being summarized at the same time
+        ocr_dpi: Resolution for rasterizing scanned PDF pages
+        cache_dir: ReportCache directory (optional)
+        use_cache: Read/write the report cache
+        structured: Parse lab values locally (see analyze_report)
+        use_llm: In structured mode: "always", "never", or "auto"
+        resume: Append to output_path, skipping files it already has results for
+        
+    Returns:
+        Dictionary with counts of ok, error and skipped files
+    """
+    extract_workers = max(1, extract_workers or os.cpu_count() or 1)
+    llm_concurrency = max(1, llm_concurrency)
+    model = model or DEFAULT_MODEL
+    options = {"model": model, "mode": mode, "ocr_dpi": ocr_dpi,
+               "structured": structured, "use_llm": use_llm}
+    cache = ReportCache(cache_dir) if use_cache else None
+    
+    completed = load_completed_files(output_path) if resume else set()
+    queue = [path for path in file_paths if path not in completed]
+    queue.reverse()
+    stats = {"ok": 0, "error": 0, "skipped": len(file_paths) - len(queue)}
+    total = len(queue)
+    # Reports extracted but not yet summarized; extraction pauses beyond this
+    max_waiting = 2 * llm_concurrency
+    
+    def summarize(prepared: dict, ready: float) -> dict:
+        prepared["timings"]["queue"] = time.perf_counter() - ready
+        return summarize_report(prepared, api_key, base_url, model, mode=mode,
+                                llm_workers=llm_workers, cache=cache,
+                                structured=structured, use_llm=use_llm)
+    
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=extract_workers, initializer=_init_batch_worker,
+                                initargs=(cache_dir, use_cache)) as extractors, \
+            ThreadPoolExecutor(max_workers=llm_concurrency) as summarizers:
+        extracting = {}
+        summarizing = {}
+        
+        def write(record: dict):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            stats[record["status"]] += 1
+            done = stats["ok"] + stats["error"]
+            status = "✅" if record["status"] == "ok" else f"❌ {record['error']}"
+            print(f"[{done}/{total}] {record['file']} {status}")
+        
+        while queue or extracting or summarizing:
+            while queue and len(extracting) < extract_workers and len(summarizing) < max_waiting:
+                path = queue.pop()
+                extracting[extractors.submit(_prepare_in_worker, path, options)] = (path, time.perf_counter())
+            
+            finished, _ = wait(list(extracting) + list(summarizing), return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in extracting:
+                    path, submitted = extracting.pop(future)
+                    try:
+                        prepared = future.result()
+                    except Exception as e:
+                        write({"file": path, "status": "error", "stage": "extract", "error": str(e),
+                               "timings": {"total": round(time.perf_counter() - submitted, 3)}})
+                        continue
+                    summary_future = summarizers.submit(summarize, prepared, time.perf_counter())
+                    summarizing[summary_future] = (path, submitted)
+                else:
+                    path, submitted = summarizing.pop(future)
+                    try:
+                        record = _batch_record(future.result(), structured)
+                    except Exception as e:
+                        record = {"file": path, "status": "error", "stage": "summarize", "error": str(e),
+                                  "timings": {}}
+                    record["timings"]["total"] = round(time.perf_counter() - submitted, 3)
+                    write(record)
+    
+    return stats
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Analyze a medical report PDF and generate a brief summary",
@@ -383,6 +1039,8 @@ Example usage:
   python medical_report_analyzer.py /path/to/report.pdf
   python medical_report_analyzer.py /path/to/report.png
   python medical_report_analyzer.py /path/to/report.docx
+  python medical_report_analyzer.py /path/to/reports/ --output results.ndjson
+  python medical_report_analyzer.py "archive/**/*.pdf" --batch-workers 8 --llm-concurrency 8
   
 Supported formats: PDF, JPEG, PNG, DOCX
   
@@ -399,7 +1057,8 @@ Available models:
     parser.add_argument(
         "file_path",
         type=str,
-        help="Path to the medical report file (PDF, JPEG, PNG, or Word document)"
+        help="Path to the medical report file (PDF, JPEG, PNG, or Word document), "
+             "or a directory / glob pattern to analyze many reports in batch mode"
     )
     parser.add_argument(
         "--api-key",
@@ -419,6 +1078,77 @@ Available models:
         default="meta/llama-3.1-8b-instruct",
         help="NVIDIA model to use (default: meta/llama-3.1-8b-instruct). Examples: meta/llama-3.1-70b-instruct, mistralai/mistral-7b-instruct-v0.2"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for PDF page extraction and OCR (default: CPU count, 1 = serial)"
+    )
+    parser.add_argument(
+        "--ocr-dpi",
+        type=int,
+        default=200,
+        help="Resolution for rasterizing scanned PDF pages before OCR (default: 200)"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["auto", "single", "map-reduce"],
+        default="auto",
+        help="Summarization mode: single request (truncates long reports), map-reduce over chunks, "
+             "or auto (map-reduce only when the report does not fit in one request). Default: auto"
+    )
+    parser.add_argument(
+        "--llm-workers",
+        type=int,
+        default=4,
+        help="Maximum concurrent LLM requests in map-reduce mode (default: 4)"
+    )
+    parser.add_argument(
+        "--structured",
+        action="store_true",
+        help="Parse lab values locally and send only the abnormal ones to the LLM"
+    )
+    parser.add_argument(
+        "--llm",
+        choices=["auto", "always", "never"],
+        default="auto",
+        help="With --structured: call the LLM always, never (local summary only; also "
+             "applies without --structured), or auto (only when abnormal values are found). Default: auto"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Directory for cached text/summaries (default: MEDICAL_REPORT_CACHE_DIR or ~/.cache/aura/medical_reports)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-extract and re-summarize, ignoring the cache"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="analysis_results.ndjson",
+        help="Batch mode: NDJSON file with one result per report (default: analysis_results.ndjson)"
+    )
+    parser.add_argument(
+        "--batch-workers",
+        type=int,
+        default=None,
+        help="Batch mode: processes extracting reports in parallel (default: CPU count)"
+    )
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=4,
+        help="Batch mode: reports summarized at the same time (default: 4)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Batch mode: append to --output, skipping reports it already has results for"
+    )
     
     args = parser.parse_args()
     
@@ -431,6 +1161,28 @@ Available models:
         print("\nGet your API key from: https://build.nvidia.com/")
         sys.exit(1)
     
+    if is_batch_target(args.file_path):
+        file_paths = find_report_files(args.file_path)
+        if not file_paths:
+            print(f"Error: No supported report files found in {args.file_path}", file=sys.stderr)
+            sys.exit(1)
+        
+        print(f"\n{'='*60}")
+        print(f"Medical Report Analyzer - batch of {len(file_paths)} file(s)")
+        print(f"{'='*60}\n")
+        started = time.perf_counter()
+        stats = analyze_batch(
+            file_paths, args.output, api_key, args.base_url, args.model,
+            mode=args.mode, llm_workers=args.llm_workers,
+            extract_workers=args.batch_workers, llm_concurrency=args.llm_concurrency,
+            ocr_dpi=args.ocr_dpi, cache_dir=args.cache_dir, use_cache=not args.no_cache,
+            structured=args.structured, use_llm=args.llm, resume=args.resume
+        )
+        print(f"\n{stats['ok']} succeeded, {stats['error']} failed, {stats['skipped']} skipped "
+              f"in {time.perf_counter() - started:.1f}s")
+        print(f"Results written to {args.output}")
+        sys.exit(1 if stats["error"] else 0)
+    
     try:
         # Extract text from file
         print(f"\n{'='*60}")
@@ -438,15 +1190,24 @@ Available models:
         print(f"{'='*60}\n")
         print(f"File: {args.file_path}\n")
         
-        text = extract_text_from_file(args.file_path)
-        print(f"Extracted {len(text)} characters from file\n")
-        
-        # Chunk the text
-        chunks = chunk_text(text)
-        print(f"Split into {len(chunks)} chunk(s) for processing\n")
+        cache = None if args.no_cache else ReportCache(args.cache_dir)
+        result = analyze_report(
+            args.file_path, api_key, args.base_url, args.model,
+            mode=args.mode, llm_workers=args.llm_workers,
+            workers=args.workers, ocr_dpi=args.ocr_dpi, cache=cache,
+            structured=args.structured, use_llm=args.llm
+        )
         
-        # Analyze with LLM
-        summary = analyze_with_llm(chunks, api_key, args.base_url, args.model)
+        if result["summary_cached"]:
+            print("Using cached summary for this file\n")
+        else:
+            source = "cache" if result["text_cached"] else "file"
+            print(f"Extracted {result['text_chars']} characters from {source}\n")
+            if result["lab_values"] is not None:
+                print(f"Parsed {len(result['lab_values'])} lab value record(s)\n")
+            if result["chunks"] is not None:
+                print(f"Split into {result['chunks']} chunk(s) for processing\n")
+        summary = result["summary"]
         
         # Display results
         print(f"\n{'='*60}")
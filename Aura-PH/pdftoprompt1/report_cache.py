@@ -0,0 +1,117 @@
+"""
+On-disk cache of extracted report text and LLM summaries.
+
+Entries are keyed by the uploaded file's SHA-256 content hash, so re-uploading
+the same report (under any file name) skips extraction/OCR and the LLM call.
+The cache directory is kept under a size limit by evicting least recently
+used entries.
+"""
+
+import os
+import hashlib
+import tempfile
+from typing import Optional
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "aura", "medical_reports")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def file_sha256(file_path: str) -> str:
+    """Hash a file's contents without loading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_sha256(*parts: str) -> str:
+    """Hash a sequence of strings (e.g. prompt templates) into one key component."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ReportCache:
+    """Size-bounded LRU cache of report text and summaries on local disk"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir: Directory for cache entries (default: MEDICAL_REPORT_CACHE_DIR
+                       env var, or ~/.cache/aura/medical_reports)
+            max_bytes: Total size the cache directory may grow to before eviction
+        """
+        self.cache_dir = cache_dir or os.getenv("MEDICAL_REPORT_CACHE_DIR") or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def text_key(file_hash: str, extractor_version: str, options: str = "") -> str:
+        return "text-" + text_sha256(file_hash, extractor_version, options)
+
+    @staticmethod
+    def summary_key(file_hash: str, extractor_version: str, model: str, prompt_hash: str,
+                    options: str = "") -> str:
+        return "summary-" + text_sha256(file_hash, extractor_version, model, prompt_hash, options)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+        except OSError:
+            return None
+
+        # Reads refresh the entry's mtime, which eviction uses as its LRU clock
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: str, value: str):
+        """Store a value atomically, then evict old entries if over the size limit."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(value)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Warning: could not write cache entry: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".txt"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
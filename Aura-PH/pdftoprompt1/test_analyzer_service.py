@@ -0,0 +1,100 @@
+"""
+Offline checks for the analyzer service's HTTP handler over a real socket (the
+worker pool and LLM are replaced by a fake service).
+
+Usage:
+    python test_analyzer_service.py
+"""
+
+import os
+import json
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+from analyzer_service import make_handler
+
+
+class FakeService:
+    def __init__(self):
+        self.paths = []
+
+    def analyze(self, file_path, mode="auto", structured=False, use_llm="auto"):
+        with open(file_path, "rb") as f:
+            size = len(f.read())
+        self.paths.append(file_path)
+        return {"file": file_path, "bytes": size, "timings": {"total": 0.0}}
+
+    def status(self):
+        return {}
+
+
+def start_server(service, allow_dirs=()):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(service, allow_dirs=allow_dirs))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def post(server, body, query="", json_body=True):
+    url = f"http://127.0.0.1:{server.server_address[1]}/analyze{query}"
+    data = json.dumps(body).encode() if json_body else body
+    headers = {"Content-Type": "application/json" if json_body else "application/octet-stream"}
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers), timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_local_paths_are_confined_to_allowed_dirs():
+    with tempfile.TemporaryDirectory() as tmp:
+        allowed = os.path.join(tmp, "reports")
+        os.makedirs(allowed)
+        report = os.path.join(allowed, "report.txt")
+        secret = os.path.join(tmp, "secret.txt")
+        for path in (report, secret):
+            with open(path, "w") as f:
+                f.write("Hemoglobin 11.2 g/dL 13.0 - 17.0\n")
+        link = os.path.join(allowed, "link.txt")
+        os.symlink(secret, link)
+
+        service = FakeService()
+        server = start_server(service, allow_dirs=[allowed])
+        try:
+            status, payload = post(server, {"path": report})
+            assert status == 200 and payload["bytes"] > 0
+            assert service.paths == [os.path.realpath(report)]
+
+            for escape in (secret, os.path.join(allowed, "..", "secret.txt"), link, "/etc/passwd"):
+                status, payload = post(server, {"path": escape})
+                assert status == 403 and "outside" in payload["error"], escape
+            assert len(service.paths) == 1
+
+            # Uploads are unaffected
+            status, payload = post(server, b"uploaded", query="?filename=report.png", json_body=False)
+            assert status == 200 and payload["file"] == "report.png" and payload["bytes"] == 8
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def test_local_paths_are_refused_without_allow_dir():
+    with tempfile.NamedTemporaryFile(suffix=".txt") as report:
+        service = FakeService()
+        server = start_server(service)
+        try:
+            status, payload = post(server, {"path": report.name})
+            assert status == 403 and "--allow-dir" in payload["error"]
+            assert service.paths == []
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    test_local_paths_are_confined_to_allowed_dirs()
+    test_local_paths_are_refused_without_allow_dir()
+    print("✅ All analyzer service checks passed")
@@ -0,0 +1,65 @@
+"""
+Offline checks for local lab value parsing and H/L flags.
+
+Usage:
+    python test_lab_values.py
+"""
+
+from lab_values import compute_flag, parse_line, parse_reference_range, parse_tables, parse_text
+
+
+def test_thousands_separators_and_decimal_commas():
+    wbc = parse_line("Total WBC 7500 /cumm 4,000 - 11,000")
+    assert wbc["value"] == 7500 and parse_reference_range(wbc["reference_range"]) == (4000, 11000)
+    assert wbc["flag"] == "N"
+
+    platelets = parse_line("Platelets 1,20,000 /cumm 1,50,000-4,50,000")
+    assert platelets["value"] == 120000 and platelets["flag"] == "L"
+    assert parse_line("Platelets 2,50,000 /cumm 1,50,000-4,50,000")["flag"] == "N"
+    assert parse_reference_range("1,000,000 - 2,500,000") == (1000000, 2500000)
+
+    creatinine = parse_line("Creatinine 1,4 mg/dL 0,6 - 1,2")
+    assert creatinine["value"] == 1.4 and creatinine["flag"] == "H"
+
+
+def test_dates_are_not_reference_ranges():
+    assert parse_reference_range("12-05-2024") == (None, None)
+    assert parse_reference_range("Collected 1-5-2024 09:30") == (None, None)
+    records, context = parse_text("Sample No 123 Date 12-05-2024\nHemoglobin 11.2 g/dL 13.0 - 17.0\n")
+    assert [record["test"] for record in records] == ["Hemoglobin"]
+    assert context == ["Sample No 123 Date 12-05-2024"]
+
+
+def test_numbers_in_names_are_not_results():
+    vitamin_d = parse_line("Vitamin D 25-OH 18 ng/mL 30-100")
+    assert vitamin_d["test"] == "Vitamin D 25-OH" and vitamin_d["value"] == 18
+    assert vitamin_d["unit"] == "ng/mL" and vitamin_d["flag"] == "L"
+    assert parse_line("Vitamin B12 450 pg/mL 200-900")["flag"] == "N"
+    assert parse_line("Patient ID 12345 Ref 1-2") is None
+
+    records, context = parse_text("Patient ID 12345 Ref 1-2\nVitamin D 25-OH 18 ng/mL 30-100\n")
+    assert [(record["test"], record["value"]) for record in records] == [("Vitamin D 25-OH", 18)]
+    assert context == ["Patient ID 12345 Ref 1-2"]
+
+
+def test_flags_from_ranges_and_reported_flags():
+    assert parse_line("Hemoglobin 11.2 g/dL 13.0 - 17.0 L")["flag"] == "L"
+    assert parse_line("Cholesterol 240 mg/dL < 200")["flag"] == "H"
+    assert parse_line("HDL 45 mg/dL > 40")["flag"] == "N"
+    assert parse_line("TSH 5.6 uIU/mL 0.4 to 4.0")["flag"] == "H"
+    assert parse_line("Glucose: 160 H")["flag"] == "H"
+    assert compute_flag(None, "", "HIGH") == "H"
+    assert compute_flag(3.0, "", "*") is None
+
+    records = parse_tables([[["Test", "Result", "Unit", "Reference Range"],
+                             ["Total WBC", "7,500", "/cumm", "4,000 - 11,000"],
+                             ["Platelets", "1,20,000", "/cumm", "1,50,000 - 4,50,000"]]])
+    assert [(record["value"], record["flag"]) for record in records] == [(7500, "N"), (120000, "L")]
+
+
+if __name__ == "__main__":
+    test_thousands_separators_and_decimal_commas()
+    test_dates_are_not_reference_ranges()
+    test_numbers_in_names_are_not_results()
+    test_flags_from_ranges_and_reported_flags()
+    print("✅ All lab value checks passed")
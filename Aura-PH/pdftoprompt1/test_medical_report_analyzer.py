@@ -0,0 +1,75 @@
+"""
+Offline checks for the report pipeline's caching and LLM gating (extraction is faked).
+
+Usage:
+    python test_medical_report_analyzer.py
+"""
+
+import os
+import tempfile
+
+import medical_report_analyzer as analyzer
+from report_cache import ReportCache
+
+REPORT_TEXT = "--- Page 1 ---\nPatient: Test\nImpression: see table\n"
+REPORT_TABLES = [[["Test", "Result", "Unit", "Reference Range"],
+                  ["Hemoglobin", "11.2", "g/dL", "13.0 - 17.0"],
+                  ["Total WBC", "7,500", "/cumm", "4,000 - 11,000"]]]
+
+
+def fake_pdf(tmp):
+    path = os.path.join(tmp, "report.pdf")
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4 fake")
+    return path
+
+
+def test_structured_cache_hit_keeps_table_values():
+    calls = []
+    original = analyzer.extract_pdf_content
+
+    def extract(pdf_path, workers=None, ocr_dpi=200, with_tables=False):
+        calls.append(pdf_path)
+        return REPORT_TEXT, REPORT_TABLES
+
+    analyzer.extract_pdf_content = extract
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = fake_pdf(tmp)
+            cache = ReportCache(os.path.join(tmp, "cache"))
+            miss = analyzer.prepare_report(path, cache=cache, structured=True)
+            hit = analyzer.prepare_report(path, cache=cache, structured=True)
+            assert not miss["text_cached"] and hit["text_cached"] and len(calls) == 1
+            assert hit["text"] == miss["text"] and hit["tables"] == miss["tables"]
+
+            records = [analyzer.summarize_report(prepared, api_key="unused", structured=True,
+                                                 use_llm="never")["lab_values"]
+                       for prepared in (miss, hit)]
+            assert records[0] == records[1] and len(records[0]) == 2
+    finally:
+        analyzer.extract_pdf_content = original
+
+
+def test_llm_never_does_not_call_the_llm():
+    original = analyzer.analyze_with_llm
+
+    def forbidden(*args, **kwargs):
+        raise AssertionError("LLM called with --llm never")
+
+    analyzer.analyze_with_llm = forbidden
+    try:
+        for structured in (True, False):
+            prepared = {"file": "report.txt", "summary": None, "text_chars": len(REPORT_TEXT), "chunks": None,
+                        "lab_values": None, "text_cached": False, "summary_cached": False, "timings": {},
+                        "text": REPORT_TEXT, "tables": [], "summary_key": None}
+            result = analyzer.summarize_report(prepared, api_key="unused", structured=structured, use_llm="never")
+            assert result["summary"] == analyzer.NO_LAB_VALUES_SUMMARY
+            assert result["lab_values"] == [] and result["chunks"] is None
+    finally:
+        analyzer.analyze_with_llm = original
+
+
+if __name__ == "__main__":
+    test_structured_cache_hit_keeps_table_values()
+    test_llm_never_does_not_call_the_llm()
+    print("✅ All report analyzer checks passed")
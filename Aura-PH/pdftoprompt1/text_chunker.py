@@ -0,0 +1,134 @@
+"""
+Linear-time, token-budgeted text chunking.
+
+Boundaries (paragraph breaks, sentence ends, line breaks such as table rows)
+are indexed once, together with a running token estimate, and chunks are then
+cut in a single forward pass over that index. Every chunk starts at a later
+boundary than the previous one, so the pass always makes progress no matter
+where breaks fall relative to the overlap.
+
+Dependency-free so it can be shared by the medical report analyzer and RAG
+ingestion.
+"""
+
+import re
+from typing import List, Tuple
+
+
+# Approximate tokens: pieces of words/numbers (long words count as several
+# tokens, as with subword tokenizers) and individual punctuation marks
+TOKEN_RE = re.compile(r"\w{1,6}|[^\w\s]")
+
+# Paragraph break, sentence end, or single line break (e.g. a table row)
+BOUNDARY_RE = re.compile(r"(\n[ \t]*\n\s*)|([.!?][\"')\]]?[ \t]+)|(\n)")
+
+PARAGRAPH, SENTENCE, LINE, WORD = 3, 2, 1, 0
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the number of LLM tokens in text."""
+    return sum(1 for _ in TOKEN_RE.finditer(text))
+
+
+def build_boundary_index(text: str, max_tokens: int) -> Tuple[List[int], List[int], List[int]]:
+    """
+    Index every candidate break point in text.
+
+    Segments longer than max_tokens (no natural break) are split further at
+    word boundaries so every segment fits in a chunk.
+
+    Returns:
+        (positions, strengths, cumulative_tokens), where positions[0] == 0,
+        positions[-1] == len(text) and cumulative_tokens[i] is the estimated
+        token count of text[:positions[i]]
+    """
+    positions, strengths, cumulative = [0], [PARAGRAPH], [0]
+
+    def add_segment(end: int, strength: int):
+        start = positions[-1]
+        if end <= start:
+            return
+        tokens = 0
+        for match in TOKEN_RE.finditer(text, start, end):
+            if tokens == max_tokens:
+                # Oversized segment: cut before this token
+                positions.append(match.start())
+                strengths.append(WORD)
+                cumulative.append(cumulative[-1] + tokens)
+                tokens = 0
+            tokens += 1
+        positions.append(end)
+        strengths.append(strength)
+        cumulative.append(cumulative[-1] + tokens)
+
+    for match in BOUNDARY_RE.finditer(text):
+        if match.group(1):
+            strength = PARAGRAPH
+        elif match.group(2):
+            strength = SENTENCE
+        else:
+            strength = LINE
+        add_segment(match.end(), strength)
+    add_segment(len(text), PARAGRAPH)
+
+    return positions, strengths, cumulative
+
+
+def chunk_text(text: str, max_tokens: int = 750, overlap_tokens: int = 50) -> List[str]:
+    """
+    Split text into chunks of at most ~max_tokens, overlapping by ~overlap_tokens.
+
+    Chunks end at the strongest available boundary (paragraph > sentence >
+    line > word) in the second half of the token budget, and the next chunk
+    starts at the earliest boundary within overlap_tokens of that end.
+
+    Args:
+        text: The text to chunk
+        max_tokens: Approximate token budget per chunk
+        overlap_tokens: Approximate tokens repeated between consecutive chunks
+
+    Returns:
+        List of text chunks
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1")
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+
+    positions, strengths, cumulative = build_boundary_index(text, max_tokens)
+    last = len(positions) - 1
+    if cumulative[last] <= max_tokens:
+        return [text.strip()] if text.strip() else []
+
+    chunks = []
+    start = 0
+    end = 0
+    while start < last:
+        # Furthest boundary that keeps the chunk within budget (moves forward only)
+        end = max(end, start + 1)
+        while end < last and cumulative[end + 1] - cumulative[start] <= max_tokens:
+            end += 1
+
+        # Prefer the strongest break in the second half of the window
+        if end < last:
+            half = cumulative[start] + max_tokens // 2
+            best = end
+            i = end - 1
+            while i > start and cumulative[i] >= half:
+                if strengths[i] > strengths[best]:
+                    best = i
+                i -= 1
+            end = best
+
+        chunk = text[positions[start]:positions[end]].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end == last:
+            break
+
+        # Next chunk starts at the earliest boundary within the overlap, always after `start`
+        next_start = start + 1
+        while next_start < end and cumulative[end] - cumulative[next_start] > overlap_tokens:
+            next_start += 1
+        start = next_start
+
+    return chunks
@@ -0,0 +1,287 @@
+"""
+Incremental screen-time aggregates for the current day.
+
+ScreenTimeAggregator consumes the sampler's screen/app/battery changes and
+keeps running totals, so a summary never re-scans history:
+
+  - per-app foreground seconds
+  - screen-on seconds per hour of the day (24 buckets)
+  - app switch count, screen-on session count, longest session
+  - length of the current screen-on session
+  - battery start/end
+
+Each change closes one interval and adds it to the totals; snapshot() only
+adds the still-open interval on top, so it costs the same at 9am and 11pm.
+At midnight the totals start over.
+
+serve_snapshots() exposes snapshots on a local HTTP port so the planner can
+ask for "screen time so far today" as often as it likes:
+
+    GET /snapshot            (or /snapshot?serial=SERIAL with several devices)
+"""
+
+import json
+import time
+import threading
+import urllib.request
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from screen_timeline import APP, BATTERY, END, SCREEN
+
+
+class ScreenTimeAggregator:
+    """Running per-day screen-time totals, updated on every change"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Callable[[], float] = time.time):
+        """
+        Args:
+            clock: Monotonic clock used for event times
+            wall_clock: Wall clock, read once to anchor the monotonic clock
+                        (hour buckets and day boundaries use local wall time)
+        """
+        self.clock = clock
+        self._mono_origin = clock()
+        self._wall_origin = wall_clock()
+        self._lock = threading.Lock()
+
+        # Current state (None = unknown, e.g. after the sampler stopped)
+        self.screen_on: Optional[bool] = None
+        self.current_app: Optional[str] = None
+        self._screen_since: Optional[float] = None
+        self._app_since: Optional[float] = None
+        self._session_start: Optional[float] = None
+        self._reset_day(None)
+
+    def _reset_day(self, day: Optional[date]):
+        self.day = day
+        self.app_seconds: Dict[str, float] = {}
+        self.hourly_on_seconds = [0.0] * 24
+        self.screen_on_seconds = 0.0
+        self.screen_off_seconds = 0.0
+        self.app_switches = 0
+        self.screen_sessions = 0
+        self.longest_session = 0.0
+        self.battery_start: Optional[int] = None
+        self.battery_end: Optional[int] = None
+
+    def _epoch(self, now: float) -> float:
+        return self._wall_origin + (now - self._mono_origin)
+
+    # -------- interval bookkeeping --------
+
+    @staticmethod
+    def _add_hourly(hourly, start: float, end: float):
+        """Spread [start, end) over the hour buckets it covers (at most 24 steps)."""
+        while start < end:
+            moment = datetime.fromtimestamp(start)
+            next_hour = (moment.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)).timestamp()
+            stop = min(end, next_hour)
+            hourly[moment.hour] += stop - start
+            start = stop
+
+    def _close_screen(self, at: float):
+        if self.screen_on is None or self._screen_since is None:
+            return
+        elapsed = max(0.0, at - self._screen_since)
+        if self.screen_on:
+            self.screen_on_seconds += elapsed
+            self._add_hourly(self.hourly_on_seconds, self._screen_since, at)
+        else:
+            self.screen_off_seconds += elapsed
+        self._screen_since = at
+
+    def _close_app(self, at: float):
+        if self.current_app and self._app_since is not None:
+            self.app_seconds[self.current_app] = (
+                self.app_seconds.get(self.current_app, 0.0) + max(0.0, at - self._app_since)
+            )
+        self._app_since = at
+
+    def _session_length(self, at: float) -> float:
+        if self.screen_on and self._session_start is not None:
+            return max(0.0, at - self._session_start)
+        return 0.0
+
+    def _roll_day(self, epoch: float):
+        """Close open intervals at midnight when an event arrives on a new day."""
+        day = datetime.fromtimestamp(epoch).date()
+        if day == self.day:
+            return
+        if self.day is not None:
+            midnight = datetime.combine(day, datetime.min.time()).timestamp()
+            self._close_screen(midnight)
+            self._close_app(midnight)
+            self.longest_session = max(self.longest_session, self._session_length(midnight))
+            self._reset_day(day)
+            if self.screen_on:
+                # The running session continues into the new day
+                self._session_start = midnight
+                self.screen_sessions = 1
+        else:
+            self._reset_day(day)
+
+    # -------- updates --------
+
+    def apply(self, epoch: float, kind: int, value=None):
+        """Apply one change at a wall-clock time (kind: SCREEN, APP, BATTERY or END)."""
+        with self._lock:
+            self._roll_day(epoch)
+            if kind == SCREEN:
+                self._close_screen(epoch)
+                value = bool(value)
+                if value and not self.screen_on:
+                    self.screen_sessions += 1
+                    self._session_start = epoch
+                elif not value and self.screen_on:
+                    self.longest_session = max(self.longest_session, self._session_length(epoch))
+                    self._session_start = None
+                self.screen_on = value
+                self._screen_since = epoch
+            elif kind == APP:
+                if value == self.current_app and self._app_since is not None:
+                    return
+                self._close_app(epoch)
+                if value and self.current_app:
+                    self.app_switches += 1
+                self.current_app = value
+            elif kind == BATTERY and value is not None:
+                if self.battery_start is None:
+                    self.battery_start = value
+                self.battery_end = value
+            elif kind == END:
+                # The sampler stopped: state is unknown until the next run reports it
+                self._close_screen(epoch)
+                self._close_app(epoch)
+                self.longest_session = max(self.longest_session, self._session_length(epoch))
+                self.screen_on, self.current_app = None, None
+                self._screen_since = self._app_since = self._session_start = None
+
+    def on_change(self, kind: str, value):
+        """DeviceSampler on_change callback."""
+        kinds = {"screen": SCREEN, "app": APP, "battery": BATTERY}
+        if kind in kinds:
+            self.apply(self._epoch(self.clock()), kinds[kind], value)
+
+    def mark_stopped(self):
+        """Stop counting until the sampler reports state again (e.g. the device unplugged)."""
+        self.apply(self._epoch(self.clock()), END)
+
+    def replay(self, events: Iterable[Tuple[float, int, Any]]):
+        """Rebuild today's totals from timeline events, e.g. after a restart."""
+        last = None
+        for epoch, kind, value in events:
+            self.apply(epoch, kind, value)
+            last = epoch
+        if last is not None and self.screen_on is not None:
+            # A run that crashed without its END row: don't count the gap since
+            self.apply(last, END)
+
+    # -------- queries --------
+
+    def snapshot(self, now: Optional[float] = None) -> dict:
+        """
+        Totals so far today, including the interval that is still open.
+
+        Returns the inputStamps structure used by screenTimeAnalyzer plus the
+        streaming aggregates (hourly histogram, switches, sessions).
+        """
+        epoch = self._epoch(self.clock()) if now is None else now
+        with self._lock:
+            if self.day is not None and datetime.fromtimestamp(epoch).date() != self.day:
+                self._roll_day(epoch)
+
+            on, off = self.screen_on_seconds, self.screen_off_seconds
+            hourly = list(self.hourly_on_seconds)
+            if self.screen_on is not None and self._screen_since is not None:
+                if self.screen_on:
+                    on += max(0.0, epoch - self._screen_since)
+                    self._add_hourly(hourly, self._screen_since, epoch)
+                else:
+                    off += max(0.0, epoch - self._screen_since)
+
+            apps = dict(self.app_seconds)
+            if self.current_app and self._app_since is not None:
+                apps[self.current_app] = apps.get(self.current_app, 0.0) + max(0.0, epoch - self._app_since)
+
+            current_session = self._session_length(epoch)
+            start, end = self.battery_start, self.battery_end
+            snapshot = {
+                "date": (self.day or datetime.fromtimestamp(epoch).date()).isoformat(),
+                "session_end_time": datetime.fromtimestamp(epoch).isoformat(),
+                "screen": {
+                    "total_on_time_sec": int(on),
+                    "total_off_time_sec": int(off)
+                },
+                "battery": {
+                    "start_level_percent": start,
+                    "end_level_percent": end,
+                    "drain_percent": start - end if start is not None and end is not None else None
+                },
+                "apps": [
+                    {"app": app, "foreground_time_sec": int(seconds)}
+                    for app, seconds in sorted(apps.items(), key=lambda item: item[1])
+                ],
+                "hourly_screen_on_sec": [int(seconds) for seconds in hourly],
+                "app_switches": self.app_switches,
+                "screen_sessions": self.screen_sessions,
+                "current_app": self.current_app,
+                "current_session_sec": int(current_session),
+                "longest_session_sec": int(max(self.longest_session, current_session)),
+            }
+        return snapshot
+
+
+# ---------------- LOCAL SNAPSHOT SERVER ----------------
+
+def make_snapshot_handler(aggregators: Dict[str, ScreenTimeAggregator]):
+    """Build an HTTP handler class serving snapshots of one aggregator per device serial"""
+
+    class SnapshotHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/snapshot":
+                self._reply(404, {"error": "not found"})
+                return
+
+            serial = parse_qs(url.query).get("serial", [None])[-1]
+            if serial is None and len(aggregators) == 1:
+                serial = next(iter(aggregators))
+            aggregator = aggregators.get(serial)
+            if aggregator is None:
+                self._reply(404, {"error": "unknown serial", "serials": sorted(aggregators)})
+                return
+            self._reply(200, {"serial": serial, **aggregator.snapshot()})
+
+        def _reply(self, status: int, payload: Dict[str, Any]):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return SnapshotHandler
+
+
+def serve_snapshots(aggregators: Dict[str, ScreenTimeAggregator], host: str = "127.0.0.1",
+                    port: int = 8767) -> ThreadingHTTPServer:
+    """Serve snapshots in a background thread; call shutdown() on the returned server to stop."""
+    server = ThreadingHTTPServer((host, port), make_snapshot_handler(aggregators))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def fetch_snapshot(port: int = 8767, serial: Optional[str] = None, host: str = "127.0.0.1",
+                   timeout: float = 2.0) -> dict:
+    """Client helper: screen time so far today from a running sampler."""
+    url = f"http://{host}:{port}/snapshot" + (f"?serial={serial}" if serial else "")
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
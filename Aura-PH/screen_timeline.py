@@ -0,0 +1,405 @@
+"""
+Append-only, columnar timeline of screen-time events.
+
+The device sampler reports screen on/off, foreground-app and battery changes;
+TimelineRecorder stores each one as a row of three compact columns:
+
+    offset_ms  array('I')  milliseconds since the block's anchor time
+    kind       array('B')  SCREEN, APP, BATTERY or END
+    value      array('H')  screen 0/1, interned app id, battery percent
+
+Timestamps come from a monotonic clock anchored to wall time once per
+recorder, so they do not drift or jump with wall-clock changes. App package
+names are interned per file (id 0 = no app), so a row is 7 bytes.
+
+Rows are buffered and appended to `timeline-YYYY-MM-DD.bin` in blocks:
+
+    b"STL1" | u32 rows | u16 new_apps | f64 anchor_epoch
+    | new app names (u16 length + UTF-8 each) | offset_ms | kind | value
+
+A new file is started every local day. A block cut short by a crash is
+ignored by the reader. read_timeline/to_input_stamps turn the files back
+into the `inputStamps` structure taken by taskProcessor.screenTimeAnalyzer.
+"""
+
+import os
+import sys
+import time
+import struct
+import threading
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from device_sampler import UsageTracker
+
+
+SCREEN, APP, BATTERY, END = 0, 1, 2, 3
+KIND_NAMES = {"screen": SCREEN, "app": APP, "battery": BATTERY}
+
+MAGIC = b"STL1"
+HEADER = struct.Struct("<4sIHd")
+MAX_OFFSET_MS = 2 ** 32 - 1
+
+
+def _native(column: array) -> array:
+    # Columns are stored little-endian
+    if sys.byteorder != "little":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column
+
+
+def timeline_path(directory: str, day: date) -> str:
+    return os.path.join(directory, f"timeline-{day.isoformat()}.bin")
+
+
+# ---------------- READING ----------------
+
+class TimelineDay:
+    """One day's events as columns (timestamps resolved to epoch seconds)"""
+
+    def __init__(self):
+        self.timestamps = array("d")
+        self.kinds = array("B")
+        self.values = array("H")
+        self.apps: List[Optional[str]] = [None]
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def events(self) -> Iterator[Tuple[float, int, object]]:
+        """Yield (epoch_seconds, kind, value) with app ids resolved to package names."""
+        for ts, kind, value in zip(self.timestamps, self.kinds, self.values):
+            if kind == APP:
+                yield ts, kind, self.apps[value]
+            elif kind == SCREEN:
+                yield ts, kind, bool(value)
+            else:
+                yield ts, kind, value
+
+
+def load_day(path: str) -> TimelineDay:
+    """Read one daily file; an incomplete trailing block is skipped."""
+    day = TimelineDay()
+    with open(path, "rb") as f:
+        data = f.read()
+
+    position = 0
+    while position + HEADER.size <= len(data):
+        magic, rows, new_apps, anchor = HEADER.unpack_from(data, position)
+        if magic != MAGIC:
+            break
+        cursor = position + HEADER.size
+        names = []
+        try:
+            for _ in range(new_apps):
+                length, = struct.unpack_from("<H", data, cursor)
+                cursor += 2
+                if cursor + length > len(data):
+                    raise struct.error("truncated app name")
+                names.append(data[cursor:cursor + length].decode("utf-8"))
+                cursor += length
+        except struct.error:
+            break
+        end = cursor + rows * 7
+        if end > len(data):
+            break
+
+        offsets = array("I")
+        offsets.frombytes(data[cursor:cursor + rows * 4])
+        kinds = array("B")
+        kinds.frombytes(data[cursor + rows * 4:cursor + rows * 5])
+        values = array("H")
+        values.frombytes(data[cursor + rows * 5:end])
+
+        day.apps.extend(names)
+        day.timestamps.extend(anchor + offset / 1000 for offset in _native(offsets))
+        day.kinds.extend(kinds)
+        day.values.extend(_native(values))
+        position = end
+    return day
+
+
+def read_timeline(directory: str, start: date, end: Optional[date] = None) -> Iterator[Tuple[float, int, object]]:
+    """Yield (epoch_seconds, kind, value) for every event from start to end (inclusive)."""
+    end = end or start
+    day = start
+    while day <= end:
+        path = timeline_path(directory, day)
+        if os.path.exists(path):
+            yield from load_day(path).events()
+        day += timedelta(days=1)
+
+
+def to_input_stamps(events: Iterator[Tuple[float, int, object]], session_end: Optional[float] = None,
+                    include_sessions: bool = False) -> dict:
+    """
+    Summarize timeline events into the inputStamps structure used by screenTimeAnalyzer.
+
+    Every recorder run is accounted separately (time between an END and the
+    next run's first event is not counted). A run without END, e.g. the one
+    still being recorded, is closed at session_end (default: now, but no
+    later than the midnight after its last event, in case its process died).
+
+    Args:
+        events: (epoch_seconds, kind, value) tuples in time order
+        session_end: Epoch seconds to close the last run at
+        include_sessions: Also return the list of screen-on sessions with
+                          their app switches (for doomscroll/fragmentation analysis)
+    """
+    totals = {"on": 0.0, "off": 0.0}
+    apps: Dict[str, float] = {}
+    battery = {"start": None, "end": None}
+    sessions: List[dict] = []
+    state = {"tracker": None, "last": None, "session": None}
+
+    def close_run(at: float):
+        tracker = state["tracker"]
+        if tracker is None:
+            return
+        tracker.set_screen(tracker.screen_on, at)
+        tracker.set_app(None, at)
+        totals["on"] += tracker.screen_on_seconds
+        totals["off"] += tracker.screen_off_seconds
+        for app, seconds in tracker.app_usage.items():
+            apps[app] = apps.get(app, 0.0) + seconds
+        if state["session"] is not None:
+            state["session"]["end"] = at
+            state["session"] = None
+        state["tracker"] = None
+
+    for ts, kind, value in events:
+        if kind == END:
+            close_run(ts)
+            continue
+        if state["tracker"] is None:
+            state["tracker"] = UsageTracker()
+        tracker = state["tracker"]
+        state["last"] = ts
+
+        if kind == SCREEN:
+            tracker.set_screen(value, ts)
+            if value and state["session"] is None:
+                state["session"] = {"start": ts, "end": None, "apps": []}
+                sessions.append(state["session"])
+                if tracker.current_app:
+                    state["session"]["apps"].append(tracker.current_app)
+            elif not value and state["session"] is not None:
+                state["session"]["end"] = ts
+                state["session"] = None
+        elif kind == APP:
+            tracker.set_app(value, ts)
+            if state["session"] is not None and value:
+                state["session"]["apps"].append(value)
+        elif kind == BATTERY:
+            if battery["start"] is None:
+                battery["start"] = value
+            battery["end"] = value
+
+    end = time.time() if session_end is None else session_end
+    if state["tracker"] is not None:
+        close_at = end
+        if session_end is None:
+            next_midnight = datetime.combine(datetime.fromtimestamp(state["last"]).date() + timedelta(days=1),
+                                             datetime.min.time()).timestamp()
+            close_at = min(end, next_midnight)
+        close_run(max(state["last"], close_at))
+
+    stamps = {
+        "session_end_time": datetime.fromtimestamp(end).isoformat(),
+        "screen": {
+            "total_on_time_sec": int(totals["on"]),
+            "total_off_time_sec": int(totals["off"])
+        },
+        "battery": {
+            "start_level_percent": battery["start"],
+            "end_level_percent": battery["end"],
+            "drain_percent": (battery["start"] - battery["end"]
+                              if battery["start"] is not None and battery["end"] is not None else None)
+        },
+        "apps": [
+            {"app": app, "foreground_time_sec": int(seconds)}
+            for app, seconds in sorted(apps.items(), key=lambda item: item[1])
+        ]
+    }
+    if include_sessions:
+        stamps["sessions"] = [
+            {
+                "start_time": datetime.fromtimestamp(session["start"]).isoformat(),
+                "duration_sec": int((session["end"] if session["end"] is not None else end) - session["start"]),
+                "app_switches": max(0, len(session["apps"]) - 1),
+                "apps": session["apps"],
+            }
+            for session in sessions
+        ]
+    return stamps
+
+
+def load_input_stamps(directory: str, day: Optional[date] = None, days: int = 1,
+                      include_sessions: bool = False) -> dict:
+    """inputStamps for the `days` days ending on `day` (default: today)."""
+    day = day or date.today()
+    events = read_timeline(directory, day - timedelta(days=days - 1), day)
+    return to_input_stamps(events, include_sessions=include_sessions)
+
+
+# ---------------- WRITING ----------------
+
+class TimelineRecorder:
+    """Buffers sampler events into columns and appends them to daily files"""
+
+    def __init__(self, directory: str, flush_rows: int = 32,
+                 clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Callable[[], float] = time.time):
+        """
+        Args:
+            directory: Where the daily timeline files are written
+            flush_rows: Buffered rows that trigger an append to disk
+            clock: Monotonic clock used for event times
+            wall_clock: Wall clock, read once to anchor the monotonic clock
+        """
+        self.directory = directory
+        self.flush_rows = flush_rows
+        self.clock = clock
+        os.makedirs(directory, exist_ok=True)
+
+        # Wall time = anchor + (monotonic - monotonic at anchor)
+        self._mono_origin = clock()
+        self._wall_origin = wall_clock()
+
+        self._lock = threading.Lock()
+        self._day: Optional[date] = None
+        self._app_ids: Dict[str, int] = {}
+        self._new_apps: List[str] = []
+        self._anchor: Optional[float] = None
+        self._offsets = array("I")
+        self._kinds = array("B")
+        self._values = array("H")
+        # Latest screen/app values, carried into the next day's file
+        self._state = {SCREEN: None, APP: None}
+        self._last_battery = None
+
+    def _epoch(self, now: float) -> float:
+        return self._wall_origin + (now - self._mono_origin)
+
+    def _open_day(self, day: date):
+        """Switch to a day's file, loading the app ids it already has."""
+        self._day = day
+        self._new_apps = []
+        path = timeline_path(self.directory, day)
+        apps = load_day(path).apps if os.path.exists(path) else [None]
+        self._app_ids = {app: index for index, app in enumerate(apps) if app is not None}
+
+    def _intern(self, app: Optional[str]) -> int:
+        if not app:
+            return 0
+        app_id = self._app_ids.get(app)
+        if app_id is None:
+            app_id = len(self._app_ids) + 1
+            self._app_ids[app] = app_id
+            self._new_apps.append(app)
+        return app_id
+
+    def record(self, kind: int, value=None, now: Optional[float] = None):
+        """Append one event (kind: SCREEN, APP, BATTERY or END)."""
+        epoch = self._epoch(self.clock() if now is None else now)
+        with self._lock:
+            day = datetime.fromtimestamp(epoch).date()
+            if day != self._day:
+                self._roll_over(day)
+
+            if kind == APP:
+                stored = self._intern(value)
+            elif kind == SCREEN:
+                stored = 1 if value else 0
+            else:
+                stored = max(0, min(0xFFFF, int(value or 0)))
+            if kind in self._state:
+                self._state[kind] = value
+
+            self._append(kind, stored, epoch)
+            if len(self._kinds) >= self.flush_rows:
+                self._flush_locked()
+
+    def _append(self, kind: int, stored: int, epoch: float):
+        if self._anchor is None or epoch - self._anchor > MAX_OFFSET_MS / 1000:
+            self._flush_locked()
+            self._anchor = epoch
+        self._offsets.append(max(0, int(round((epoch - self._anchor) * 1000))))
+        self._kinds.append(kind)
+        self._values.append(stored)
+
+    def _roll_over(self, day: date):
+        """
+        Start the file for a new day. A run spanning midnight is closed in the
+        old file at midnight and its screen/app state repeated at the top of the
+        new one, so each day can be read on its own.
+        """
+        if self._day is None:
+            self._open_day(day)
+            return
+
+        midnight = datetime.combine(day, datetime.min.time()).timestamp()
+        self._append(END, 0, midnight - 0.001)
+        self._flush_locked()
+        self._open_day(day)
+        if self._state[SCREEN] is not None:
+            self._append(SCREEN, 1 if self._state[SCREEN] else 0, midnight)
+        if self._state[APP]:
+            self._append(APP, self._intern(self._state[APP]), midnight)
+
+    def on_change(self, kind: str, value):
+        """DeviceSampler on_change callback (battery is only recorded when the level changes)."""
+        if kind == "battery":
+            if value is None or value == self._last_battery:
+                return
+            self._last_battery = value
+        if kind in KIND_NAMES:
+            self.record(KIND_NAMES[kind], value)
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._kinds:
+            self._anchor = None
+            return
+        names = b"".join(struct.pack("<H", len(encoded)) + encoded
+                         for encoded in (app.encode("utf-8") for app in self._new_apps))
+        block = (HEADER.pack(MAGIC, len(self._kinds), len(self._new_apps), self._anchor) + names
+                 + _native(self._offsets).tobytes() + self._kinds.tobytes()
+                 + _native(self._values).tobytes())
+        with open(timeline_path(self.directory, self._day), "ab") as f:
+            f.write(block)
+
+        self._new_apps = []
+        self._anchor = None
+        self._offsets = array("I")
+        self._kinds = array("B")
+        self._values = array("H")
+
+    def close(self):
+        """Mark the end of this recording run and write everything buffered."""
+        self.record(END)
+        self.flush()
+
+
+def main():
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print recorded screen-time as inputStamps JSON")
+    parser.add_argument("directory", help="Timeline directory written by TimelineRecorder")
+    parser.add_argument("--date", default=None, help="Last day to include, YYYY-MM-DD (default: today)")
+    parser.add_argument("--days", type=int, default=1, help="Number of days to include (default: 1)")
+    parser.add_argument("--sessions", action="store_true", help="Include screen-on sessions and app switches")
+    args = parser.parse_args()
+
+    day = date.fromisoformat(args.date) if args.date else None
+    print(json.dumps(load_input_stamps(args.directory, day, args.days, args.sessions), indent=2))
+
+
+if __name__ == "__main__":
+    main()
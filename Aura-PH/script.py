@@ -1,125 +1,51 @@
-import subprocess
-import time
+import os
+import sys
 import json
-from datetime import datetime
-from collections import defaultdict
+from datetime import date
 
-ADB_PATH = r"E:\platform-tools\adb.exe"
+from device_sampler import AdbError, DeviceSampler
+from screen_aggregator import ScreenTimeAggregator, serve_snapshots
+from screen_timeline import TimelineRecorder, read_timeline
 
-def adb(cmd):
-    full_cmd = f'"{ADB_PATH}" {cmd}'
-    try:
-        return subprocess.check_output(
-            full_cmd,
-            shell=True,
-            text=True,
-            stderr=subprocess.DEVNULL
-        )
-    except subprocess.CalledProcessError:
-        return ""
+ADB_PATH = os.getenv("ADB_PATH", r"E:\platform-tools\adb.exe")
+TIMELINE_DIR = os.getenv("TIMELINE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "screen_timeline"))
+SNAPSHOT_PORT = int(os.getenv("SNAPSHOT_PORT", "8767"))
 
-def now():
-    return datetime.now()
+# App switches and screen on/off are appended to daily files in TIMELINE_DIR
+recorder = TimelineRecorder(TIMELINE_DIR)
 
-def is_device_connected():
-    out = adb("devices")
-    lines = out.strip().splitlines()
-    return len(lines) > 1 and "device" in lines[1]
+# Running totals for today, served at http://127.0.0.1:SNAPSHOT_PORT/snapshot
+aggregator = ScreenTimeAggregator()
+aggregator.replay(read_timeline(TIMELINE_DIR, date.today()))
+server = serve_snapshots({os.getenv("ADB_SERIAL") or "default": aggregator}, port=SNAPSHOT_PORT)
 
-# ---------------- STATE ----------------
-screen_on = False
-total_screen_on = 0
-total_screen_off = 0
-last_tick = now()
 
-current_app = None
-app_start_time = None
-app_usage = defaultdict(int)
+def on_change(kind, value):
+    recorder.on_change(kind, value)
+    aggregator.on_change(kind, value)
 
-battery_start = None
-battery_end = None
 
-# ---------------- INIT BATTERY ----------------
-battery_info = adb("shell dumpsys battery")
-for line in battery_info.splitlines():
-    if "level:" in line:
-        battery_start = int(line.split(":")[1].strip())
-        battery_end = battery_start
+# Set ADB_POLL=1 on devices whose event log lacks foreground/screen events
+sampler = DeviceSampler(
+    ADB_PATH,
+    serial=os.getenv("ADB_SERIAL"),
+    use_events=os.getenv("ADB_POLL") != "1",
+    on_change=on_change
+)
 
-# ---------------- MAIN LOOP ----------------
+# ---------------- SAMPLE UNTIL CTRL+C OR DISCONNECT ----------------
 try:
-    while True:
-        time.sleep(2)
-        current_time = now()
-        delta = int((current_time - last_tick).total_seconds())
-
-        if not is_device_connected():
-            break
-
-        # Screen state
-        power = adb("shell dumpsys power")
-        screen_on = any(
-            "Display Power: state=ON" in l or "mWakefulness=Awake" in l
-            for l in power.splitlines()
-        )
-
-        if screen_on:
-            total_screen_on += delta
-        else:
-            total_screen_off += delta
-
-        # Foreground app
-        activity = adb("shell dumpsys activity activities")
-        resumed = [l for l in activity.splitlines() if "ResumedActivity" in l]
-
-        app = None
-        if resumed:
-            for part in resumed[0].split():
-                if "/" in part:
-                    app = part.split("/")[0]
-                    break
-
-        if app != current_app:
-            if current_app and app_start_time:
-                app_usage[current_app] += int(
-                    (current_time - app_start_time).total_seconds()
-                )
-            current_app = app
-            app_start_time = current_time
-
-        # Battery
-        battery_info = adb("shell dumpsys battery")
-        for line in battery_info.splitlines():
-            if "level:" in line:
-                battery_end = int(line.split(":")[1].strip())
-
-        last_tick = current_time
-
+    sampler.start()
+    sampler.run()
 except KeyboardInterrupt:
     pass
-
-# ---------------- FINALIZE LAST APP ----------------
-if current_app and app_start_time:
-    app_usage[current_app] += int((now() - app_start_time).total_seconds())
+except (AdbError, OSError) as e:
+    # No device attached or adb missing: still close the timeline and report what was collected
+    print(f"❌ adb error: {e}", file=sys.stderr)
+finally:
+    summary = sampler.stop()
+    recorder.close()
+    server.shutdown()
 
 # ---------------- FINAL JSON ONLY ----------------
-summary = {
-    "screen": {
-        "on_seconds": total_screen_on,
-        "off_seconds": total_screen_off
-    },
-    "battery": {
-        "start_percent": battery_start,
-        "end_percent": battery_end,
-        "drain_percent": (
-            battery_start - battery_end
-            if battery_start is not None and battery_end is not None
-            else None
-        )
-    },
-    "apps": {
-        app: seconds for app, seconds in app_usage.items()
-    }
-}
-
 print(json.dumps(summary, indent=2))
@@ -0,0 +1,83 @@
+"""
+Offline checks for the multi-device collector using fake_adb.py in place of adb.
+
+Usage:
+    python test_device_collector.py
+"""
+
+import os
+import asyncio
+import tempfile
+
+from device_collector import DeviceCollector, serial_directory, track_devices
+from screen_timeline import load_input_stamps
+from test_device_sampler import FAKE_ADB, launches, write_scenario
+
+
+def test_track_devices_parses_length_prefixed_lists():
+    with tempfile.TemporaryDirectory() as tmp:
+        write_scenario(tmp, devices=[[0.0, {}], [0.05, {"A1": "device", "B2": "offline"}]])
+
+        async def first_two():
+            updates = []
+            async for devices in track_devices(FAKE_ADB):
+                updates.append(devices)
+                if len(updates) == 2:
+                    break
+            return updates
+
+        assert asyncio.run(first_two()) == [{}, {"A1": "device", "B2": "offline"}]
+
+
+def test_collects_hot_plugged_devices_concurrently():
+    with tempfile.TemporaryDirectory() as tmp:
+        calls_log = write_scenario(
+            tmp, screen_on=True, app="com.a", battery=[80, 79],
+            devices=[[0.0, {"A1": "device"}],
+                     [0.3, {"A1": "device", "B2": "device", "C3": "unauthorized"}]],
+            disconnect_after=0.8,
+            serials={"B2": {"app": "com.b", "battery": [40],
+                            "events": [[0.1, "wm_set_resumed_activity", "[0,com.c/.Main,resume]"]]}},
+        )
+        output = os.path.join(tmp, "timelines")
+        summaries = {}
+        collector = DeviceCollector(FAKE_ADB, output, battery_interval=0.2,
+                                    on_summary=lambda serial, summary: summaries.__setitem__(serial, summary))
+
+        async def collect():
+            stop = asyncio.Event()
+            runner = asyncio.ensure_future(collector.run(stop))
+            await asyncio.sleep(1.6)  # both devices disconnect after 0.8s of sampling
+            stop.set()
+            await runner
+
+        asyncio.run(collect())
+
+        # The unauthorized device is never sampled
+        assert set(summaries) == {"A1", "B2"}
+        assert summaries["A1"]["battery"]["start_percent"] == 80
+        assert set(summaries["A1"]["apps"]) == {"com.a"}
+        assert summaries["B2"]["battery"] == {"start_percent": 40, "end_percent": 40, "drain_percent": 0}
+        assert set(summaries["B2"]["apps"]) == {"com.b", "com.c"}
+
+        # Running totals stay queryable after the devices disconnect
+        snapshot = collector.aggregators["B2"].snapshot()
+        assert {app["app"] for app in snapshot["apps"]} == {"com.b", "com.c"}
+        assert snapshot["current_app"] is None
+
+        # One timeline per device
+        for serial, apps in (("A1", {"com.a"}), ("B2", {"com.b", "com.c"})):
+            stamps = load_input_stamps(serial_directory(output, serial))
+            assert {app["app"] for app in stamps["apps"]} == apps
+
+        # One track-devices stream plus two long-lived processes per device
+        calls = launches(calls_log)
+        assert calls.count("track-devices") == 1
+        assert sorted(call.split(" shell")[0] for call in calls if call != "track-devices") == \
+            ["-s A1", "-s A1", "-s B2", "-s B2"]
+
+
+if __name__ == "__main__":
+    test_track_devices_parses_length_prefixed_lists()
+    test_collects_hot_plugged_devices_concurrently()
+    print("✅ All collector checks passed")
@@ -0,0 +1,188 @@
+"""
+Offline checks for the device sampler using fake_adb.py in place of adb.
+
+Usage:
+    python test_device_sampler.py
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+from datetime import date
+
+from device_sampler import (
+    AdbShell, DeviceSampler, MarkedOutput, UsageTracker, frame_commands, parse_battery_level,
+    parse_device_epoch, parse_event, parse_resumed_app, parse_screen_on,
+    POWER_QUERY, ACTIVITY_QUERY, BATTERY_QUERY,
+)
+from screen_timeline import END, read_timeline
+
+FAKE_ADB = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_adb.py")]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def scaled_clock(factor: float = 100.0):
+    """Real time sped up, so fractions of a second in the fake device become whole seconds."""
+    started = time.monotonic()
+    return lambda: (time.monotonic() - started) * factor
+
+
+def write_scenario(tmp: str, **scenario) -> str:
+    scenario.setdefault("calls_log", os.path.join(tmp, "calls.txt"))
+    path = os.path.join(tmp, "scenario.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(scenario, f)
+    os.environ["FAKE_ADB_SCENARIO"] = path
+    return scenario["calls_log"]
+
+
+def launches(calls_log: str) -> list:
+    with open(calls_log, "r", encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_parsers():
+    assert parse_screen_on("Display Power: state=ON\n")
+    assert not parse_screen_on("Display Power: state=OFF\n  mWakefulness=Asleep")
+    assert parse_resumed_app("  mResumedActivity: ActivityRecord{5f2a u0 com.a/.Main t42}") == "com.a"
+    assert parse_resumed_app("") is None
+    assert parse_battery_level("  level: 57") == 57
+
+    assert parse_event("1700000001.250  1000  1234 I wm_set_resumed_activity: [0,com.b/.Main,resume]") \
+        == (1700000001.25, "app", "com.b")
+    assert parse_event("1700000001.250  1000  1234 I am_set_resumed_activity: [0,com.c/.Main]")[2] == "com.c"
+    assert parse_event("1700000002.000  1000  1234 I screen_toggled: 0") == (1700000002.0, "screen", False)
+    assert parse_event("--------- beginning of events") is None
+    assert parse_device_epoch("1700000000\r\n") == 1700000000.0 and parse_device_epoch("") == 0.0
+
+    assert frame_commands(["date", "id"], "__M__") == "date; echo __M__0\nid; echo __M__1\n"
+    output = MarkedOutput("__M__", 2)
+    for line in ["1700000000\r\n", "__M__0\r\n", "__M__1\n"]:
+        assert not output.done
+        output.feed(line)
+    assert output.done and output.outputs == ["1700000000", ""]
+
+
+def test_tracker_integrates_between_changes():
+    clock = FakeClock()
+    tracker = UsageTracker(clock)
+    tracker.set_screen(True)
+    tracker.set_app("com.a")
+    tracker.set_battery(80)
+
+    clock.now = 30
+    tracker.set_app("com.b")
+    clock.now = 45
+    tracker.set_screen(False)
+    tracker.set_app("com.b")  # unchanged: must not reset the interval
+    clock.now = 60
+    tracker.set_battery(78)
+
+    summary = tracker.summary()
+    assert summary["screen"] == {"on_seconds": 45, "off_seconds": 15}
+    assert summary["apps"] == {"com.a": 30, "com.b": 30}
+    assert summary["battery"] == {"start_percent": 80, "end_percent": 78, "drain_percent": 2}
+
+
+def test_shell_multiplexes_queries_over_one_process():
+    with tempfile.TemporaryDirectory() as tmp:
+        calls_log = write_scenario(tmp, screen_on=True, app="com.a", battery=[90, 89])
+        shell = AdbShell(FAKE_ADB)
+        try:
+            for _ in range(5):
+                power, activity, battery = shell.run_many([POWER_QUERY, ACTIVITY_QUERY, BATTERY_QUERY])
+                assert parse_screen_on(power)
+                assert parse_resumed_app(activity) == "com.a"
+            assert parse_battery_level(shell.run(BATTERY_QUERY)) == 89
+        finally:
+            shell.close()
+        assert launches(calls_log) == ["shell"]
+
+
+def test_sampler_follows_events_until_disconnect():
+    with tempfile.TemporaryDirectory() as tmp:
+        calls_log = write_scenario(
+            tmp, screen_on=True, app="com.a", battery=[80, 79],
+            events=[[0.2, "wm_set_resumed_activity", "[0,com.b/.Main,resume]"],
+                    [0.4, "screen_toggled", "0"]],
+            disconnect_after=0.8,
+        )
+        changes = []
+        sampler = DeviceSampler(FAKE_ADB, battery_interval=0.3, clock=scaled_clock(),
+                                on_change=lambda kind, value: changes.append((kind, value)))
+        sampler.start()
+        started = time.monotonic()
+        sampler.run(duration=5)
+        summary = sampler.stop()
+
+        # Ended by the disconnect, not by the duration
+        assert time.monotonic() - started < 3
+        # The replayed (pre-session) screen_toggled event was ignored
+        assert changes[:3] == [("screen", True), ("app", "com.a"), ("battery", 80)]
+        assert ("app", "com.b") in changes and ("screen", False) in changes
+        assert summary["battery"]["start_percent"] == 80
+        assert summary["battery"]["end_percent"] == 79
+        assert set(summary["apps"]) == {"com.a", "com.b"}
+        assert summary["screen"]["on_seconds"] > 0 and summary["screen"]["off_seconds"] > 0
+
+        # Two adb processes for the whole session: the shell and the event stream
+        calls = launches(calls_log)
+        assert len(calls) == 2
+        assert calls[0] == "shell" and calls[1].startswith("shell logcat")
+
+
+def test_poll_mode_uses_the_persistent_shell():
+    with tempfile.TemporaryDirectory() as tmp:
+        calls_log = write_scenario(tmp, screen_on=False, app=None, battery=[50])
+        sampler = DeviceSampler(FAKE_ADB, serial="emulator-5554", use_events=False,
+                                poll_interval=0.05, battery_interval=0.1)
+        sampler.start()
+        sampler.run(duration=0.4)
+        summary = sampler.stop()
+
+        assert summary["apps"] == {}
+        assert summary["battery"]["drain_percent"] == 0
+        assert launches(calls_log) == ["-s emulator-5554 shell"]
+
+
+def test_script_reports_without_a_device():
+    if os.name == "nt":
+        print("⚠️ Needs a POSIX shell for the stand-in adb; skipping the script check")
+        return
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "script.py")
+    with tempfile.TemporaryDirectory() as tmp:
+        no_devices = os.path.join(tmp, "adb")
+        with open(no_devices, "w") as f:
+            f.write("#!/bin/sh\necho 'adb: no devices/emulators found' >&2\nexit 1\n")
+        os.chmod(no_devices, 0o755)
+
+        for adb_path in (no_devices, os.path.join(tmp, "missing-adb")):
+            timeline = os.path.join(tmp, "timeline-" + os.path.basename(adb_path))
+            env = dict(os.environ, ADB_PATH=adb_path, TIMELINE_DIR=timeline, SNAPSHOT_PORT="0")
+            result = subprocess.run([sys.executable, script], env=env, capture_output=True, text=True,
+                                    timeout=30)
+            assert result.returncode == 0, result.stderr
+            assert "adb error" in result.stderr and "Traceback" not in result.stderr
+            assert json.loads(result.stdout)["apps"] == {}
+            # The timeline run was closed with an END row
+            assert [kind for _, kind, _ in read_timeline(timeline, date.today())] == [END]
+
+
+if __name__ == "__main__":
+    test_parsers()
+    test_tracker_integrates_between_changes()
+    test_shell_multiplexes_queries_over_one_process()
+    test_sampler_follows_events_until_disconnect()
+    test_poll_mode_uses_the_persistent_shell()
+    test_script_reports_without_a_device()
+    print("✅ All device sampler checks passed")
@@ -0,0 +1,95 @@
+"""
+Startup regression test based on `python -X importtime`.
+
+Imports each entry module in a fresh interpreter and checks that
+  - none of the heavy optional libraries are imported at module load, and
+  - the module's cumulative import time stays within its budget.
+
+Run with pytest, or directly: python test_import_time.py
+"""
+
+import os
+import re
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# (module, directory it is imported from, budget in milliseconds, libraries that must stay unimported)
+ENTRY_POINTS = [
+    ("medical_report_analyzer", os.path.join(ROOT, "pdftoprompt1"), 80,
+     ["pdfplumber", "requests", "PIL", "pytesseract", "pdf2image", "docx"]),
+    ("services.promptProcessor", os.path.join(ROOT, "agent"), 60,
+     ["google.generativeai", "openai", "PIL"]),
+]
+
+# Budgets are for a typical laptop; scale them on slow CI machines
+BUDGET_SCALE = float(os.getenv("IMPORT_TIME_BUDGET_SCALE", "1.0"))
+RUNS = 3
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def measure_import(module: str, cwd: str) -> dict:
+    """
+    Import module in a fresh interpreter with -X importtime.
+
+    Returns:
+        Dictionary of imported module name -> cumulative import time in microseconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": cwd},
+    )
+    if result.returncode != 0:
+        raise AssertionError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            timings[match.group(4)] = int(match.group(2))
+    return timings
+
+
+def best_of(module: str, cwd: str, runs: int = RUNS) -> tuple:
+    """Fastest of several runs (ms) and the set of modules imported."""
+    best_ms, imported = float("inf"), set()
+    for _ in range(runs):
+        timings = measure_import(module, cwd)
+        best_ms = min(best_ms, timings[module] / 1000)
+        imported = set(timings)
+    return best_ms, imported
+
+
+def check_entry_point(module: str, cwd: str, budget_ms: float, heavy: list):
+    best_ms, imported = best_of(module, cwd)
+
+    eager = sorted(name for name in imported
+                   if any(name == lib or name.startswith(lib + ".") for lib in heavy))
+    assert not eager, f"{module} imports {', '.join(eager)} at module load"
+
+    limit = budget_ms * BUDGET_SCALE
+    assert best_ms <= limit, f"{module} took {best_ms:.1f} ms to import (budget {limit:.0f} ms)"
+    return best_ms
+
+
+def test_medical_report_analyzer_import_time():
+    check_entry_point(*ENTRY_POINTS[0])
+
+
+def test_prompt_processor_import_time():
+    check_entry_point(*ENTRY_POINTS[1])
+
+
+if __name__ == "__main__":
+    failed = False
+    for module, cwd, budget_ms, heavy in ENTRY_POINTS:
+        try:
+            ms = check_entry_point(module, cwd, budget_ms, heavy)
+            print(f"✅ {module}: {ms:.1f} ms (budget {budget_ms * BUDGET_SCALE:.0f} ms)")
+        except AssertionError as e:
+            failed = True
+            print(f"❌ {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,164 @@
+"""
+Offline checks for the incremental screen-time aggregator and its snapshot server.
+
+Usage:
+    python test_screen_aggregator.py
+"""
+
+import time
+import tempfile
+from datetime import date, timedelta
+
+from screen_aggregator import ScreenTimeAggregator, fetch_snapshot, serve_snapshots
+from screen_timeline import APP, BATTERY, END, SCREEN, load_input_stamps, read_timeline
+from test_screen_timeline import FakeClock, local_epoch, make_recorder
+
+
+def make_aggregator(start_epoch: float):
+    clock = FakeClock()
+    return ScreenTimeAggregator(clock=clock, wall_clock=lambda: start_epoch), clock
+
+
+def test_snapshot_matches_timeline_and_tracks_sessions():
+    day = date(2026, 1, 23)
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder, clock = make_recorder(tmp, local_epoch(day, 9, 50))
+        aggregator = ScreenTimeAggregator(clock=clock, wall_clock=lambda: local_epoch(day, 9, 50))
+
+        def change(at, kind, value):
+            clock.now = at
+            recorder.on_change(kind, value)
+            aggregator.on_change(kind, value)
+
+        change(0, "screen", True)
+        change(0, "app", "com.whatsapp")
+        change(0, "battery", 70)
+        change(300, "app", "com.instagram.android")  # 09:55
+        change(900, "screen", False)                  # 10:05, session of 15 min
+        change(1200, "screen", True)                  # 10:10
+        change(1200, "app", "com.whatsapp")
+        change(1500, "battery", 68)
+
+        clock.now = 1800  # 10:20, screen still on
+        snapshot = aggregator.snapshot()
+        recorder.close()
+
+        stamps = load_input_stamps(tmp, day)
+        assert snapshot["screen"] == stamps["screen"] == {"total_on_time_sec": 1500, "total_off_time_sec": 300}
+        assert snapshot["apps"] == stamps["apps"]
+        assert snapshot["battery"] == {"start_level_percent": 70, "end_level_percent": 68, "drain_percent": 2}
+
+        assert snapshot["hourly_screen_on_sec"][9] == 600
+        assert snapshot["hourly_screen_on_sec"][10] == 900
+        assert sum(snapshot["hourly_screen_on_sec"]) == 1500
+        assert snapshot["app_switches"] == 2
+        assert snapshot["screen_sessions"] == 2
+        assert snapshot["current_app"] == "com.whatsapp"
+        assert snapshot["current_session_sec"] == 600
+        assert snapshot["longest_session_sec"] == 900
+
+        # Snapshots do not close anything: totals keep growing from the same state
+        clock.now = 2400
+        assert aggregator.snapshot()["current_session_sec"] == 1200
+        assert aggregator.snapshot()["longest_session_sec"] == 1200
+
+
+def test_rolls_over_at_midnight_and_replays_after_restart():
+    day = date(2026, 1, 23)
+    aggregator, clock = make_aggregator(local_epoch(day, 23, 50))
+    aggregator.on_change("screen", True)
+    aggregator.on_change("app", "com.instagram.android")
+    aggregator.on_change("battery", 50)
+    clock.now = 20 * 60  # 00:10 the next day
+
+    snapshot = aggregator.snapshot()
+    assert snapshot["date"] == (day + timedelta(days=1)).isoformat()
+    assert snapshot["screen"]["total_on_time_sec"] == 600
+    assert snapshot["apps"] == [{"app": "com.instagram.android", "foreground_time_sec": 600}]
+    assert snapshot["battery"]["start_level_percent"] is None
+    assert snapshot["screen_sessions"] == 1 and snapshot["current_session_sec"] == 600
+
+    # After a restart, today's totals come back from the timeline; a run that
+    # crashed without END is not counted past its last event
+    start = local_epoch(day, 9)
+    events = [
+        (start, SCREEN, True), (start, APP, "com.whatsapp"), (start, BATTERY, 80),
+        (start + 60, END, None),
+        (start + 3600, SCREEN, True), (start + 3600, APP, "com.whatsapp"),
+        (start + 3630, APP, "com.instagram.android"),
+    ]
+    restarted, clock = make_aggregator(start + 7200)
+    restarted.replay(iter(events))
+    snapshot = restarted.snapshot()
+    assert snapshot["screen"]["total_on_time_sec"] == 90
+    assert snapshot["apps"] == [{"app": "com.instagram.android", "foreground_time_sec": 0},
+                                {"app": "com.whatsapp", "foreground_time_sec": 90}]
+    assert snapshot["current_app"] is None and snapshot["current_session_sec"] == 0
+
+    restarted.on_change("screen", True)
+    clock.now = 60
+    assert restarted.snapshot()["screen"]["total_on_time_sec"] == 150
+    assert restarted.snapshot()["screen_sessions"] == 3
+
+
+def test_snapshot_cost_does_not_grow_with_history():
+    day = date(2026, 1, 23)
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder, clock = make_recorder(tmp, local_epoch(day, 0), flush_rows=256)
+        aggregator = ScreenTimeAggregator(clock=clock, wall_clock=lambda: local_epoch(day, 0))
+        apps = [f"com.example.app{i}" for i in range(40)]
+        # A day of heavy use: an event every 2 seconds
+        for i in range(43000):
+            clock.now = i * 2
+            kind, value = ("screen", i % 80 == 0) if i % 40 == 0 else ("app", apps[i % len(apps)])
+            recorder.on_change(kind, value)
+            aggregator.on_change(kind, value)
+        recorder.flush()
+
+        started = time.perf_counter()
+        for _ in range(1000):
+            snapshot = aggregator.snapshot()
+        per_snapshot = (time.perf_counter() - started) / 1000
+
+        started = time.perf_counter()
+        rescanned = ScreenTimeAggregator(clock=clock, wall_clock=lambda: local_epoch(day, 0))
+        rescanned.replay(read_timeline(tmp, day))
+        rescan = time.perf_counter() - started
+        recorder.close()
+
+        assert per_snapshot < 0.002, per_snapshot
+        assert per_snapshot * 20 < rescan, (per_snapshot, rescan)
+        assert snapshot["screen"]["total_on_time_sec"] == rescanned.snapshot(
+            now=local_epoch(day, 0) + clock.now)["screen"]["total_on_time_sec"]
+
+
+def test_serves_snapshots_per_serial():
+    day = date(2026, 1, 23)
+    phone, clock = make_aggregator(local_epoch(day, 12))
+    phone.on_change("screen", True)
+    phone.on_change("app", "com.whatsapp")
+    tablet, _ = make_aggregator(local_epoch(day, 12))
+    clock.now = 45
+
+    server = serve_snapshots({"A1": phone, "B2": tablet}, port=0)
+    try:
+        port = server.server_address[1]
+        snapshot = fetch_snapshot(port, serial="A1")
+        assert snapshot["serial"] == "A1"
+        assert snapshot["apps"] == [{"app": "com.whatsapp", "foreground_time_sec": 45}]
+        assert fetch_snapshot(port, serial="B2")["screen"]["total_on_time_sec"] == 0
+        try:
+            fetch_snapshot(port)  # ambiguous with two devices
+            assert False, "expected 404"
+        except Exception as e:
+            assert getattr(e, "code", None) == 404
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_snapshot_matches_timeline_and_tracks_sessions()
+    test_rolls_over_at_midnight_and_replays_after_restart()
+    test_snapshot_cost_does_not_grow_with_history()
+    test_serves_snapshots_per_serial()
+    print("✅ All aggregator checks passed")
@@ -0,0 +1,154 @@
+"""
+Offline checks for the screen-time timeline recorder and reader.
+
+Usage:
+    python test_screen_timeline.py
+"""
+
+import os
+import time
+import tempfile
+from datetime import date, datetime, timedelta
+
+from screen_timeline import (
+    APP, BATTERY, END, SCREEN, TimelineRecorder, load_day, load_input_stamps,
+    read_timeline, timeline_path, to_input_stamps,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def local_epoch(day: date, hour: int, minute: int = 0) -> float:
+    return datetime(day.year, day.month, day.day, hour, minute).timestamp()
+
+
+def make_recorder(directory: str, start_epoch: float, **kwargs):
+    clock = FakeClock()
+    recorder = TimelineRecorder(directory, clock=clock, wall_clock=lambda: start_epoch, **kwargs)
+    return recorder, clock
+
+
+def test_round_trip_matches_sampler_summary():
+    day = date(2026, 1, 23)
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder, clock = make_recorder(tmp, local_epoch(day, 9), flush_rows=3)
+        recorder.on_change("screen", True)
+        recorder.on_change("app", "com.sec.android.app.launcher")
+        recorder.on_change("battery", 65)
+        clock.now = 13
+        recorder.on_change("app", "com.whatsapp")
+        recorder.on_change("battery", 65)  # unchanged: not recorded
+        clock.now = 44
+        recorder.on_change("app", "com.instagram.android")
+        clock.now = 126
+        recorder.on_change("screen", False)
+        clock.now = 128.5
+        recorder.on_change("battery", 64)
+        recorder.close()
+
+        timeline = load_day(timeline_path(tmp, day))
+        assert list(timeline.kinds) == [SCREEN, APP, BATTERY, APP, APP, SCREEN, BATTERY, END]
+        assert timeline.timestamps[-1] - timeline.timestamps[0] == 128.5
+
+        stamps = load_input_stamps(tmp, day, include_sessions=True)
+        assert stamps["screen"] == {"total_on_time_sec": 126, "total_off_time_sec": 2}
+        assert stamps["battery"] == {"start_level_percent": 65, "end_level_percent": 64, "drain_percent": 1}
+        assert stamps["apps"] == [
+            {"app": "com.sec.android.app.launcher", "foreground_time_sec": 13},
+            {"app": "com.whatsapp", "foreground_time_sec": 31},
+            {"app": "com.instagram.android", "foreground_time_sec": 84},
+        ]
+        session, = stamps["sessions"]
+        assert session["duration_sec"] == 126 and session["app_switches"] == 2
+
+
+def test_runs_are_separate_and_apps_stay_interned_on_reopen():
+    day = date(2026, 1, 23)
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder, clock = make_recorder(tmp, local_epoch(day, 9))
+        recorder.on_change("screen", True)
+        recorder.on_change("app", "com.whatsapp")
+        clock.now = 60
+        recorder.close()
+
+        # A second sampler run an hour later appends to the same file
+        recorder, clock = make_recorder(tmp, local_epoch(day, 10))
+        recorder.on_change("screen", True)
+        recorder.on_change("app", "com.whatsapp")
+        clock.now = 30
+        recorder.close()
+
+        timeline = load_day(timeline_path(tmp, day))
+        assert timeline.apps == [None, "com.whatsapp"]
+        stamps = load_input_stamps(tmp, day)
+        # The hour between the runs is not counted
+        assert stamps["screen"]["total_on_time_sec"] == 90
+        assert stamps["apps"] == [{"app": "com.whatsapp", "foreground_time_sec": 90}]
+
+
+def test_rolls_over_at_midnight_and_survives_truncation():
+    day = date(2026, 1, 23)
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder, clock = make_recorder(tmp, local_epoch(day, 23, 50))
+        recorder.on_change("screen", True)
+        recorder.on_change("app", "com.instagram.android")
+        clock.now = 20 * 60  # 00:10 the next day
+        recorder.on_change("app", "com.whatsapp")
+        clock.now = 25 * 60
+        recorder.close()
+
+        first = load_input_stamps(tmp, day)
+        second = load_input_stamps(tmp, day + timedelta(days=1))
+        assert first["apps"] == [{"app": "com.instagram.android", "foreground_time_sec": 599}]
+        assert {app["app"]: app["foreground_time_sec"] for app in second["apps"]} == \
+            {"com.instagram.android": 600, "com.whatsapp": 300}
+        assert second["screen"]["total_on_time_sec"] == 900
+
+        both = load_input_stamps(tmp, day + timedelta(days=1), days=2)
+        assert both["screen"]["total_on_time_sec"] == 1499
+
+        # A block cut short by a crash is skipped, earlier blocks still load
+        path = timeline_path(tmp, day + timedelta(days=1))
+        with open(path, "ab") as f:
+            f.write(b"STL1\x05\x00")
+        assert len(load_day(path)) == 4
+
+
+def test_multi_day_history_is_small_and_fast():
+    start = date(2026, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder, clock = make_recorder(tmp, local_epoch(start, 0), flush_rows=256)
+        apps = [f"com.example.app{i}" for i in range(40)]
+        # A week of heavy use: an event every 30 seconds
+        for i in range(7 * 24 * 120):
+            clock.now = i * 30
+            if i % 40 == 0:
+                recorder.on_change("screen", i % 80 == 0)
+            else:
+                recorder.on_change("app", apps[i % len(apps)])
+        recorder.close()
+
+        size = sum(os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp))
+        assert size < 200 * 1024, size
+
+        started = time.perf_counter()
+        events = list(read_timeline(tmp, start, start + timedelta(days=7)))
+        stamps = to_input_stamps(iter(events), session_end=events[-1][0])
+        elapsed = time.perf_counter() - started
+        assert len(events) >= 7 * 24 * 120
+        assert len(stamps["apps"]) == len(apps) - 1  # apps[0] slots are screen events
+        assert elapsed < 1.0, elapsed
+
+
+if __name__ == "__main__":
+    test_round_trip_matches_sampler_summary()
+    test_runs_are_separate_and_apps_stay_interned_on_reopen()
+    test_rolls_over_at_midnight_and_survives_truncation()
+    test_multi_day_history_is_small_and_fast()
+    print("✅ All timeline checks passed")